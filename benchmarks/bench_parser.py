@@ -0,0 +1,116 @@
+# bench_parser.py - proxy list parsing throughput
+#
+# Usage: python benchmarks/bench_parser.py [lines] [repeats]
+#
+# Generates a synthetic provider export (default 1,000,000 lines, both
+# credential formats, ~2% invalid lines) and reports lines/sec, best of
+# `repeats` runs (default 3), for:
+#   * the parser as it was before the batch parser (patterns looked up in
+#     re's cache on every call, no host memoization), called once per line;
+#   * today's parse_proxy_line, called once per line;
+#   * the batch parser, parse_proxy_lines.
+import sys
+import os
+import gc
+import re
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.records import ProxyRecord
+from src.utils import parse_proxy_line, parse_proxy_lines
+
+
+def make_lines(count: int) -> list:
+    lines = []
+    for i in range(count):
+        if i % 50 == 49:
+            lines.append(f"broken-line-{i}")
+        elif i % 3:
+            lines.append(f"gw{i % 40}.example.com:{10000 + i % 5000}:user-session-{i}:secret")
+        else:
+            lines.append(f"user{i}:secret@10.{i % 256}.{(i >> 8) % 256}.{i % 200}:8080")
+    return lines
+
+
+def legacy_parse_proxy_line(line: str, proxy_type: str = None) -> ProxyRecord:
+    # The validation of parse_proxy_line before the batch parser, condensed
+    line = line.strip()
+    if not line:
+        raise ValueError("Empty proxy line")
+    username = password = ''
+    if '@' in line:
+        parts = line.split('@')
+        if len(parts) != 2:
+            raise ValueError(f"Invalid proxy format: {line}")
+        cred_parts = parts[0].split(':')
+        if len(cred_parts) != 2:
+            raise ValueError(f"Invalid credentials format: {parts[0]}")
+        username, password = cred_parts
+        host_parts = parts[1].split(':')
+        if len(host_parts) != 2:
+            raise ValueError(f"Invalid host:port format: {parts[1]}")
+        host, port = host_parts
+    else:
+        parts = line.split(':')
+        if len(parts) != 4:
+            raise ValueError(f"Invalid proxy format: {line}")
+        host, port, username, password = parts
+    if not host or not port:
+        raise ValueError("Host and port cannot be empty")
+    port_num = int(port)
+    if port_num < 1 or port_num > 65535:
+        raise ValueError(f"Port must be between 1-65535, got: {port}")
+    if not username or not password:
+        raise ValueError("Username and password cannot be empty")
+    if re.match(r'^\d+\.\d+\.\d+\.\d+$', host):
+        for octet in host.split('.'):
+            if int(octet) > 255:
+                raise ValueError(f"Invalid IPv4 address: {host}")
+    elif not re.match(r'^[a-zA-Z0-9]([a-zA-Z0-9\-\.]*[a-zA-Z0-9])?$', host):
+        raise ValueError(f"Invalid hostname format: {host}")
+    proxy = ProxyRecord(host=host, port=port, username=username, password=password, raw=line)
+    if proxy_type:
+        proxy.type = 'socks5' if proxy_type.lower() in ('socks', 'socks5') else 'http'
+    return proxy
+
+
+def _per_line(parse) -> callable:
+    def run(lines: list) -> int:
+        # What main() did before the batch parser: one call per line
+        proxies = []
+        for line in lines:
+            try:
+                proxies.append(parse(line, "http"))
+            except ValueError:
+                pass
+        return len(proxies)
+    return run
+
+
+def batch(lines: list) -> int:
+    proxies, report = parse_proxy_lines(lines, "http")
+    return len(proxies)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    lines = make_lines(count)
+    runs = (
+        ("old parser per line", _per_line(legacy_parse_proxy_line)),
+        ("parse_proxy_line per line", _per_line(parse_proxy_line)),
+        ("parse_proxy_lines batch", batch),
+    )
+    for name, func in runs:
+        best = float("inf")
+        for _ in range(repeats):
+            gc.collect()
+            start = time.perf_counter()
+            valid = func(lines)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:28} {count:>10,} lines  {valid:>10,} valid  {best:6.2f}s  {count / best:>12,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""Asyncio connectivity engine.
+
+Runs the initial HTTP/SOCKS5 connectivity check for thousands of proxies on a
+single event loop instead of one blocking thread per check. Each check talks
+to the proxy over asyncio streams and returns the same ProxyResult as
+test_http_proxy/test_socks_proxy, so the geo, speed and export phases work
+unchanged.
+"""
+import asyncio
+import socket
+import time
+from typing import Callable, List, Optional
+
+from src.budget import DEADLINE, DEADLINE_GRACE, TRACKER, DeadlineExceeded, cut_off, deadline_result, expired, remaining, request_timeouts
+from src.concurrency import AdaptiveLimiter
+from src.host_scheduler import HostScheduler
+from src.config import ASYNC_CONCURRENCY, IP_API_URL
+from src.records import ProxyRecord, ProxyResult, Status, result_type
+from src.raw_http import build_get_request, parse_echo_ip, read_response, split_url
+from src.retry import ProxyUnreachable, backoff_delay, classify_error, is_retriable
+from src.socks5_client import socks5_handshake_async
+from src.timing import PhaseTimer
+from src.ui import print_debug
+import src.config as config_module
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# File descriptors kept free for stdout, log files, DNS, etc.
+FD_HEADROOM = 64
+
+
+def raise_fd_limit(wanted: int) -> int:
+    """
+    Raise the soft open-file limit towards wanted (bounded by the hard limit)
+    and return how many concurrent connections it allows.
+    """
+    if resource is None:
+        return wanted
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        target = wanted + FD_HEADROOM
+        if hard != resource.RLIM_INFINITY:
+            target = min(target, hard)
+        if target > soft:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        return max(1, min(wanted, soft - FD_HEADROOM))
+    except (ValueError, OSError):
+        return wanted
+
+
+async def _repeat_probes(reader, writer, request: bytes, count: int, timer: PhaseTimer) -> None:
+    """asyncio counterpart of raw_http.repeat_probes."""
+    for _ in range(count):
+        if expired():
+            return
+        sent = time.monotonic()
+        writer.write(request)
+        await writer.drain()
+        status, headers, _ = await read_response(reader)
+        if status != 200:
+            return
+        timer.samples.append(time.monotonic() - sent)
+        if headers.get("connection", "").lower() == "close":
+            return
+
+
+async def _fetch_ip(proxy: ProxyRecord, proxy_type: str, timer: PhaseTimer, connect_timeout: float,
+                    samples: int = 1, probe_until: float = 0.0) -> str:
+    """
+    Fetch IP_API_URL through the proxy and return the reported exit IP.
+
+    With samples > 1 the request is repeated on the kept-alive connection
+    until time.monotonic() reaches probe_until; failures there do not fail
+    the check.
+    """
+    _, target_host, target_port, _ = split_url(IP_API_URL)
+    loop = asyncio.get_running_loop()
+    address = proxy.address  # already resolved by the host scheduler
+    if address:
+        addresses = [address]
+    else:
+        try:
+            infos = await loop.getaddrinfo(proxy.host, proxy.port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            raise ProxyUnreachable(f"Cannot resolve proxy host {proxy.host}: {e}") from e
+        addresses = [info[4][0] for info in infos]
+    timer.mark("dns")
+    # Like raw_http.open_timed_connection: try every address until one accepts
+    last_error: Optional[BaseException] = None
+    for address in addresses:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(address, proxy.port),
+                connect_timeout
+            )
+            break
+        except (OSError, asyncio.TimeoutError) as e:
+            last_error = e
+    else:
+        raise ProxyUnreachable(f"Cannot connect to proxy: {last_error or 'timed out'}") from last_error
+    timer.mark("connect")
+    try:
+        if proxy_type == "socks":
+            await socks5_handshake_async(reader, writer, proxy, target_host, target_port)
+            timer.mark("handshake")
+            request = build_get_request(IP_API_URL, keep_alive=samples > 1)
+        else:
+            request = build_get_request(
+                IP_API_URL,
+                proxy_auth=(proxy.username, proxy.password),
+                absolute_form=True,
+                keep_alive=samples > 1,
+            )
+        sent = time.monotonic()
+        writer.write(request)
+        await writer.drain()
+
+        status, _, body = await read_response(reader, on_head=lambda: timer.mark("ttfb"))
+        timer.skip()
+        timer.samples.append(time.monotonic() - sent)
+        ip = parse_echo_ip(status, body)
+        probe_timeout = probe_until - time.monotonic()
+        if samples > 1 and probe_timeout > 0:
+            timer.stop()
+            try:
+                await asyncio.wait_for(
+                    _repeat_probes(reader, writer, request, samples - 1, timer),
+                    probe_timeout
+                )
+            except (OSError, EOFError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError):
+                pass  # keep the samples gathered so far
+        return ip
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def check_proxy_async(proxy: ProxyRecord, proxy_type: str, timeout: Optional[float] = None) -> ProxyResult:
+    """Asynchronously test one proxy's connectivity (fast check)."""
+    result = ProxyResult(result_type(proxy_type))
+    attempt = 0
+    while True:
+        timer = PhaseTimer()
+        try:
+            connect_timeout, read_timeout = request_timeouts()
+            attempt_timeout = timeout if timeout is not None else connect_timeout + read_timeout
+            # Repeat probes get their own allowance on top of the check itself
+            samples = config_module.LATENCY_SAMPLES
+            attempt_timeout += read_timeout * (samples - 1)
+            left = remaining()
+            if left is not None:
+                attempt_timeout = min(attempt_timeout, left)
+            # Probing stops just short of the attempt timeout so a working result is never lost
+            probe_until = timer.start + attempt_timeout - DEADLINE_GRACE
+            ip = await asyncio.wait_for(
+                _fetch_ip(proxy, proxy_type, timer, connect_timeout, samples, probe_until),
+                attempt_timeout
+            )
+            result.ip = ip
+            result.latency = timer.elapsed()
+            result.phases = timer.phases
+            result.samples = timer.samples
+            result.status = Status.WORKING
+            result.error = result.error_kind = None
+            TRACKER.observe(timer.phases, timer.elapsed())
+            return result
+        except DeadlineExceeded as e:
+            # Also an asyncio.TimeoutError on 3.11+, so it must be caught first
+            error = e
+            result.error = str(e)
+        except asyncio.TimeoutError as e:
+            error = e
+            result.error = f"Timed out after {attempt_timeout:.1f}s"
+        except (OSError, EOFError, asyncio.LimitOverrunError, ValueError) as e:
+            error = e
+            result.error = str(e) or type(e).__name__
+        result.error_kind = classify_error(error)
+
+        attempt += 1
+        delay = backoff_delay(attempt)
+        left = remaining()
+        if (attempt > config_module.MAX_RETRIES or not is_retriable(error)
+                or (left is not None and delay >= left)):
+            if cut_off(result.error_kind):
+                result.status = DEADLINE
+            print_debug(f"[ASYNC] {proxy.raw} → {result.error}")
+            return result
+        await asyncio.sleep(delay)
+
+
+async def _run_checks(
+    proxies: List[ProxyRecord],
+    proxy_type: str,
+    concurrency: int,
+    timeout: Optional[float],
+    on_result: Optional[Callable[[int, ProxyResult], None]],
+    limiter: Optional[AdaptiveLimiter],
+    scheduler: Optional[HostScheduler],
+) -> List[Optional[ProxyResult]]:
+    results: List[Optional[ProxyResult]] = [None] * len(proxies)
+    if scheduler is None:
+        scheduler = HostScheduler(proxies)
+    slots = asyncio.Condition()
+    loop = asyncio.get_running_loop()
+
+    def can_start() -> bool:
+        return scheduler.exhausted or ((limiter is None or limiter.can_start()) and scheduler.ready())
+
+    def finish(idx: int, result: ProxyResult) -> None:
+        scheduler.done(idx)
+        results[idx] = result
+        if on_result:
+            on_result(idx, result)
+
+    async def worker():
+        # The event loop is single-threaded, so workers can share the scheduler
+        while True:
+            async with slots:
+                await slots.wait_for(can_start)
+                idx = scheduler.next()
+                if idx is None:
+                    return
+                if expired():
+                    # Out of scan budget: report the rest without checking them
+                    finish(idx, deadline_result(proxy_type))
+                    continue
+                if limiter:
+                    limiter.started()
+
+            start = time.monotonic()
+            try:
+                if scheduler.needs_lookup(idx):
+                    # First proxy on this host: resolve it once, off the event loop
+                    error = await loop.run_in_executor(None, scheduler.prepare, idx)
+                else:
+                    error = scheduler.prepare(idx)
+                if error:
+                    result = ProxyResult(result_type(proxy_type), Status.FAILED, error, "unreachable")
+                else:
+                    result = await check_proxy_async(proxies[idx], proxy_type, timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # An unexpected error fails this proxy only; escaping would abort
+                # the gather and lose every other result
+                print_debug(f"[ASYNC] {proxies[idx]['raw']} → unexpected {type(e).__name__}: {e}")
+                result = ProxyResult(result_type(proxy_type), Status.FAILED, str(e) or type(e).__name__, "other")
+            if limiter:
+                limiter.record(time.monotonic() - start if result.working else None, result.error_kind)
+            async with slots:
+                finish(idx, result)
+                slots.notify_all()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def run_async_checks(
+    proxies: List[ProxyRecord],
+    proxy_type: str,
+    concurrency: int = ASYNC_CONCURRENCY,
+    timeout: Optional[float] = None,
+    on_result: Optional[Callable[[int, ProxyResult], None]] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    scheduler: Optional[HostScheduler] = None,
+) -> List[Optional[ProxyResult]]:
+    """
+    Check all proxies on one event loop with up to `concurrency` checks in flight.
+
+    Args:
+        proxies: Parsed proxies (from parse_proxy_line)
+        proxy_type: 'http' or 'socks'
+        concurrency: Maximum number of simultaneous connections
+        timeout: Per-attempt timeout in seconds (default: connect + read timeout)
+        on_result: Optional callback(index, result) invoked as each check finishes
+        limiter: Optional AdaptiveLimiter; checks in flight then follow its
+            limit (capped at `concurrency`) instead of staying fixed
+        scheduler: HostScheduler deciding the order and per-host caps
+            (default: one over proxies with config.PER_HOST_LIMIT)
+
+    Returns:
+        Results in the same order as proxies
+    """
+    if not proxies:
+        return []
+    concurrency = raise_fd_limit(min(concurrency, len(proxies)))
+    if limiter:
+        limiter.set_maximum(concurrency)
+    print_debug(f"Async engine: {len(proxies)} proxies → up to {concurrency} concurrent checks")
+    return asyncio.run(_run_checks(proxies, proxy_type, concurrency, timeout, on_result, limiter, scheduler))
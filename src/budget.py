@@ -0,0 +1,117 @@
+"""Global time budget for a scan (--budget SECONDS).
+
+With a budget the scan has a wall-clock deadline (config.SCAN_DEADLINE) and
+per-request timeouts stop being fixed: once enough proxies have answered,
+the connect and read timeouts shrink to a multiple of the p95 latency seen so
+far, so a slow tail of dead proxies cannot hold the scan hostage. Every
+timeout is also clamped to the time left before the deadline.
+
+Proxies that never got checked, or whose check was cut short by the deadline,
+get the status "Deadline" instead of "Failed".
+
+The deadline is a time.time() value so it carries over unchanged to --workers
+processes; latency statistics are kept per process.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import src.config as config_module
+from src.records import ProxyResult, Status, result_type
+from src.timing import percentile
+
+DEADLINE = Status.DEADLINE
+
+# A timeout this close to the deadline counts as cut off by it
+DEADLINE_GRACE = 0.05
+
+
+class DeadlineExceeded(TimeoutError):
+    """No time is left in the scan budget."""
+
+
+class LatencyTracker:
+    """Rolling window of successful-check latencies (thread-safe)."""
+
+    def __init__(self, window: Optional[int] = None):
+        window = window or config_module.BUDGET_SAMPLE_WINDOW
+        self._connect = deque(maxlen=window)
+        self._total = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, phases: Optional[Dict[str, Optional[float]]], total: float) -> None:
+        with self._lock:
+            self._total.append(total)
+            connect = (phases or {}).get("connect")
+            if connect is not None:
+                self._connect.append(connect)
+
+    def p95(self) -> Optional[Tuple[Optional[float], float]]:
+        """(connect p95, total p95) in seconds, or None during warm-up."""
+        with self._lock:
+            if len(self._total) < config_module.BUDGET_WARMUP_SAMPLES:
+                return None
+            connect = sorted(self._connect)
+            total = sorted(self._total)
+        return (percentile(connect, 95) if connect else None), percentile(total, 95)
+
+
+# Latencies observed by this process's checkers
+TRACKER = LatencyTracker()
+
+
+def start_budget(seconds: float) -> None:
+    """Start the clock: the scan must be over `seconds` from now."""
+    config_module.SCAN_DEADLINE = time.time() + seconds
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (None without a budget)."""
+    if config_module.SCAN_DEADLINE is None:
+        return None
+    return config_module.SCAN_DEADLINE - time.time()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def request_timeouts() -> Tuple[float, float]:
+    """
+    (connect timeout, read timeout) for the next attempt.
+
+    Without a budget these are config.CONNECT_TIMEOUT/REQUEST_TIMEOUT. With
+    one they are lowered to BUDGET_TIMEOUT_MULTIPLIER × p95 once warmed up,
+    and never exceed the time left.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    connect, read = config_module.CONNECT_TIMEOUT, config_module.REQUEST_TIMEOUT
+    left = remaining()
+    if left is None:
+        return connect, read
+    if left <= 0:
+        raise DeadlineExceeded("Scan budget exhausted")
+
+    stats = TRACKER.p95()
+    if stats:
+        connect_p95, total_p95 = stats
+        factor, floor = config_module.BUDGET_TIMEOUT_MULTIPLIER, config_module.BUDGET_MIN_TIMEOUT
+        if connect_p95 is not None:
+            connect = min(connect, max(floor, factor * connect_p95))
+        read = min(read, max(floor, factor * total_p95))
+    return min(connect, left), min(read, left)
+
+
+def cut_off(error_kind: Optional[str]) -> bool:
+    """True if a failed check ran out of budget rather than failing on its own."""
+    left = remaining()
+    return left is not None and error_kind == "timeout" and left <= DEADLINE_GRACE
+
+
+def deadline_result(proxy_type: str) -> ProxyResult:
+    """Result for a proxy the scan never got to before the deadline"""
+    return ProxyResult(result_type(proxy_type), DEADLINE, "Scan budget exhausted before this proxy was checked")
@@ -0,0 +1,97 @@
+"""Checkpoint journal for interrupted scans (--checkpoint FILE, --resume).
+
+Ctrl+C or a crash used to throw away every result of a long scan. With
+--checkpoint, each phase a proxy completes (connectivity, geo, speed) is
+appended to a journal: one compact JSON line with the proxy's index in the
+parsed list, the phase and the result so far. Lines go through the same
+background writer as -o, so they are flushed in batches and fsynced every
+config.OUTPUT_FSYNC_INTERVAL seconds.
+
+--resume reads the journal back: the lines of each index say which phases
+it has been through (a later connectivity line, from a retry, starts it
+over) and its latest result. main() only runs the phases that are missing
+and keeps appending to the same journal.
+
+The first line identifies the proxy list, so a journal is never applied to
+a list other than the one it was written for.
+"""
+import hashlib
+import json
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from src.records import ProxyRecord, ProxyResult, as_dict
+from src.sharding import CHECK, GEO, SPEED
+from src.stream_out import BackgroundWriter
+
+JOURNAL_VERSION = 1
+
+# Proxy index -> (phases completed, latest result)
+Progress = Dict[int, Tuple[FrozenSet[str], ProxyResult]]
+
+
+def fingerprint(proxies: Iterable[ProxyRecord], proxy_type: Optional[str]) -> str:
+    """Identity of a parsed proxy list: its lines, in order, and the proxy type."""
+    digest = hashlib.sha1(str(proxy_type).encode())
+    for proxy in proxies:
+        digest.update(b"\n" + proxy.raw.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_journal(path: str, expected: str) -> Progress:
+    """
+    Progress recorded in a journal.
+
+    A last line cut short by the interruption is dropped (and truncated
+    away, so lines appended on resume start on a line of their own).
+
+    Raises:
+        ValueError: the file is not a journal, or belongs to another proxy list
+    """
+    progress: Progress = {}
+    with open(path, "rb+") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("journal") != JOURNAL_VERSION:
+            raise ValueError(f"{path} is not a checkpoint journal")
+        if header.get("input") != expected:
+            raise ValueError(f"{path} was written for a different proxy list")
+        end = f.tell()
+        for line in f:
+            try:
+                entry = json.loads(line)
+                index, phase = entry["i"], entry["phase"]
+                result = ProxyResult.from_dict(entry["result"])
+            except (ValueError, KeyError, TypeError):
+                break
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            done = frozenset() if phase == CHECK or index not in progress else progress[index][0]
+            progress[index] = (done | {phase}, result)
+        f.truncate(end)
+    return progress
+
+
+def remaining(phases: FrozenSet[str], result: ProxyResult, geo: bool, speed: bool) -> Tuple[bool, bool]:
+    """(geo, speed): the requested phases a journaled proxy still needs."""
+    if not result.working:
+        return False, False
+    return geo and GEO not in phases, speed and SPEED not in phases
+
+
+class JournalWriter(BackgroundWriter):
+    """Appends one line per completed phase; the header names the proxy list."""
+
+    def __init__(self, target: str, input_id: str, resume: bool = False, **kwargs):
+        self.input_id = input_id
+        super().__init__(target, mode="a" if resume else "w", **kwargs)
+
+    def header(self) -> str:
+        return json.dumps({"journal": JOURNAL_VERSION, "input": self.input_id}) + "\n"
+
+    def record(self, phase: str, proxy: ProxyRecord, result: ProxyResult) -> None:
+        """Queue a completed phase of one proxy, with its result as it is now."""
+        entry = {"i": proxy.index, "phase": phase, "result": as_dict(result)}
+        self.put(json.dumps(entry, separators=(",", ":")) + "\n")
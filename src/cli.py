@@ -4,21 +4,53 @@ import argparse
 import os
 import re
 
+from src.config import (
+    ASYNC_CONCURRENCY, CONNECT_TIMEOUT, DISTRIBUTED_TOKEN_ENV, DISTRIBUTED_UNIT_SIZE, LATENCY_SAMPLES, MAX_RETRIES, PER_HOST_LIMIT,
+    PREPROBE_TIMEOUT, REQUEST_TIMEOUT, RESULT_CACHE_MAX_AGE
+)
+
 def parse_cli_args():
     parser = argparse.ArgumentParser(
         description="Proxidize: Proxy Tester — A multi-threaded proxy testing tool"
     )
 
-    parser.add_argument("proxy", nargs="?", help="Single proxy or path to proxy list file")
+    parser.add_argument("proxy", nargs="?", help="Single proxy or path to a proxy list file of any extension (- reads the list from stdin)")
     parser.add_argument("--socks", action="store_true", help="Use SOCKS5 proxy")
     parser.add_argument("--http", action="store_true", help="Use HTTP proxy")
     parser.add_argument("--geo", action="store_true", help="Enable IP geolocation lookup")
+    parser.add_argument("--geo-cache", metavar="FILE", help="Keep Geo-IP locations in a SQLite database across runs")
+    parser.add_argument("--geo-db", metavar="FILE", help="Look locations up in an offline IP range database (CSV or built with --build-geo-db) instead of online services")
+    parser.add_argument("--build-geo-db", nargs=2, metavar=("CSV", "OUT"), help="Convert a CSV of IP ranges (start,end,country,region,city) into the compact --geo-db format and exit")
     parser.add_argument("--speed-test", action="store_true", help="Include download speed test (Cloudflare CDN + Fast.com fallback)")
     parser.add_argument("-o", "--output", help="Output file path - specify format with extension (.txt default, .csv available)")
+    parser.add_argument("--stream-out", metavar="FILE", help="Write each result as a JSON line as soon as it is final (- for stdout)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose debug output")
     parser.add_argument("--ip-whitelist", action="store_true", help="Use IP-whitelisted proxies (host:port format, no credentials)")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES, help=f"Extra attempts after a retriable failure (default: {MAX_RETRIES})")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help=f"Seconds to wait for the test endpoint's response (default: {REQUEST_TIMEOUT})")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT, help=f"Seconds to wait for the proxy to accept the connection (default: {CONNECT_TIMEOUT})")
+    parser.add_argument("--preprobe", action="store_true", help="Filter out proxies that refuse a plain TCP connect before the full check")
+    parser.add_argument("--preprobe-timeout", type=float, default=PREPROBE_TIMEOUT, help=f"Seconds per TCP pre-probe connect (default: {PREPROBE_TIMEOUT})")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio connectivity engine (thousands of checks in flight)")
+    parser.add_argument("--concurrency", type=int, default=ASYNC_CONCURRENCY, help=f"Concurrent checks for the async engine (default: {ASYNC_CONCURRENCY})")
+    parser.add_argument("--samples", type=int, default=LATENCY_SAMPLES, help="Latency probes per proxy over one kept-alive connection; reports min/p50/p95/jitter (default: 1)")
+    parser.add_argument("--budget", type=float, metavar="SECONDS", help="Finish the whole scan within this many seconds; timeouts adapt to the observed p95 latency")
+    parser.add_argument("--stream", action="store_true", help="Check proxies as they are read instead of loading the list first (implied by -); no result table or retry")
+    parser.add_argument("--per-host-limit", type=int, default=PER_HOST_LIMIT, help="Maximum checks in flight against one proxy host (default: no limit)")
+    parser.add_argument("--workers", type=int, default=1, help="Shard the proxy list across N processes, each running its own checker (default: 1)")
+    parser.add_argument("--coordinator", metavar="ADDRESS", help="Serve the connectivity check to remote workers on host:port or unix:/path")
+    parser.add_argument("--worker", metavar="ADDRESS", help="Run as a worker for the coordinator at host:port or unix:/path")
+    parser.add_argument("--token", default=os.environ.get(DISTRIBUTED_TOKEN_ENV), help=f"Shared secret between --coordinator and its workers (default: ${DISTRIBUTED_TOKEN_ENV}; a coordinator generates one if unset)")
+    parser.add_argument("--unit-size", type=int, default=DISTRIBUTED_UNIT_SIZE, help=f"Proxies per work unit handed to a worker (default: {DISTRIBUTED_UNIT_SIZE})")
+    parser.add_argument("--checkpoint", metavar="FILE", help="Journal each completed check, geo lookup and speed test to FILE")
+    parser.add_argument("--resume", action="store_true", help="Skip the work already journaled in the --checkpoint file")
+    parser.add_argument("--cache", metavar="FILE", help="Keep results in a SQLite database and reuse the fresh ones on later scans")
+    parser.add_argument("--max-age", type=float, default=RESULT_CACHE_MAX_AGE, metavar="SECONDS", help=f"Reuse --cache results younger than this; 0 re-tests everything (default: {RESULT_CACHE_MAX_AGE})")
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint FILE")
+    return args
 
 def interactive_prompt(args):
     config = {}    # Proxy source
@@ -61,12 +93,17 @@ def interactive_prompt(args):
         config["type"] = "socks"
     elif args.http:
         config["type"] = "http"
+    elif config["proxy_input"] == "-":
+        # stdin carries the proxy list, so it cannot answer the prompt
+        config["type"] = "http"
     else:
         choice = input("Choose proxy type [http/socks]: ").strip().lower()
         config["type"] = "socks" if "s" in choice else "http"
 
     # Geo-IP Lookup - use flag value directly, don't ask
     config["geo_lookup"] = args.geo
+    config["geo_cache"] = args.geo_cache
+    config["geo_db"] = args.geo_db
 
     # Speed test - use flag value directly, don't ask
     config["speed_test"] = args.speed_test
@@ -77,6 +114,42 @@ def interactive_prompt(args):
     # IP whitelist mode (no credentials)
     config["ip_whitelist"] = args.ip_whitelist
 
+    # Retry policy and timeouts
+    config["retries"] = max(0, args.retries)
+    config["timeout"] = args.timeout
+    config["connect_timeout"] = args.connect_timeout
+    config["budget"] = args.budget if args.budget and args.budget > 0 else None
+    config["samples"] = max(1, args.samples)
+
+    # TCP pre-probe stage
+    config["preprobe"] = args.preprobe
+    config["preprobe_timeout"] = args.preprobe_timeout
+
+    # Streaming input (a list on stdin can only be streamed)
+    config["stream"] = args.stream or config["proxy_input"] == "-"
+
+    # Connectivity engine
+    config["use_async"] = args.use_async
+    config["concurrency"] = max(1, args.concurrency)
+    config["per_host_limit"] = max(0, args.per_host_limit)
+    config["workers"] = max(1, args.workers)
+
+    # Distributed scan (the worker side never reaches the prompt)
+    config["coordinator"] = args.coordinator
+    config["token"] = args.token
+    config["unit_size"] = max(1, args.unit_size)
+
+    # NDJSON results as they complete
+    config["stream_out"] = args.stream_out
+
+    # Checkpoint journal and resuming from it
+    config["checkpoint"] = args.checkpoint
+    config["resume"] = args.resume
+
+    # Persistent result cache
+    config["cache"] = args.cache
+    config["max_age"] = max(0.0, args.max_age)
+
     # Output file - only save if -o flag is provided
     if args.output:
         config["output_path"] = args.output
@@ -0,0 +1,189 @@
+"""Adaptive concurrency control for the connectivity phase.
+
+Replaces the fixed worker count from calculate_optimal_threads with an AIMD
+(additive increase, multiplicative decrease) limit that is adjusted while
+the scan runs:
+
+* every window of completed checks without trouble raises the limit by one
+  step, so healthy links ramp up;
+* a window whose median latency drifts well above the best window seen so
+  far (by a ratio and an absolute margin, so sub-millisecond jitter on fast
+  links is ignored), or whose reset/rate-limit/error rate jumps above the scan's running
+  baseline, halves the limit (the provider is throttling or the link is
+  saturated), after which one window is let through before the next verdict;
+* local socket errors (EMFILE, ENOBUFS, ...) halve the limit immediately.
+
+Dead proxies are expected in every list, so the error signal compares each
+window against the running failure rate rather than against zero.
+"""
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from src.config import (
+    ADAPTIVE_DECREASE_FACTOR,
+    ADAPTIVE_ERROR_JUMP,
+    ADAPTIVE_INCREASE_STEP,
+    ADAPTIVE_LATENCY_SLACK,
+    ADAPTIVE_LATENCY_TOLERANCE,
+    ADAPTIVE_MIN_WINDOW,
+)
+from src.timing import percentile
+from src.ui import print_debug
+
+
+class AdaptiveLimiter:
+    """
+    Thread-safe AIMD concurrency limit.
+
+    Callers gate work with can_start()/started() (or acquire() for blocking
+    threads) and report each completion with record(); the limit moves
+    between `minimum` and `maximum` as windows of outcomes are evaluated.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._start = time.monotonic()
+        self.curve: List[Tuple[float, int]] = [(0.0, self.limit)]
+
+        # Current window
+        self._latencies: List[float] = []
+        self._completed = 0
+        self._failures = 0
+        self._throttled = 0
+
+        # Scan-wide baselines
+        self._best_p50: Optional[float] = None
+        self._total_completed = 0
+        self._total_failures = 0
+        # Checks finishing right after a back-off were started under the old,
+        # higher limit; the next window is observed but not acted upon
+        self._cooldown = False
+
+    def set_maximum(self, maximum: int) -> None:
+        """Lower the ceiling (e.g. to the open-file limit) before work starts."""
+        with self._cond:
+            self.maximum = max(self.minimum, min(self.maximum, maximum))
+            self.limit = min(self.limit, self.maximum)
+            if len(self.curve) == 1:
+                self.curve = [(0.0, self.limit)]
+
+    # ----------------------------------------------------------------------
+    # Gating
+    # ----------------------------------------------------------------------
+
+    def can_start(self) -> bool:
+        with self._cond:
+            return self.in_flight < self.limit
+
+    def started(self) -> None:
+        with self._cond:
+            self.in_flight += 1
+
+    def acquire(self) -> None:
+        """Block until a slot under the current limit is free, then take it."""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    # ----------------------------------------------------------------------
+    # Feedback
+    # ----------------------------------------------------------------------
+
+    def record(self, latency: Optional[float], error_kind: Optional[str] = None) -> None:
+        """
+        Report one finished check and release its slot.
+
+        Args:
+            latency: Seconds the check took (None if it failed)
+            error_kind: retry.classify_error() bucket for failures, None on success
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._completed += 1
+            if error_kind is None:
+                if latency is not None:
+                    self._latencies.append(latency)
+            else:
+                self._failures += 1
+                if error_kind in ("reset", "rate_limited"):
+                    self._throttled += 1
+
+            if error_kind == "local":
+                # Out of sockets/buffers on this machine: back off right away
+                self._decrease("local socket error")
+                self._reset_window()
+            elif self._completed >= max(ADAPTIVE_MIN_WINDOW, self.limit):
+                self._evaluate_window()
+            self._cond.notify_all()
+
+    def _evaluate_window(self) -> None:
+        failure_rate = self._failures / self._completed
+        throttle_rate = self._throttled / self._completed
+        baseline_failure = (self._total_failures / self._total_completed
+                            if self._total_completed else failure_rate)
+        p50 = percentile(sorted(self._latencies), 50) if self._latencies else None
+
+        self._total_completed += self._completed
+        self._total_failures += self._failures
+
+        if self._cooldown:
+            self._cooldown = False
+            self._reset_window()
+            return
+
+        congested = (
+            p50 is not None and self._best_p50 is not None
+            and p50 > self._best_p50 * ADAPTIVE_LATENCY_TOLERANCE
+            and p50 - self._best_p50 > ADAPTIVE_LATENCY_SLACK
+        )
+        if congested:
+            self._decrease(f"p50 latency {p50 * 1000:.0f}ms vs best {self._best_p50 * 1000:.0f}ms")
+        elif throttle_rate >= ADAPTIVE_ERROR_JUMP:
+            self._decrease(f"{throttle_rate:.0%} resets/rate-limits")
+        elif failure_rate > baseline_failure + ADAPTIVE_ERROR_JUMP:
+            self._decrease(f"failure rate {failure_rate:.0%} vs baseline {baseline_failure:.0%}")
+        else:
+            self._set_limit(self.limit + ADAPTIVE_INCREASE_STEP, "healthy window")
+
+        if p50 is not None and (self._best_p50 is None or p50 < self._best_p50):
+            self._best_p50 = p50
+        self._reset_window()
+
+    def _decrease(self, reason: str) -> None:
+        self._set_limit(int(self.limit * ADAPTIVE_DECREASE_FACTOR), reason)
+        self._cooldown = True
+
+    def _set_limit(self, value: int, reason: str) -> None:
+        value = min(max(value, self.minimum), self.maximum)
+        if value != self.limit:
+            print_debug(f"[CONCURRENCY] {self.limit} → {value} ({reason})")
+            self.limit = value
+            self.curve.append((time.monotonic() - self._start, value))
+
+    def _reset_window(self) -> None:
+        self._latencies = []
+        self._completed = 0
+        self._failures = 0
+        self._throttled = 0
+
+    # ----------------------------------------------------------------------
+    # Reporting
+    # ----------------------------------------------------------------------
+
+    def summary(self) -> dict:
+        """Start/final/min/max limit plus the (elapsed_seconds, limit) curve."""
+        limits = [limit for _, limit in self.curve]
+        return {
+            "start": limits[0],
+            "final": self.limit,
+            "min": min(limits),
+            "max": max(limits),
+            "adjustments": len(self.curve) - 1,
+            "curve": list(self.curve),
+        }
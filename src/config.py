@@ -9,8 +9,10 @@ from src import __version__
 APP_NAME = "Fawaz: Proxy Tester"
 APP_VERSION = __version__
 
-REQUEST_TIMEOUT = 10  # seconds
-MAX_RETRIES = 2
+REQUEST_TIMEOUT = 10  # seconds to wait for the endpoint's response (--timeout)
+CONNECT_TIMEOUT = 5  # seconds to establish the TCP connection to the proxy (--connect-timeout)
+MAX_RETRIES = 2  # extra attempts after a retriable failure (--retries)
+RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled for each further retry
 
 # ==========================
 # PROXY TESTING ENDPOINT
@@ -20,6 +22,130 @@ MAX_RETRIES = 2
 # { "ip": "1.2.3.4", "country": "US", "cc": "US" }
 IP_API_URL = "http://api.myip.com"
 
+# Requests sent per proxy over one kept-alive connection (--samples); with
+# more than one, each working proxy gets min/p50/p95/jitter of the round trips
+LATENCY_SAMPLES = 1
+
+# ==========================
+# ASYNC ENGINE SETTINGS
+# ==========================
+
+# Used when --async is passed: all connectivity checks share one event loop
+ASYNC_CONCURRENCY = 1000  # checks kept in flight at once (--concurrency)
+
+# ==========================
+# PER-HOST SCHEDULING
+# ==========================
+
+# Checks in flight against any single proxy host (--per-host-limit, 0 = no cap)
+PER_HOST_LIMIT = 0
+HOST_STATS_ROWS = 10  # busiest hosts shown in the per-host summary
+
+# ==========================
+# PROXY LIST INPUT
+# ==========================
+
+# Used with --stream (or a proxy list on stdin, "-"): proxies are read, parsed
+# and checked lazily, and at most this many are held at once
+STREAM_WINDOW = 1024
+PARSE_ERROR_SAMPLES = 3  # invalid lines shown per error kind in the parse summary
+
+# Used with --stream-out, -o and --checkpoint (src/stream_out.py): results
+# waiting for the background writer, and the most results it writes (and
+# flushes) at once; with --samples, final results are also handed over in
+# chunks of STREAM_OUT_BATCH so their statistics are computed together
+STREAM_OUT_BUFFER = 10000
+STREAM_OUT_BATCH = 500
+OUTPUT_FSYNC_INTERVAL = 5.0  # seconds between fsyncs of an output file
+
+# ==========================
+# RESULT CACHE SETTINGS
+# ==========================
+
+# Used with --cache (src/result_cache.py): results younger than this are
+# reused instead of testing the proxy again (--max-age, 0 = always re-test)
+RESULT_CACHE_MAX_AGE = 3600  # seconds
+RESULT_CACHE_COMMIT_INTERVAL = 5.0  # seconds between commits of new results (and --geo-cache locations)
+
+# ==========================
+# GEO-IP SETTINGS
+# ==========================
+
+# Locations come from ip-api.com (batch endpoint for the geo phase) with
+# ipwho.is as the per-IP fallback
+GEO_IP_API_URL = "http://ip-api.com"
+GEO_IPWHO_URL = "https://ipwho.is"
+GEO_BATCH_SIZE = 100  # IPs per ip-api.com batch request (the endpoint's maximum)
+GEO_DB_PATH = None  # offline range database used instead of the services (--geo-db)
+GEO_MAX_THREADS = 32  # most geo lookup threads per process
+
+# Locations are cached by exit IP (src/geo_cache.py): this many IPs in memory,
+# and with --geo-cache for this long on disk
+GEO_CACHE_SIZE = 10000
+GEO_CACHE_TTL = 7 * 24 * 3600  # seconds
+
+# Requests per minute each service is paced to (src/rate_limit.py), shared by
+# all geo threads and --workers processes; a missing or 0 entry is unpaced
+GEO_RATE_LIMITS = {"ip-api": 45, "ip-api-batch": 15, "ipwho": 60}
+GEO_RATE_BURST = 5  # requests a service may get back to back after a quiet spell
+GEO_RATE_RETRIES = 2  # retries of a request answered with 429
+GEO_RETRY_AFTER = 60.0  # seconds to back off after a 429 without Retry-After
+GEO_MAX_WAIT = 120.0  # longest wait for a service before giving up on it
+
+# ==========================
+# DNS CACHE SETTINGS
+# ==========================
+
+# Resolved proxy/API hostnames are cached in-process (src/dns_cache.py)
+DNS_CACHE_TTL = 300  # seconds to keep an answer when its real TTL is unknown (no dnspython)
+DNS_NEGATIVE_TTL = 30  # seconds to remember that a name does not resolve
+DNS_CACHE_MIN_TTL = 5  # bounds applied to TTLs reported by dnspython
+DNS_CACHE_MAX_TTL = 3600
+
+# ==========================
+# TIME BUDGET SETTINGS
+# ==========================
+
+# Used when --budget is passed: the whole scan is bounded by a wall-clock deadline
+SCAN_DEADLINE = None  # time.time() at which the scan stops (set from --budget)
+BUDGET_TIMEOUT_MULTIPLIER = 3.0  # per-request timeout = this × p95 of latencies seen so far
+BUDGET_MIN_TIMEOUT = 1.0  # derived timeouts never drop below this (seconds)
+BUDGET_WARMUP_SAMPLES = 20  # working checks needed before timeouts start to adapt
+BUDGET_SAMPLE_WINDOW = 1000  # most recent latencies the p95 is taken over
+
+# ==========================
+# DISTRIBUTED SCAN SETTINGS
+# ==========================
+
+# Used with --coordinator/--worker: the list is handed out in work units
+DISTRIBUTED_UNIT_SIZE = 500  # proxies per work unit (--unit-size)
+DISTRIBUTED_LEASE_TIMEOUT = 120  # seconds without progress before a unit is reassigned
+DISTRIBUTED_WAIT_INTERVAL = 1.0  # seconds an idle worker waits before asking again
+DISTRIBUTED_TOKEN_ENV = "FWZ_PT_TOKEN"  # environment variable holding the shared secret (--token)
+
+# ==========================
+# ADAPTIVE CONCURRENCY (AIMD)
+# ==========================
+
+# The connectivity phase starts at calculate_optimal_threads() workers and
+# adjusts while it runs; these bound and tune the controller
+ADAPTIVE_MAX_THREADS = 256  # ceiling for the threaded engine (async uses --concurrency)
+ADAPTIVE_ASYNC_START = 256  # starting limit for the async engine
+ADAPTIVE_INCREASE_STEP = 8  # slots added after each healthy window
+ADAPTIVE_DECREASE_FACTOR = 0.5  # limit multiplier when a window looks throttled
+ADAPTIVE_LATENCY_TOLERANCE = 2.0  # window p50 above best p50 × this counts as congestion...
+ADAPTIVE_LATENCY_SLACK = 0.05  # ...if it is also at least this many seconds above it
+ADAPTIVE_ERROR_JUMP = 0.25  # failure-rate rise over the running baseline that triggers back-off
+ADAPTIVE_MIN_WINDOW = 16  # completions per evaluation window (at least the current limit)
+
+# ==========================
+# TCP PRE-PROBE SETTINGS
+# ==========================
+
+# Used when --preprobe is passed: bare TCP connects filter dead endpoints first
+PREPROBE_TIMEOUT = 2.0  # seconds per connect (--preprobe-timeout)
+PREPROBE_CONCURRENCY = 2000  # connects kept in flight at once
+
 # ==========================
 # SPEED TEST SETTINGS
 # ==========================
@@ -32,6 +158,10 @@ MIN_TEST_BYTES = 5 * 1024 * 1024  # 5 MB minimum data to download (more realisti
 MAX_SPEED_TEST_TIME = 60  # seconds
 SPEED_TEST_RETRIES = 2  # number of retries for failed speed tests
 
+# Keep-alive connections kept per proxy session (shared by speed tests and geo lookups);
+# the direct session used by the geo lookups keeps one per geo thread (GEO_MAX_THREADS)
+SESSION_POOL_SIZE = 4
+
 # Debug/Verbose mode (controlled by -v/--verbose flag)
 VERBOSE_MODE = False
 
@@ -0,0 +1,437 @@
+"""Coordinator/worker distributed scan mode.
+
+The coordinator (--coordinator ADDRESS) splits the parsed proxy list into
+work units of --unit-size proxies and serves them to any number of workers
+(--worker ADDRESS) on other machines or on the same one. Workers pull a
+unit, run the usual connectivity checker over it and stream each result
+back as soon as it is known; the coordinator merges results into the
+original order.
+
+A unit is leased to one worker at a time. If that worker disconnects, or
+sends nothing for DISTRIBUTED_LEASE_TIMEOUT seconds, the unit goes back to
+the queue and is handed to the next worker that asks. Results that arrive
+twice for the same proxy (a slow worker finishing a reassigned unit) are
+ignored after the first.
+
+ADDRESS is host:port for TCP or unix:/path/to.sock for a Unix socket; a
+bare :port listens on (or connects to) loopback only. The wire format is
+newline-delimited JSON; every message has an "op" field:
+
+    worker → coordinator: hello, request, result, complete
+    coordinator → worker: config, unit, wait, done, error
+
+Units carry the proxies' credentials, so a worker must first send the
+shared secret (--token, or the FWZ_PT_TOKEN environment variable) in its
+hello; connections that do not are dropped before anything is served.
+"""
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import src.config as config_module
+from src.config import DISTRIBUTED_LEASE_TIMEOUT, DISTRIBUTED_UNIT_SIZE, DISTRIBUTED_WAIT_INTERVAL
+from src.records import ProxyRecord, ProxyResult, as_dict
+from src.sharding import config_snapshot
+from src.ui import print_debug
+
+UNIX_PREFIX = "unix:"
+
+# check(proxies, config, on_result) runs one unit; on_result(i, result) per proxy
+CheckFunc = Callable[[List[ProxyRecord], Dict[str, Any], Callable[[int, ProxyResult], None]], None]
+
+
+class ProtocolError(ConnectionError):
+    """The peer sent something that is not part of the protocol."""
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """
+    Parse a --coordinator/--worker address.
+
+    Returns:
+        (socket family, sockaddr): (AF_UNIX, path) or (AF_INET/AF_INET6, (host, port))
+
+    Raises:
+        ValueError: If the address is not host:port or unix:/path
+    """
+    if address.startswith(UNIX_PREFIX):
+        path = address[len(UNIX_PREFIX):]
+        if not path:
+            raise ValueError("Empty Unix socket path")
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not supported on this platform")
+        return socket.AF_UNIX, path
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid address (expected host:port or unix:/path): {address}")
+    host = host.strip("[]") or "127.0.0.1"
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    return family, (host, int(port))
+
+
+class _Channel:
+    """Newline-delimited JSON over a connected stream socket."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.rfile = sock.makefile("rb")
+        self._send_lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        data = json.dumps(message, separators=(",", ":")).encode() + b"\n"
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def recv(self) -> Optional[Dict[str, Any]]:
+        """Next message, or None once the peer has closed the connection."""
+        line = self.rfile.readline()
+        if not line:
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            raise ProtocolError(f"Malformed message: {line[:80]!r}") from e
+        if not isinstance(message, dict) or "op" not in message:
+            raise ProtocolError(f"Message without op: {line[:80]!r}")
+        return message
+
+    def close(self) -> None:
+        try:
+            self.rfile.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+# ----------------------------------------------------------------------
+# Coordinator
+# ----------------------------------------------------------------------
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _TCP6Server(_TCPServer):
+    address_family = socket.AF_INET6
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # Windows
+    _UnixServer = None
+
+
+class Coordinator:
+    """
+    Serves work units of `proxies` to workers and collects their results.
+
+    Usage: start() binds and begins accepting workers (self.address is then
+    the bound address), wait() blocks until every proxy has a result and
+    returns them in input order, close() stops the server. on_result(index,
+    result) is never called concurrently.
+    """
+
+    def __init__(
+        self,
+        proxies: List[ProxyRecord],
+        user_config: Dict[str, Any],
+        address: str,
+        unit_size: int = DISTRIBUTED_UNIT_SIZE,
+        lease_timeout: float = DISTRIBUTED_LEASE_TIMEOUT,
+        on_result: Optional[Callable[[int, ProxyResult], None]] = None,
+        token: Optional[str] = None,
+    ):
+        self.proxies = proxies
+        # Shared secret workers must present; a random one unless given
+        self.token = token or secrets.token_urlsafe(24)
+        self.address = address
+        self.lease_timeout = lease_timeout
+        self.on_result = on_result
+        self.results: List[Optional[ProxyResult]] = [None] * len(proxies)
+        self.config = {
+            "type": user_config["type"],
+            "use_async": user_config.get("use_async", False),
+            "concurrency": user_config.get("concurrency", config_module.ASYNC_CONCURRENCY),
+            "settings": config_snapshot(),
+        }
+
+        unit_size = max(1, unit_size)
+        self.units = [list(range(start, min(start + unit_size, len(proxies))))
+                      for start in range(0, len(proxies), unit_size)]
+        self._pending = deque(range(len(self.units)))
+        self._leases: Dict[int, Tuple[int, float]] = {}  # unit → (connection id, last progress)
+        self._completed = set()
+        self.reassigned = 0
+        self.workers_seen = 0
+        self._cond = threading.Condition()
+        # Each worker connection has its own handler thread; on_result is
+        # called by one at a time, like every other engine calls it
+        self._callback_lock = threading.Lock()
+        self._server = None
+        self._unix_path = None
+
+    # -- server lifecycle ---------------------------------------------------
+
+    def start(self) -> None:
+        family, sockaddr = parse_address(self.address)
+        owner = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                owner._serve_worker(self.request)
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(sockaddr):
+                os.unlink(sockaddr)
+            server_class = _UnixServer
+            self._unix_path = sockaddr
+        else:
+            server_class = _TCP6Server if family == socket.AF_INET6 else _TCPServer
+        self._server = server_class(sockaddr, Handler)
+
+        if family == socket.AF_UNIX:
+            self.address = UNIX_PREFIX + sockaddr
+        else:
+            host, port = self._server.server_address[:2]
+            self.address = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print_debug(f"[COORDINATOR] Listening on {self.address}: {len(self.proxies)} proxies in {len(self.units)} units")
+
+    def wait(self, poll: float = 0.5) -> List[Optional[ProxyResult]]:
+        """Block until every unit is complete; returns results in input order."""
+        with self._cond:
+            while len(self._completed) < len(self.units):
+                self._expire_leases()
+                self._cond.wait(poll)
+        return self.results
+
+    def close(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.unlink(self._unix_path)
+
+    def run(self) -> List[Optional[ProxyResult]]:
+        """start() + wait() + close()."""
+        self.start()
+        try:
+            return self.wait()
+        finally:
+            self.close()
+
+    @property
+    def done(self) -> bool:
+        with self._cond:
+            return len(self._completed) == len(self.units)
+
+    # -- work queue (call with self._cond held) -----------------------------
+
+    def _expire_leases(self) -> None:
+        now = time.monotonic()
+        for unit, (_, last_progress) in list(self._leases.items()):
+            if now - last_progress > self.lease_timeout:
+                print_debug(f"[COORDINATOR] Unit {unit} lease expired; reassigning")
+                self._requeue(unit)
+
+    def _requeue(self, unit: int) -> None:
+        del self._leases[unit]
+        if unit not in self._completed:
+            self._pending.appendleft(unit)
+            self.reassigned += 1
+            self._cond.notify_all()
+
+    def _release_connection(self, conn_id: int) -> None:
+        for unit, (holder, _) in list(self._leases.items()):
+            if holder == conn_id:
+                print_debug(f"[COORDINATOR] Worker holding unit {unit} disconnected; reassigning")
+                self._requeue(unit)
+
+    # -- per-worker protocol ------------------------------------------------
+
+    def _serve_worker(self, sock: socket.socket) -> None:
+        channel = _Channel(sock)
+        conn_id = id(channel)
+        try:
+            message = channel.recv()
+            if message is None:
+                return
+            if message["op"] != "hello":
+                raise ProtocolError(f"Expected hello, got {message['op']}")
+            if not hmac.compare_digest(str(message.get("token", "")).encode(), self.token.encode()):
+                channel.send({"op": "error", "message": "invalid token"})
+                raise ProtocolError(f"Worker {message.get('worker', '?')} sent an invalid token")
+            with self._cond:
+                self.workers_seen += 1
+            print_debug(f"[COORDINATOR] Worker connected: {message.get('worker', '?')}")
+            channel.send({"op": "config", "config": self.config})
+            while True:
+                message = channel.recv()
+                if message is None:
+                    return
+                op = message["op"]
+                if op == "request":
+                    channel.send(self._next_unit(conn_id))
+                elif op == "result":
+                    self._store_result(conn_id, message["unit"], message["index"], message["result"])
+                elif op == "complete":
+                    self._complete(conn_id, message["unit"])
+                else:
+                    raise ProtocolError(f"Unknown op: {op}")
+        except (OSError, ProtocolError, KeyError, TypeError) as e:
+            print_debug(f"[COORDINATOR] Dropping worker connection: {e}")
+        finally:
+            with self._cond:
+                self._release_connection(conn_id)
+            channel.close()
+
+    def _next_unit(self, conn_id: int) -> Dict[str, Any]:
+        with self._cond:
+            self._expire_leases()
+            if self._pending:
+                unit = self._pending.popleft()
+                self._leases[unit] = (conn_id, time.monotonic())
+                indices = self.units[unit]
+                return {
+                    "op": "unit",
+                    "unit": unit,
+                    "indices": indices,
+                    "proxies": [as_dict(self.proxies[i]) for i in indices],
+                }
+            if len(self._completed) == len(self.units):
+                return {"op": "done"}
+            # Everything is leased: ask again later in case a lease is lost
+            return {"op": "wait", "retry": DISTRIBUTED_WAIT_INTERVAL}
+
+    def _store_result(self, conn_id: int, unit: int, index: int, result: Dict[str, Any]) -> None:
+        with self._cond:
+            if self._leases.get(unit, (None,))[0] == conn_id:
+                # Progress renews the lease
+                self._leases[unit] = (conn_id, time.monotonic())
+            if index not in self.units[unit] or self.results[index] is not None:
+                return
+            self.results[index] = result = ProxyResult.from_dict(result)
+        if self.on_result:
+            with self._callback_lock:
+                self.on_result(index, result)
+
+    def _complete(self, conn_id: int, unit: int) -> None:
+        with self._cond:
+            if unit in self._completed:
+                return
+            holder = self._leases.get(unit, (None,))[0]
+            if all(self.results[i] is not None for i in self.units[unit]):
+                self._completed.add(unit)
+                self._leases.pop(unit, None)
+            elif holder == conn_id:
+                # Worker claimed completion without sending everything
+                self._requeue(unit)
+            self._cond.notify_all()
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+
+def check_unit(proxies: List[ProxyRecord], config: Dict[str, Any],
+               on_result: Callable[[int, ProxyResult], None]) -> None:
+    """Default unit checker: the engine the coordinator asked for."""
+    from src.async_tester import run_async_checks
+    from src.concurrency import AdaptiveLimiter
+    from src.threaded_tester import default_limiter, run_threaded_checks
+
+    if config.get("use_async"):
+        concurrency = min(config["concurrency"], len(proxies))
+        limiter = AdaptiveLimiter(
+            initial=min(config_module.ADAPTIVE_ASYNC_START, concurrency),
+            maximum=concurrency
+        )
+        run_async_checks(proxies, config["type"], concurrency=concurrency,
+                         on_result=on_result, limiter=limiter)
+    else:
+        run_threaded_checks(proxies, config["type"], limiter=default_limiter(len(proxies)),
+                            on_result=on_result)
+
+
+def connect(address: str, timeout: float = 10) -> socket.socket:
+    family, sockaddr = parse_address(address)
+    if family == socket.AF_UNIX:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(sockaddr)
+    else:
+        sock = socket.create_connection(sockaddr, timeout=timeout)
+    sock.settimeout(None)
+    return sock
+
+
+def run_worker(
+    address: str,
+    token: str,
+    check: Optional[CheckFunc] = None,
+    name: Optional[str] = None,
+    on_unit: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Pull units from the coordinator at address until it reports done.
+
+    Args:
+        address: Coordinator address (host:port or unix:/path)
+        token: The coordinator's shared secret
+        check: Unit checker (default: check_unit with the coordinator's engine)
+        name: Worker name shown in the coordinator's debug log
+        on_unit: Optional callback(unit id, proxy count) after each finished unit
+
+    Returns:
+        Number of units completed by this worker
+    """
+    check = check or check_unit
+    channel = _Channel(connect(address))
+    completed = 0
+    try:
+        channel.send({"op": "hello", "worker": name or f"{socket.gethostname()}:{os.getpid()}", "token": token})
+        message = channel.recv()
+        if message and message["op"] == "error":
+            raise ProtocolError(f"Coordinator refused this worker: {message.get('message', '?')}")
+        if not message or message["op"] != "config":
+            raise ProtocolError("Coordinator did not send its configuration")
+        config = message["config"]
+        for setting, value in config.get("settings", {}).items():
+            setattr(config_module, setting, value)
+
+        while True:
+            channel.send({"op": "request"})
+            message = channel.recv()
+            if message is None or message["op"] == "done":
+                return completed
+            if message["op"] == "wait":
+                time.sleep(message.get("retry", DISTRIBUTED_WAIT_INTERVAL))
+                continue
+            if message["op"] != "unit":
+                raise ProtocolError(f"Unexpected op: {message['op']}")
+
+            unit, indices = message["unit"], message["indices"]
+
+            def on_result(i: int, result: ProxyResult) -> None:
+                channel.send({"op": "result", "unit": unit, "index": indices[i], "result": as_dict(result)})
+
+            check([ProxyRecord.from_dict(proxy) for proxy in message["proxies"]], config, on_result)
+            channel.send({"op": "complete", "unit": unit})
+            completed += 1
+            if on_unit:
+                on_unit(unit, len(indices))
+    except (BrokenPipeError, ConnectionResetError):
+        # The coordinator finished and closed the connection
+        return completed
+    finally:
+        channel.close()
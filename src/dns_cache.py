@@ -0,0 +1,210 @@
+"""In-process DNS cache for proxy and API hostnames.
+
+Provider lists point thousands of entries at a handful of gateway hostnames,
+and every connection (the raw checkers, requests/urllib3 for geo lookups and
+speed tests, PySocks, asyncio's getaddrinfo) used to resolve the name again.
+install() replaces socket.getaddrinfo with DNSCache.getaddrinfo so all of
+them share one cache:
+
+* answers are kept for their DNS TTL when dnspython is installed, otherwise
+  for config.DNS_CACHE_TTL seconds; failures are cached for DNS_NEGATIVE_TTL;
+* concurrent lookups of the same name wait for the one already in flight;
+* the time spent in real lookups is counted, so it can be reported
+  separately from proxy latency.
+
+Only the address list is cached per (name, family); each call still builds
+its own getaddrinfo() tuples from the cached addresses, so any port, socket
+type or protocol is answered from the same entry. IP literals, AI_CANONNAME
+requests and non-str hosts go straight to the system resolver.
+"""
+import ipaddress
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import src.config as config_module
+
+try:
+    import dns.resolver as dns_resolver
+    import dns.exception as dns_exception
+except ImportError:  # optional: without dnspython every entry gets DNS_CACHE_TTL
+    dns_resolver = None
+    dns_exception = None
+
+# The resolver the cache falls back to (captured before install() patches it)
+_system_getaddrinfo = socket.getaddrinfo
+
+CacheKey = Tuple[str, int]
+
+
+def is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class _Entry:
+    __slots__ = ("addresses", "error", "expires")
+
+    def __init__(self, addresses: List[str], error: Optional[OSError], ttl: float):
+        self.addresses = addresses
+        self.error = error
+        self.expires = time.monotonic() + ttl
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+
+def _query_dnspython(host: str, family: int) -> Tuple[List[str], float]:
+    """A/AAAA lookup through dnspython; returns (addresses, ttl)."""
+    if family == socket.AF_INET:
+        rdtypes = ("A",)
+    elif family == socket.AF_INET6:
+        rdtypes = ("AAAA",)
+    else:
+        rdtypes = ("A", "AAAA")
+    addresses: List[str] = []
+    ttl: Optional[float] = None
+    for rdtype in rdtypes:
+        try:
+            answer = dns_resolver.resolve(host, rdtype, lifetime=config_module.CONNECT_TIMEOUT)
+        except dns_exception.DNSException:
+            continue
+        addresses.extend(record.to_text() for record in answer)
+        ttl = answer.rrset.ttl if ttl is None else min(ttl, answer.rrset.ttl)
+    if not addresses:
+        raise LookupError(host)
+    return addresses, ttl
+
+
+def _query_system(host: str, family: int) -> List[str]:
+    """Addresses for host from the system resolver, in its preference order."""
+    addresses: List[str] = []
+    for info in _system_getaddrinfo(host, None, family, socket.SOCK_STREAM):
+        address = info[4][0]
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+class DNSCache:
+    """Thread-safe TTL cache of hostname → addresses with in-flight deduplication."""
+
+    def __init__(self, ttl: Optional[float] = None, negative_ttl: Optional[float] = None,
+                 use_dnspython: bool = True):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.use_dnspython = use_dnspython and dns_resolver is not None
+        self._entries: Dict[CacheKey, _Entry] = {}
+        self._pending: Dict[CacheKey, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_time = 0.0
+
+    def _ttl_bounds(self, ttl: float) -> float:
+        return min(max(ttl, config_module.DNS_CACHE_MIN_TTL), config_module.DNS_CACHE_MAX_TTL)
+
+    def _lookup(self, host: str, family: int) -> _Entry:
+        if self.use_dnspython:
+            try:
+                addresses, ttl = _query_dnspython(host, family)
+                return _Entry(addresses, None, self._ttl_bounds(ttl))
+            except LookupError:
+                pass  # e.g. names only in /etc/hosts: ask the system resolver
+        try:
+            addresses = _query_system(host, family)
+        except OSError as e:
+            ttl = self.negative_ttl if self.negative_ttl is not None else config_module.DNS_NEGATIVE_TTL
+            return _Entry([], e, ttl)
+        ttl = self.ttl if self.ttl is not None else config_module.DNS_CACHE_TTL
+        return _Entry(addresses, None, ttl)
+
+    def addresses(self, host: str, family: int = 0) -> List[str]:
+        """
+        Resolved addresses for host, from the cache while the entry is fresh.
+
+        Raises:
+            socket.gaierror: If the name does not resolve (also cached)
+        """
+        host = host.lower()
+        key = (host, family)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.fresh:
+                    self.hits += 1
+                    break
+                event = self._pending.get(key)
+                owner = event is None
+                if owner:
+                    event = self._pending[key] = threading.Event()
+            if not owner:
+                # Someone is already looking this name up; use their answer
+                event.wait()
+                continue
+
+            start = time.monotonic()
+            entry = None
+            try:
+                entry = self._lookup(host, family)
+            finally:
+                with self._lock:
+                    self.lookups += 1
+                    self.lookup_time += time.monotonic() - start
+                    if entry is not None:
+                        self._entries[key] = entry
+                    del self._pending[key]
+                event.set()
+            break
+        if entry.error is not None:
+            raise socket.gaierror(*entry.error.args)
+        return entry.addresses
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Drop-in replacement for socket.getaddrinfo backed by the cache."""
+        if (not isinstance(host, str) or not host or is_ip(host)
+                or flags & socket.AI_CANONNAME):
+            return _system_getaddrinfo(host, port, family, type, proto, flags)
+        infos = []
+        for address in self.addresses(host, family):
+            # Numeric lookups never touch the network
+            infos.extend(_system_getaddrinfo(address, port, family, type, proto,
+                                             flags | socket.AI_NUMERICHOST))
+        return infos
+
+    def resolve(self, host: str, port: int) -> Tuple[Optional[str], Optional[str]]:
+        """Return (first address, None) or (None, error message)."""
+        if is_ip(host):
+            return host, None
+        try:
+            return self.addresses(host)[0], None
+        except (OSError, IndexError) as e:
+            return None, f"Cannot resolve proxy host {host}: {e}"
+
+    def cached(self, host: str, family: int = 0) -> bool:
+        """True if host has a fresh entry (a lookup would not block)."""
+        with self._lock:
+            entry = self._entries.get((host.lower(), family))
+            return entry is not None and entry.fresh
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Cache shared by every connection in this process once install() has run
+DNS_CACHE = DNSCache()
+
+
+def install() -> None:
+    """Route socket.getaddrinfo (and so requests, PySocks and asyncio) through DNS_CACHE."""
+    socket.getaddrinfo = DNS_CACHE.getaddrinfo
+
+
+def uninstall() -> None:
+    socket.getaddrinfo = _system_getaddrinfo
@@ -0,0 +1,134 @@
+"""Geo-IP cache keyed by exit IP.
+
+Rotating residential gateways hand the same exit IP to many entries, and
+every working proxy used to cost its own geo lookup. GEO_CACHE keeps the
+locations already found in two levels:
+
+* an in-memory LRU of config.GEO_CACHE_SIZE IPs, always on;
+* optionally (--geo-cache FILE) a SQLite store that keeps answers for
+  config.GEO_CACHE_TTL seconds across runs.
+
+Concurrent lookups of the same IP wait for the one already in flight, and
+the geo phase in main() groups proxies by exit IP before any request is
+made, so N proxies sharing K IPs cost at most K lookups. Only real answers
+are cached; "N/A" (every service failed) is looked up again next time.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import src.config as config_module
+
+# Locations that carry no answer and are never cached
+_NO_ANSWER = ("N/A", "Error", "")
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS locations (ip TEXT PRIMARY KEY, location TEXT NOT NULL, updated REAL NOT NULL)"
+
+
+class GeoCache:
+    """Thread-safe LRU of IP → location, backed by an optional persistent store."""
+
+    def __init__(self, size: Optional[int] = None, ttl: Optional[float] = None):
+        self.size = size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._store: Optional[sqlite3.Connection] = None
+        self._committed = 0.0
+        self.lookups = 0
+        self.hits = 0
+
+    def open_store(self, path: str) -> None:
+        """Keep locations in the SQLite database at path as well (raises sqlite3.Error)."""
+        store = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        store.execute(_SCHEMA)
+        store.commit()
+        with self._lock:
+            self._store = store
+            self._committed = time.monotonic()
+
+    def close_store(self) -> None:
+        with self._lock:
+            store, self._store = self._store, None
+        if store is not None:
+            store.commit()
+            store.close()
+
+    def _remember(self, ip: str, location: str) -> None:
+        # Caller holds the lock
+        self._entries[ip] = location
+        self._entries.move_to_end(ip)
+        size = self.size if self.size is not None else config_module.GEO_CACHE_SIZE
+        while len(self._entries) > size:
+            self._entries.popitem(last=False)
+
+    def get(self, ip: str) -> Optional[str]:
+        """Cached location of ip (memory first, then the store), or None."""
+        with self._lock:
+            location = self._entries.get(ip)
+            if location is None and self._store is not None:
+                ttl = self.ttl if self.ttl is not None else config_module.GEO_CACHE_TTL
+                row = self._store.execute(
+                    "SELECT location FROM locations WHERE ip = ? AND updated >= ?", (ip, time.time() - ttl)
+                ).fetchone()
+                if row is not None:
+                    location = row[0]
+            if location is not None:
+                self._remember(ip, location)
+                self.hits += 1
+            return location
+
+    def put(self, ip: str, location: str) -> None:
+        """Remember a location found for ip (failures are ignored)."""
+        if not ip or location in _NO_ANSWER:
+            return
+        with self._lock:
+            self._remember(ip, location)
+            if self._store is not None:
+                self._store.execute(
+                    "INSERT OR REPLACE INTO locations (ip, location, updated) VALUES (?, ?, ?)",
+                    (ip, location, time.time())
+                )
+                if time.monotonic() - self._committed >= config_module.RESULT_CACHE_COMMIT_INTERVAL:
+                    self._store.commit()
+                    self._committed = time.monotonic()
+
+    def location(self, ip: str, lookup: Callable[[str], str]) -> str:
+        """Location of ip from the cache, or from lookup(ip) by one thread at a time per IP."""
+        location = self.get(ip)
+        if location is not None:
+            return location
+        with self._lock:
+            if ip in self._entries:
+                # Found by a lookup that finished in the meantime
+                return self._entries[ip]
+            event = self._pending.get(ip)
+            owner = event is None
+            if owner:
+                event = self._pending[ip] = threading.Event()
+        if not owner:
+            # Someone is already looking this IP up; share their answer (or failure)
+            event.wait()
+            location = self.get(ip)
+            return location if location is not None else "N/A"
+        location = "N/A"
+        try:
+            location = lookup(ip)
+            self.put(ip, location)
+        finally:
+            with self._lock:
+                self.lookups += 1
+                del self._pending[ip]
+            event.set()
+        return location
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Cache shared by every geo lookup in this process
+GEO_CACHE = GeoCache()
@@ -0,0 +1,188 @@
+"""Per-gateway-host scheduling for the connectivity phase.
+
+Provider lists are mostly one gateway hostname repeated across many ports
+and session usernames. Checking them in file order sends a burst of
+connections at one gateway while the others sit idle, and every entry
+re-resolves the same name. The scheduler groups proxies by host and:
+
+* hands out work round-robin across hosts, so gateways are interleaved;
+* caps the checks in flight per host (config.PER_HOST_LIMIT, 0 = no cap);
+* resolves each hostname through the shared DNS cache before its checks
+  start; the address is attached to the proxy as .address so the
+  checkers connect to it directly.
+
+For streaming input the scheduler starts empty (proxies={}): add() queues
+proxies as they are read and release() forgets each one once its check is
+done, so only the current window of proxies is held.
+
+HostStats collects per-host throughput and failure counts from the results
+as they arrive, so it works the same for threads, asyncio, --workers and
+distributed scans.
+"""
+import threading
+import time
+from collections import deque, OrderedDict
+from typing import Any, Deque, Dict, List, Optional, Union
+
+import src.config as config_module
+from src.dns_cache import DNS_CACHE, DNSCache, is_ip
+from src.records import ProxyRecord, ProxyResult
+
+
+def host_key(proxy: ProxyRecord) -> str:
+    return proxy.host.lower()
+
+
+class HostScheduler:
+    """
+    Thread-safe work queue over proxy indices, grouped by host.
+
+    next() returns the next index to check (round-robin over hosts that are
+    under their cap) or None if nothing can start right now; done() must be
+    called for every index handed out.
+
+    proxies is a list, or a dict of index → proxy that add() extends.
+    """
+
+    def __init__(self, proxies: Union[List[ProxyRecord], Dict[int, ProxyRecord]], per_host_limit: Optional[int] = None,
+                 resolver: Optional[DNSCache] = None):
+        if per_host_limit is None:
+            per_host_limit = config_module.PER_HOST_LIMIT
+        self.proxies = proxies
+        self.per_host_limit = per_host_limit if per_host_limit and per_host_limit > 0 else None
+        self.resolver = resolver or DNS_CACHE
+        self._queues: "OrderedDict[str, Deque[int]]" = OrderedDict()
+        for i, proxy in (proxies.items() if isinstance(proxies, dict) else enumerate(proxies)):
+            self._queues.setdefault(host_key(proxy), deque()).append(i)
+        self._ring: Deque[str] = deque(self._queues)
+        self._in_flight: Dict[str, int] = dict.fromkeys(self._queues, 0)
+        self._open = len(self._ring)  # hosts with queued work that are under their cap
+        self._remaining = len(proxies)
+        self._next_index = len(proxies)
+        self._lock = threading.Lock()
+
+    @property
+    def host_count(self) -> int:
+        return len(self._queues)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every index has been handed out."""
+        with self._lock:
+            return self._remaining == 0
+
+    def _available(self, host: str) -> bool:
+        return self.per_host_limit is None or self._in_flight[host] < self.per_host_limit
+
+    def ready(self) -> bool:
+        """True if next() would return an index."""
+        with self._lock:
+            return self._open > 0
+
+    def next(self) -> Optional[int]:
+        with self._lock:
+            for _ in range(len(self._ring)):
+                host = self._ring.popleft()
+                if not self._available(host):
+                    self._ring.append(host)
+                    continue
+                queue = self._queues[host]
+                idx = queue.popleft()
+                self._in_flight[host] += 1
+                self._remaining -= 1
+                if queue:
+                    self._ring.append(host)
+                    if not self._available(host):
+                        self._open -= 1
+                else:
+                    self._open -= 1
+                return idx
+            return None
+
+    def done(self, idx: int) -> None:
+        host = host_key(self.proxies[idx])
+        with self._lock:
+            self._in_flight[host] -= 1
+            if (self.per_host_limit is not None and self._queues[host]
+                    and self._in_flight[host] == self.per_host_limit - 1):
+                self._open += 1
+
+    def add(self, proxy: ProxyRecord) -> int:
+        """Queue one more proxy (proxies must be a dict); returns its index."""
+        with self._lock:
+            idx = self._next_index
+            self._next_index += 1
+            self.proxies[idx] = proxy
+            host = host_key(proxy)
+            queue = self._queues.get(host)
+            if queue is None:
+                queue = self._queues[host] = deque()
+                self._in_flight[host] = 0
+            if not queue:
+                # Hosts are on the ring only while they have queued work
+                self._ring.append(host)
+                if self._available(host):
+                    self._open += 1
+            queue.append(idx)
+            self._remaining += 1
+            return idx
+
+    def release(self, idx: int) -> None:
+        """done() for a proxy added with add(): also forget it, and its host once idle."""
+        self.done(idx)
+        with self._lock:
+            host = host_key(self.proxies.pop(idx))
+            if not self._queues[host] and not self._in_flight[host]:
+                del self._queues[host]
+                del self._in_flight[host]
+
+    def needs_lookup(self, idx: int) -> bool:
+        """True if prepare(idx) would block on a DNS lookup."""
+        host = self.proxies[idx].host
+        return not is_ip(host) and not self.resolver.cached(host)
+
+    def prepare(self, idx: int) -> Optional[str]:
+        """
+        Resolve the proxy's host (from the DNS cache) and attach the address.
+
+        Returns:
+            None on success, or an error message if the host does not resolve
+        """
+        proxy = self.proxies[idx]
+        address, error = self.resolver.resolve(proxy.host, proxy.port)
+        if address:
+            proxy.address = address
+        return error
+
+
+class HostStats:
+    """Per-host throughput and failure counts, fed with results as they arrive."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, proxy: ProxyRecord, result: ProxyResult) -> None:
+        stats = self._hosts.setdefault(host_key(proxy), {"checked": 0, "working": 0, "failed": 0, "last": 0.0})
+        stats["checked"] += 1
+        if result.working:
+            stats["working"] += 1
+        else:
+            stats["failed"] += 1
+        stats["last"] = time.monotonic()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per host, busiest first: host, checked, working, failed, fail_rate, rate (checks/s)."""
+        rows = []
+        for host, stats in self._hosts.items():
+            span = max(stats["last"] - self.start, 1e-6)
+            rows.append({
+                "host": host,
+                "checked": stats["checked"],
+                "working": stats["working"],
+                "failed": stats["failed"],
+                "fail_rate": stats["failed"] / stats["checked"],
+                "rate": stats["checked"] / span,
+            })
+        rows.sort(key=lambda row: (-row["checked"], row["host"]))
+        return rows
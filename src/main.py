@@ -1,27 +1,55 @@
 import sys
 import os
 import signal
+import sqlite3
 import atexit
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import math
-from typing import List, Dict, Any
+import threading
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.cli import parse_cli_args, interactive_prompt
-from src.utils import load_proxies_from_file, parse_proxy_line, save_results_to_file
-from src.proxy_tester import test_http_proxy, test_socks_proxy, run_speed_test, run_geo_lookup
+from src.utils import (
+    ParseReport, dedupe_proxies, fan_out, iter_parsed_proxies, iter_proxy_lines, load_proxies_from_file,
+    parse_proxy_lines, save_results_to_file
+)
+from src.proxy_tester import run_speed_test, run_geo_lookup, run_geo_lookups, test_http_proxy, test_socks_proxy
+from src.async_tester import run_async_checks
+from src.threaded_tester import (
+    calculate_optimal_threads, default_limiter, failed_result, run_streaming_checks, run_threaded_checks
+)
+from src.sharding import CHECK, GEO, SPEED, run_sharded
+from src.distributed import Coordinator, run_worker
+from src.concurrency import AdaptiveLimiter
+from src.session_pool import SESSIONS
+from src.preprobe import PreprobeReport, run_tcp_preprobe
+from src.timing import aggregate_phases, apply_sample_stats
+from src.host_scheduler import HostScheduler, HostStats
+from src.dns_cache import DNS_CACHE, install as install_dns_cache
+from src.geo_cache import GEO_CACHE
+from src.geo_db import GEO_DB, build_geo_db
+from src.records import SPEED_FAILED, ProxyRecord, ProxyResult, Status
+from src.stream_out import BackgroundWriter, NDJSONWriter, ResultFileWriter
+from src.checkpoint import JournalWriter, Progress, fingerprint, load_journal, remaining
+from src.result_cache import ResultCache
+from src.budget import DEADLINE, expired as budget_expired, start_budget
 from src.ui import (
     print_banner, print_info, print_result, display_result_table, print_error,
     print_success, print_warning, print_debug, print_separator,
     create_progress_bar, print_speed_test_header, print_speed_test_result,
-    print_summary_stats
+    print_summary_stats, print_phase_breakdown, print_concurrency_curve, print_host_stats, print_parse_report
 )
 import src.config as config_module
 
 # Global flag for graceful shutdown
 shutdown_requested = False
 active_executors = []
+active_processes = []
+result_writers: List[BackgroundWriter] = []  # --stream-out and -o, fed as results become final
+pending_final: List[Tuple[ProxyRecord, ProxyResult]] = []  # with --samples: final results waiting for their statistics
+pending_lock = threading.Lock()
+journal: Optional[JournalWriter] = None  # --checkpoint, fed as each phase completes
+result_cache: Optional[ResultCache] = None  # --cache, fed as each phase completes
 
 def cleanup_and_exit():
     """Clean up resources and exit immediately"""
@@ -34,6 +62,38 @@ def cleanup_and_exit():
         active_executors.clear()
     except:
         pass
+    try:
+        # Stop --workers processes still running a shard
+        for process in active_processes:
+            process.terminate()
+        active_processes.clear()
+    except:
+        pass
+    try:
+        # Release pooled keep-alive connections held by per-proxy sessions
+        SESSIONS.close_all()
+    except:
+        pass
+    try:
+        # Results already handed to --stream-out / -o still reach the disk or consumer
+        flush_final(timeout=1)
+        for writer in result_writers:
+            writer.close(timeout=1)
+    except:
+        pass
+    try:
+        # The checkpoint keeps every phase completed so far for --resume
+        if journal:
+            journal.close(timeout=1)
+    except:
+        pass
+    try:
+        # Commit the results and locations cached since the last commit
+        if result_cache:
+            result_cache.close()
+        GEO_CACHE.close_store()
+    except:
+        pass
     # Force exit without waiting for threads
     os._exit(0)
 
@@ -56,129 +116,424 @@ def check_shutdown():
     if shutdown_requested:
         cleanup_and_exit()
 
-def calculate_optimal_threads(proxy_count: int, base_threads: int = 8, max_threads: int = 64) -> int:
-    """Calculate optimal thread count based on proxy count."""
-    if proxy_count <= 0:
-        return 1
-    calculated = base_threads * math.log2(proxy_count + 1)
-    rounded = round(calculated)
-    return min(max(rounded, 1), min(max_threads, proxy_count))
+def tcp_preprobe_stage(proxies: List[ProxyRecord], user_config: Dict[str, Any]) -> PreprobeReport:
+    """Run the TCP pre-probe over all proxies and report pass/fail counts and timing"""
+    timeout = user_config.get("preprobe_timeout", config_module.PREPROBE_TIMEOUT)
+    print_info(f"TCP pre-probe: connecting to {len(proxies)} endpoints ({timeout}s timeout)...")
+    
+    with create_progress_bar(transient=True) as progress:
+        task = progress.add_task("[cyan]TCP pre-probe...", total=len(proxies))
+        
+        def on_result(idx: int, error: Optional[str]) -> None:
+            check_shutdown()
+            progress.update(task, advance=1)
+        
+        report = run_tcp_preprobe(proxies, timeout=timeout, on_result=on_result)
+    
+    print_success(
+        f"TCP pre-probe complete in {report.elapsed:.1f}s: "
+        f"{report.passed} reachable, {report.failed} filtered out"
+    )
+    return report
+
+def emit_final(proxy: ProxyRecord, result: ProxyResult) -> None:
+    """Hand a result that no later phase will change to the --stream-out / -o writers"""
+    if not result_writers:
+        return
+    if config_module.LATENCY_SAMPLES <= 1:
+        for writer in result_writers:
+            writer.write(proxy, result)
+        return
+    # --samples statistics are computed a chunk at a time (one vectorized pass
+    # with numpy), so results wait here until STREAM_OUT_BATCH have gathered
+    # or flush_final() runs at the end of a phase
+    with pending_lock:
+        pending_final.append((proxy, result))
+        if len(pending_final) >= config_module.STREAM_OUT_BATCH:
+            _write_pending()
+
+def flush_final(timeout: Optional[float] = None) -> None:
+    """Write the results emit_final() is still holding for their --samples statistics"""
+    if not pending_lock.acquire(timeout=-1 if timeout is None else timeout):
+        return
+    try:
+        _write_pending()
+    finally:
+        pending_lock.release()
+
+def _write_pending() -> None:
+    # Caller holds pending_lock
+    apply_sample_stats([result for _, result in pending_final if result.sample_stats is None])
+    for proxy, result in pending_final:
+        for writer in result_writers:
+            writer.write(proxy, result)
+    pending_final.clear()
+
+def record_phase(phase: str, proxy: ProxyRecord, result: ProxyResult) -> None:
+    """Journal a completed phase for --resume and cache it for --cache (cut-off checks are not complete)"""
+    if result.status == DEADLINE:
+        return
+    if journal:
+        journal.record(phase, proxy, result)
+    if result_cache:
+        result_cache.store(phase, proxy, result)
+
+def open_journal(path: str, input_id: str, resume: bool) -> Optional[Progress]:
+    """Start the --checkpoint journal; with resume, return what an earlier run already did (None on error)"""
+    global journal
+    progress = {}
+    if resume and os.path.exists(path):
+        try:
+            progress = load_journal(path, input_id)
+        except (OSError, ValueError) as e:
+            print_error(f"Cannot resume from {path}: {e}")
+            return None
+    elif resume:
+        print_warning(f"No checkpoint found at {path} - starting from the beginning")
+    try:
+        journal = JournalWriter(path, input_id, resume=bool(progress))
+    except OSError as e:
+        print_error(f"Cannot open {path}: {e}")
+        return None
+    print_info(f"Checkpointing progress to {path}")
+    return progress
+
+def close_journal() -> None:
+    """Flush and fsync the checkpoint journal"""
+    global journal
+    if journal:
+        journal.close()
+        if journal.error:
+            print_warning(f"Checkpointing to {journal.target} stopped: {journal.error}")
+        journal = None
+
+def open_result_cache(path: str, proxies: List[ProxyRecord], user_config: Dict[str, Any]) -> Progress:
+    """Open the --cache database and return the fresh results it has for proxies"""
+    global result_cache
+    max_age = user_config.get("max_age", config_module.RESULT_CACHE_MAX_AGE)
+    try:
+        result_cache = ResultCache(path, user_config.get("type"))
+        cached = result_cache.lookup(proxies, max_age)
+    except sqlite3.Error as e:
+        print_error(f"Cannot use result cache {path}: {e}")
+        result_cache = None
+        return {}
+    print_info(
+        f"Result cache {path}: {result_cache.hits} results younger than {max_age:g}s reused, "
+        f"{result_cache.misses} proxies to test"
+    )
+    return cached
+
+def close_result_cache() -> None:
+    """Commit and close the --cache database, reporting hits and misses"""
+    global result_cache
+    if result_cache:
+        result_cache.close()
+        print_info(f"Result cache: {result_cache.hits} hits, {result_cache.misses} misses")
+        result_cache = None
+
+def open_result_writer(create: Callable[[], BackgroundWriter], target: str, description: str) -> None:
+    """Start a background result writer (create opens the target)"""
+    try:
+        result_writers.append(create())
+    except OSError as e:
+        print_error(f"Cannot open {target}: {e}")
+        return
+    print_info(f"{description} {'stdout' if target == '-' else target}")
+
+def open_stream_out(target: str, copies: Dict[int, List[int]]) -> None:
+    """Start writing --stream-out JSON lines as results finalize"""
+    open_result_writer(lambda: NDJSONWriter(target, copies), target, "Streaming results as JSON lines to")
 
-def initial_proxy_check(proxies: List[Dict[str, Any]], user_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+def open_output_file(path: str, copies: Dict[int, List[int]]) -> None:
+    """Start appending -o rows as results finalize"""
+    sampled = config_module.LATENCY_SAMPLES > 1
+    open_result_writer(lambda: ResultFileWriter(path, sampled, copies), path, "Writing results as they complete to")
+
+def close_result_writers() -> None:
+    """Flush and fsync the result writers and report what they wrote"""
+    flush_final()
+    for writer in result_writers:
+        writer.close()
+        if writer.error:
+            print_warning(f"Writing to {writer.target} stopped after {writer.written} results: {writer.error}")
+        else:
+            print_debug(f"Wrote {writer.written} results to {writer.target}")
+    result_writers.clear()
+
+def report_shard_errors(reports: List[Dict[str, Any]]) -> None:
+    """Warn about worker processes that failed and log each worker's concurrency"""
+    for report in reports:
+        if report["error"]:
+            print_warning(f"Worker {report['shard'] + 1} failed: {report['error']}")
+        elif report["summary"]:
+            summary = report["summary"]
+            print_debug(f"Worker {report['shard'] + 1}: {report['count']} proxies, concurrency {summary['start']} → {summary['final']}")
+
+def initial_proxy_check(proxies: List[ProxyRecord], user_config: Dict[str, Any]) -> List[ProxyResult]:
     """Perform initial fast connectivity check only"""
     global active_executors
-    test_func = test_socks_proxy if user_config["type"] == "socks" else test_http_proxy
-    thread_count = calculate_optimal_threads(len(proxies))
     print_separator()
     print_info(f"Starting initial connectivity check for {len(proxies)} proxies...")
-    print_debug(f"Thread calculation: {len(proxies)} proxies → {thread_count} threads")
     print_debug(f"Test function: {'SOCKS5' if user_config['type'] == 'socks' else 'HTTP'}")
     
     results = [None] * len(proxies)
+    to_check = list(range(len(proxies)))
+    
+    # Optional first stage: only endpoints that accept a TCP connection get the full check
+    if user_config.get("preprobe"):
+        report = tcp_preprobe_stage(proxies, user_config)
+        for i, error in enumerate(report.errors):
+            if error:
+                results[i] = failed_result(user_config["type"], error)
+                record_phase(CHECK, proxies[i], results[i])
+                emit_final(proxies[i], results[i])
+        to_check = [i for i in to_check if report.reachable(i)]
+    
+    checked = [proxies[i] for i in to_check]
+    checked_results = [None] * len(checked)
     
     # Create beautiful progress bar
     with create_progress_bar() as progress:
         task = progress.add_task(
-            f"[cyan]Testing {len(proxies)} proxies...",
-            total=len(proxies)
+            f"[cyan]Testing {len(checked)} proxies...",
+            total=len(checked)
         )
         
-        with ThreadPoolExecutor(max_workers=thread_count) as executor:
-            active_executors.append(executor)
+        limiter = None
+        shard_reports = []
+        scheduler = HostScheduler(checked, user_config.get("per_host_limit"))
+        host_stats = HostStats()
+        
+        more_phases = user_config.get("geo_lookup") or user_config.get("speed_test")
+        
+        def on_result(idx: int, result: ProxyResult) -> None:
+            check_shutdown()
+            print_result(result, show_location=False)
+            checked_results[idx] = result
+            host_stats.record(checked[idx], result)
+            record_phase(CHECK, checked[idx], result)
+            if not (result.working and more_phases):
+                emit_final(checked[idx], result)
+            progress.update(task, advance=1)
+        
+        if not checked:
+            print_debug("No proxy left to check after the TCP pre-probe")
+        elif user_config.get("coordinator"):
+            # Remote workers pull units of the list and stream results back
+            coordinator = Coordinator(
+                checked,
+                user_config,
+                user_config["coordinator"],
+                unit_size=user_config.get("unit_size", config_module.DISTRIBUTED_UNIT_SIZE),
+                on_result=on_result,
+                token=user_config.get("token")
+            )
+            coordinator.start()
+            # Only show a secret the user did not choose themselves
+            token = "<token>" if user_config.get("token") else coordinator.token
+            print_info(
+                f"Coordinator listening on {coordinator.address} ({len(coordinator.units)} units) - "
+                f"start workers with: fwz_pt --worker {coordinator.address} --token {token}"
+            )
             try:
-                future_to_index = {
-                    executor.submit(test_func, proxy): i 
-                    for i, proxy in enumerate(proxies)
-                }
-                
-                for future in as_completed(future_to_index):
-                    # Check for shutdown request
-                    check_shutdown()
-                    
-                    idx = future_to_index[future]
-                    proxy = proxies[idx]
-                    try:
-                        result = future.result()
-                        # Pass show_location=False for initial check
-                        print_result(result, show_location=False)
-                        results[idx] = result
-                    except Exception as e:
-                        print_error(f"[THREAD FAIL] {proxy['raw']} → {str(e)}")
-                        results[idx] = {
-                            "Type": user_config["type"].upper(),
-                            "IP": "N/A",
-                            "Location": "N/A",
-                            "Latency": "N/A",
-                            "Speed": "N/A",
-                            "Status": "Failed",
-                            "Error": str(e)
-                        }
-                    
-                    # Update progress
-                    progress.update(task, advance=1)
-                    
+                coordinator.wait()
             finally:
-                active_executors.remove(executor) if executor in active_executors else None
+                coordinator.close()
+            print_debug(f"Coordinator: {coordinator.workers_seen} workers, {coordinator.reassigned} units reassigned")
+        elif user_config.get("workers", 1) > 1:
+            # One checker (threads or asyncio) per process; results stream back
+            # in completion order and are merged by index
+            shard_reports = run_sharded(
+                CHECK,
+                [(i, proxy, None) for i, proxy in enumerate(checked)],
+                user_config,
+                user_config["workers"],
+                on_result,
+                processes=active_processes
+            )
+        elif user_config.get("use_async"):
+            # Asyncio engine: every check shares one event loop
+            concurrency = min(user_config.get("concurrency", config_module.ASYNC_CONCURRENCY), len(checked))
+            limiter = AdaptiveLimiter(
+                initial=min(config_module.ADAPTIVE_ASYNC_START, concurrency),
+                maximum=concurrency
+            )
+            run_async_checks(
+                checked,
+                user_config["type"],
+                concurrency=concurrency,
+                on_result=on_result,
+                limiter=limiter,
+                scheduler=scheduler
+            )
+        else:
+            limiter = default_limiter(len(checked))
+            run_threaded_checks(
+                checked,
+                user_config["type"],
+                limiter=limiter,
+                on_result=on_result,
+                executors=active_executors,
+                scheduler=scheduler
+            )
+    
+    print_debug(f"Proxy hosts: {scheduler.host_count} for {len(checked)} proxies")
+    report_shard_errors(shard_reports)
     
-    working_count = sum(1 for r in results if r and r["Status"] == "Working")
+    for i, result in zip(to_check, checked_results):
+        # Proxies a crashed worker never reported on count as failed
+        if result is None:
+            result = failed_result(user_config["type"], "Worker process failed")
+            emit_final(proxies[i], result)
+        results[i] = result
+    
+    working_count = sum(1 for r in results if r and r.working)
     print()
     print_success(f"Initial check complete! {working_count}/{len(proxies)} proxies working")
+    deadline_count = sum(1 for r in results if r and r.status == DEADLINE)
+    if deadline_count:
+        print_warning(f"Time budget ran out: {deadline_count} proxies were cut off before finishing")
+    if config_module.LATENCY_SAMPLES > 1:
+        # Per-proxy min/p50/p95/jitter, computed over the whole result set at once
+        sampled = apply_sample_stats(results)
+        print_debug(f"Latency statistics computed for {sampled} proxies ({config_module.LATENCY_SAMPLES} probes each)")
+    flush_final()
+    print_phase_breakdown(aggregate_phases(results))
+    host_rows = host_stats.summary()
+    if any(row["checked"] > 1 for row in host_rows):
+        # Only worth showing when hosts carry more than one entry
+        print_host_stats(host_rows, config_module.HOST_STATS_ROWS)
+    if limiter:
+        print_concurrency_curve(limiter.summary())
     print_separator()
     return results
 
-def perform_additional_checks(working_proxies: List[Dict[str, Any]], user_config: Dict[str, Any]) -> None:
+def perform_additional_checks(working_proxies: List[Tuple[ProxyRecord, ProxyResult]], user_config: Dict[str, Any]) -> None:
     """Perform optional additional checks (geo-IP and speed tests)"""
-    global active_executors
     if not working_proxies:
         return
+    # Results are final as the last requested phase reaches them; the ones it
+    # never reaches (budget, shutdown, errors) once the checks are over
+    finalized = set()
+    
+    def finalize(idx: int) -> None:
+        finalized.add(idx)
+        emit_final(*working_proxies[idx])
+    
+    try:
+        run_additional_checks(working_proxies, user_config, finalize)
+    finally:
+        for idx, (proxy, result) in enumerate(working_proxies):
+            if idx not in finalized:
+                emit_final(proxy, result)
+        flush_final()
+
+def run_additional_checks(working_proxies: List[Tuple[ProxyRecord, ProxyResult]], user_config: Dict[str, Any],
+                          finalize: Callable[[int], None]) -> None:
+    """
+    Geo-IP and speed phases of perform_additional_checks; finalize(idx) is called as the last one finishes a proxy.
+    
+    Each phase covers the proxies whose geo_lookup / speed_test flag is set.
+    """
+    global active_executors
+    workers = min(user_config.get("workers", 1), len(working_proxies))
+    geo_indices = [i for i, (proxy, _) in enumerate(working_proxies) if proxy.geo_lookup]
+    speed_indices = [i for i, (proxy, _) in enumerate(working_proxies) if proxy.speed_test]
+    
+    if budget_expired():
+        print_warning("Time budget exhausted - skipping Geo-IP lookups and speed tests")
+        return
     
     # Geo-IP lookups
-    if user_config.get("geo_lookup"):
-        geo_threads = calculate_optimal_threads(len(working_proxies), base_threads=8, max_threads=32)
+    if geo_indices:
+        # One lookup per exit IP: cached IPs are answered right away, the others
+        # by a single proxy whose location the rest then share
+        by_ip: Dict[str, List[int]] = {}
+        for idx in geo_indices:
+            by_ip.setdefault(working_proxies[idx][1].ip, []).append(idx)
+        cached = {}
+        for ip in by_ip:
+            location = GEO_CACHE.get(ip)
+            if location is not None:
+                cached[ip] = location
+        lookups = [indices[0] for ip, indices in by_ip.items() if ip not in cached]
+        geo_threads = calculate_optimal_threads(len(lookups), base_threads=8, max_threads=config_module.GEO_MAX_THREADS)
         print_separator()
-        print_info(f"Starting Geo-IP lookups for {len(working_proxies)} proxies...")
-        print_debug(f"Geo-IP threads: {len(working_proxies)} proxies → {geo_threads} threads")
+        print_info(f"Starting Geo-IP lookups for {len(geo_indices)} proxies...")
+        print_debug(f"Geo-IP: {len(by_ip)} distinct exit IPs, {len(cached)} already cached")
+        if workers > 1:
+            print_debug(f"Geo-IP: {len(lookups)} lookups across {workers} worker processes")
+        else:
+            print_debug(f"Geo-IP threads: {len(lookups)} lookups → {geo_threads} threads")
         
         with create_progress_bar() as progress:
             task = progress.add_task(
                 f"[green]Geo-IP lookups...",
-                total=len(working_proxies)
+                total=len(geo_indices)
             )
             
-            with ThreadPoolExecutor(max_workers=geo_threads) as executor:
-                active_executors.append(executor)
-                try:
-                    futures = [
-                        executor.submit(run_geo_lookup, proxy, result)
-                        for proxy, result in working_proxies
-                    ]
-                    for future in as_completed(futures):
-                        # Check for shutdown request
-                        check_shutdown()
-                        try:
-                            future.result()
-                            progress.update(task, advance=1)
-                        except Exception as e:
-                            print_error(f"[GEO LOOKUP ERROR] {str(e)}")
-                            progress.update(task, advance=1)
-                finally:
-                    active_executors.remove(executor) if executor in active_executors else None
+            def geo_done(idx: int) -> None:
+                # Every proxy with this exit IP gets the location found for it
+                location = working_proxies[idx][1].location
+                for other in by_ip[working_proxies[idx][1].ip]:
+                    proxy, result = working_proxies[other]
+                    result.location = location
+                    record_phase(GEO, proxy, result)
+                    if not proxy.speed_test:
+                        finalize(other)
+                    progress.update(task, advance=1)
+            
+            for ip, location in cached.items():
+                working_proxies[by_ip[ip][0]][1].location = location
+                geo_done(by_ip[ip][0])
+            
+            if not lookups:
+                print_debug("Geo-IP: every exit IP was answered from the cache")
+            elif workers > 1:
+                def on_geo_result(idx: int, updated: ProxyResult) -> None:
+                    check_shutdown()
+                    working_proxies[idx][1].update(updated)
+                    GEO_CACHE.put(updated.ip, updated.location)
+                    geo_done(idx)
+                
+                report_shard_errors(run_sharded(
+                    GEO,
+                    [(i, *working_proxies[i]) for i in lookups],
+                    user_config,
+                    workers,
+                    on_geo_result,
+                    processes=active_processes
+                ))
+            else:
+                # ip-api.com batches of up to 100 IPs, ipwho.is for the IPs they miss
+                def on_geo_lookup(idx: int, result: ProxyResult) -> None:
+                    check_shutdown()
+                    geo_done(idx)
+                
+                run_geo_lookups(
+                    [(idx, working_proxies[idx][1]) for idx in lookups],
+                    on_geo_lookup,
+                    threads=geo_threads,
+                    executors=active_executors
+                )
         
         print()
-        print_success("Geo-IP lookups completed")
+        print_success(f"Geo-IP lookups completed ({len(lookups)} lookups for {len(by_ip)} exit IPs)")
         print_separator()
     
     # Speed tests
-    if user_config.get("speed_test"):
+    if speed_indices:
         # Use SEQUENTIAL speed testing for maximum accuracy
         # Each proxy gets full bandwidth - no competition, no CDN throttling
         # This ensures accurate, professional-grade speed measurements
         print_separator()
-        print_speed_test_header(len(working_proxies))
+        print_speed_test_header(len(speed_indices))
         
         completed = 0
-        total = len(working_proxies)
+        total = len(speed_indices)
         speeds = []
+        avg_time_per_test = 10
         
         import time as time_module
         start_time = time_module.time()
@@ -190,47 +545,71 @@ def perform_additional_checks(working_proxies: List[Dict[str, Any]], user_config
                 total=total
             )
             
-            for proxy, result in working_proxies:
-                check_shutdown()
+            def show_speed(result: ProxyResult) -> None:
+                # Track speeds for summary
+                if result.speed is not None and result.speed > SPEED_FAILED:
+                    speeds.append(result.speed)
                 
-                completed += 1
-                elapsed = time_module.time() - start_time
-                avg_time_per_test = elapsed / completed if completed > 0 else 10
+                # Print individual result
+                print_speed_test_result(
+                    proxy_num=completed,
+                    total=total,
+                    ip=result.ip,
+                    speed=result.speed,
+                    location=result.location if user_config.get("geo_lookup") else None
+                )
                 
-                try:
-                    run_speed_test(proxy, result)
-                    
-                    # Track speeds for summary
-                    speed_str = result.get("Speed", "Error")
-                    if speed_str != "Error" and "Mbps" in speed_str:
-                        try:
-                            speed_val = float(speed_str.replace(" Mbps", ""))
-                            speeds.append(speed_val)
-                        except:
-                            pass
-                    
-                    # Print individual result
-                    print_speed_test_result(
-                        proxy_num=completed,
-                        total=total,
-                        ip=result.get("IP", "N/A"),
-                        speed=speed_str,
-                        location=result.get("Location") if user_config.get("geo_lookup") else None
-                    )
+                # Update progress bar
+                progress.update(task, advance=1)
+            
+            if workers > 1:
+                # Each worker tests its shard sequentially, so `workers` tests run at once
+                def on_speed_result(idx: int, updated: ProxyResult) -> None:
+                    nonlocal completed, avg_time_per_test
+                    check_shutdown()
+                    working_proxies[idx][1].update(updated)
+                    completed += 1
+                    avg_time_per_test = (time_module.time() - start_time) / completed
+                    show_speed(working_proxies[idx][1])
+                    record_phase(SPEED, *working_proxies[idx])
+                    finalize(idx)
+                
+                report_shard_errors(run_sharded(
+                    SPEED,
+                    [(i, *working_proxies[i]) for i in speed_indices],
+                    user_config,
+                    workers,
+                    on_speed_result,
+                    processes=active_processes
+                ))
+            else:
+                for idx in speed_indices:
+                    proxy, result = working_proxies[idx]
+                    check_shutdown()
+                    if budget_expired():
+                        print_warning(f"Time budget exhausted - {total - completed} speed tests skipped")
+                        break
                     
-                    # Update progress bar
-                    progress.update(task, advance=1)
+                    completed += 1
+                    elapsed = time_module.time() - start_time
+                    avg_time_per_test = elapsed / completed if completed > 0 else 10
                     
-                    # Small delay to prevent CDN rate limiting (500ms)
-                    if completed < total:
-                        time_module.sleep(0.5)
+                    try:
+                        run_speed_test(proxy, result)
+                        show_speed(result)
+                        record_phase(SPEED, proxy, result)
+                        finalize(idx)
                         
-                except Exception as e:
-                    print_error(f"[SPEEDTEST ERROR] {str(e)}")
-                    progress.update(task, advance=1)
+                        # Small delay to prevent CDN rate limiting (500ms)
+                        if completed < total:
+                            time_module.sleep(0.5)
+                            
+                    except Exception as e:
+                        print_error(f"[SPEEDTEST ERROR] {str(e)}")
+                        progress.update(task, advance=1)
         
         # Display beautiful summary
-        working_with_speed = len([r for _, r in working_proxies if r.get("Speed") not in ["Error", "N/A"]])
+        working_with_speed = len(speeds)
         failed_speeds = total - working_with_speed
         avg_speed = sum(speeds) / len(speeds) if speeds else None
         
@@ -246,6 +625,128 @@ def perform_additional_checks(working_proxies: List[Dict[str, Any]], user_config
         print_success("Speed tests completed")
         print_separator()
 
+def restore_results(proxies: List[ProxyRecord], progress: Progress,
+                    user_config: Dict[str, Any]) -> List[Optional[ProxyResult]]:
+    """Results a checkpoint or the cache has for proxies (None where the check is still to do); flags the phases left"""
+    results = [None] * len(proxies)
+    for i, proxy in enumerate(proxies):
+        if proxy.index not in progress:
+            continue
+        phases, results[i] = progress[proxy.index]
+        proxy.geo_lookup, proxy.speed_test = remaining(
+            phases, results[i], user_config.get("geo_lookup", False), user_config.get("speed_test", False)
+        )
+        if not (proxy.geo_lookup or proxy.speed_test):
+            emit_final(proxy, results[i])
+    flush_final()
+    return results
+
+def is_proxy_file(source: str) -> bool:
+    """True if the proxy argument names a list file (any existing file, or a .txt path) rather than one proxy"""
+    return source.endswith(".txt") or os.path.isfile(source)
+
+def stream_proxy_check(user_config: Dict[str, Any]) -> None:
+    """Read, parse and check proxies as a pipeline; only counters are kept"""
+    global active_executors
+    source = user_config["proxy_input"]
+    if isinstance(source, list):
+        lines = source
+    elif source == "-" or is_proxy_file(source):
+        if source != "-" and not os.path.exists(source):
+            print_error(f"Proxy file not found: {source}")
+            return
+        lines = iter_proxy_lines(source)
+    else:
+        lines = [source]
+    
+    for option, flag in (("use_async", "--async"), ("preprobe", "--preprobe"), ("coordinator", "--coordinator"),
+                         ("speed_test", "--speed-test"), ("checkpoint", "--checkpoint"), ("cache", "--cache")):
+        if user_config.get(option):
+            print_warning(f"{flag} is not supported when streaming and is ignored")
+    if user_config.get("workers", 1) > 1:
+        print_warning("--workers is not supported when streaming and is ignored")
+    
+    parse_report = ParseReport()
+    proxies = iter_parsed_proxies(
+        lines, user_config.get("type"), ip_whitelist=user_config.get("ip_whitelist", False), report=parse_report
+    )
+    geo_lookup = user_config.get("geo_lookup", False)
+    test_func = test_socks_proxy if user_config["type"] == "socks" else test_http_proxy
+    
+    def check(proxy: ProxyRecord) -> ProxyResult:
+        result = test_func(proxy)
+        # Geo-IP runs in the same worker thread right after a successful check
+        if geo_lookup and result.working and not budget_expired():
+            run_geo_lookup(proxy, result)
+        return result
+    
+    print_separator()
+    print_info(f"Streaming proxies from {'stdin' if source == '-' else 'input'} "
+               f"({config_module.STREAM_WINDOW} held at most)...")
+    working_count = 0
+    deadline_count = 0
+    limiter = default_limiter(config_module.STREAM_WINDOW)
+    
+    with create_progress_bar() as progress:
+        task = progress.add_task("[cyan]Testing proxies...", total=None)
+        
+        def on_result(proxy: ProxyRecord, result: ProxyResult) -> None:
+            nonlocal working_count, deadline_count
+            check_shutdown()
+            print_result(result, show_location=geo_lookup)
+            emit_final(proxy, result)
+            working_count += result.working
+            deadline_count += result.status == DEADLINE
+            progress.update(task, advance=1)
+        
+        checked = run_streaming_checks(
+            proxies,
+            user_config["type"],
+            limiter=limiter,
+            on_result=on_result,
+            executors=active_executors,
+            check=check
+        )
+    
+    print()
+    print_parse_report(parse_report)
+    if not checked:
+        print_error("No valid proxies found after parsing")
+        return
+    print_success(f"Streaming check complete! {working_count}/{checked} proxies working")
+    if deadline_count:
+        print_warning(f"Time budget ran out: {deadline_count} proxies were cut off before finishing")
+    print_concurrency_curve(limiter.summary())
+
+def worker_mode(address: str, token: Optional[str], verbose: bool = False) -> None:
+    """Serve a remote coordinator until it has no work left"""
+    config_module.VERBOSE_MODE = verbose
+    if not token:
+        print_error(f"Worker mode needs the coordinator's secret: pass --token or set {config_module.DISTRIBUTED_TOKEN_ENV}")
+        return
+    print_info(f"Worker mode: connecting to coordinator at {address}...")
+    
+    def on_unit(unit: int, count: int) -> None:
+        check_shutdown()
+        print_info(f"Unit {unit} done ({count} proxies)")
+    
+    try:
+        units = run_worker(address, token, on_unit=on_unit)
+    except (OSError, ValueError) as e:
+        print_error(f"Worker stopped: {str(e)}")
+        return
+    print_success(f"Coordinator reports no work left - {units} units completed by this worker")
+
+def build_geo_db_mode(csv_path: str, out_path: str) -> None:
+    """Convert a CSV range file into the compact --geo-db format"""
+    print_info(f"Building Geo-IP database {out_path} from {csv_path}...")
+    try:
+        count = build_geo_db(csv_path, out_path)
+    except (OSError, ValueError) as e:
+        print_error(f"Cannot build Geo-IP database: {str(e)}")
+        return
+    print_success(f"Geo-IP database written: {count} IPv4 ranges in {os.path.getsize(out_path)} bytes")
+
 def main():
     """Main function that orchestrates the proxy testing process"""
     # Register cleanup function for emergency exit
@@ -257,27 +758,87 @@ def main():
     if hasattr(signal, 'SIGTERM'):
         signal.signal(signal.SIGTERM, signal_handler)
     
-    print_banner()
+    # Every hostname lookup in this process (checkers, requests, PySocks) goes through the DNS cache
+    install_dns_cache()
     
     # Parse command line arguments and get user configuration
     args = parse_cli_args()
+    if args.stream_out == "-":
+        # stdout carries the NDJSON results; everything else goes to stderr
+        sys.stdout = sys.stderr
+    
+    print_banner()
+    
+    if args.worker:
+        worker_mode(args.worker, args.token, args.verbose)
+        return
+    if args.build_geo_db:
+        build_geo_db_mode(*args.build_geo_db)
+        return
     user_config = interactive_prompt(args)
     
     # Set verbose mode globally for debug output
     config_module.VERBOSE_MODE = user_config.get("verbose", False)
     
+    # Apply retry policy and timeouts globally for the connectivity checkers
+    config_module.MAX_RETRIES = user_config.get("retries", config_module.MAX_RETRIES)
+    config_module.REQUEST_TIMEOUT = user_config.get("timeout", config_module.REQUEST_TIMEOUT)
+    config_module.CONNECT_TIMEOUT = user_config.get("connect_timeout", config_module.CONNECT_TIMEOUT)
+    config_module.PER_HOST_LIMIT = user_config.get("per_host_limit", config_module.PER_HOST_LIMIT)
+    config_module.LATENCY_SAMPLES = user_config.get("samples", config_module.LATENCY_SAMPLES)
+    
     if user_config.get("verbose"):
         print_info("Verbose mode enabled - showing detailed debug information")
         print_debug(f"Configuration: Type={user_config.get('type')}, Geo={user_config.get('geo_lookup')}, Speed={user_config.get('speed_test')}")
         print_debug(f"Output file: {user_config.get('output_path', 'None specified')}")
+        print_debug(f"Retries: {config_module.MAX_RETRIES}, timeouts: connect={config_module.CONNECT_TIMEOUT}s read={config_module.REQUEST_TIMEOUT}s")
+        print_debug(f"Connectivity engine: {'asyncio (' + str(user_config.get('concurrency')) + ' in flight)' if user_config.get('use_async') else 'threads'}")
+        print_debug(f"Worker processes: {user_config.get('workers', 1)}")
         print_debug(f"Signal handlers registered: SIGINT{' and SIGTERM' if hasattr(signal, 'SIGTERM') else ''}")
         print_debug(f"Graceful shutdown system: [ACTIVE]")
 
+    if user_config.get("output_path") and not os.path.splitext(user_config["output_path"])[1]:
+        # Add .txt extension if no extension provided
+        user_config["output_path"] += '.txt'
+    if user_config.get("geo_db") and user_config.get("geo_lookup"):
+        try:
+            GEO_DB.load(user_config["geo_db"])
+        except (OSError, ValueError) as e:
+            print_error(f"Cannot load Geo-IP database {user_config['geo_db']}: {str(e)}")
+            return
+        # Worker processes load the same file on first use
+        config_module.GEO_DB_PATH = user_config["geo_db"]
+        print_info(f"Offline Geo-IP database {user_config['geo_db']}: {len(GEO_DB)} ranges")
+    elif user_config.get("geo_cache") and user_config.get("geo_lookup"):
+        try:
+            GEO_CACHE.open_store(user_config["geo_cache"])
+            print_info(f"Caching Geo-IP locations in {user_config['geo_cache']}")
+        except sqlite3.Error as e:
+            print_error(f"Cannot use Geo-IP cache {user_config['geo_cache']}: {e}")
+    
+    if user_config.get("stream"):
+        # Lines are read, parsed and checked on the fly: no result table or retry,
+        # and -o rows stay in completion order
+        if user_config.get("stream_out"):
+            open_stream_out(user_config["stream_out"], {})
+        if user_config.get("output_path"):
+            open_output_file(user_config["output_path"], {})
+        if user_config.get("budget"):
+            start_budget(user_config["budget"])
+            print_info(f"Time budget: {user_config['budget']:g}s - timeouts adapt to the observed p95 latency")
+        stream_proxy_check(user_config)
+        close_result_writers()
+        GEO_CACHE.close_store()
+        print_debug(f"Closing {len(SESSIONS)} pooled sessions")
+        SESSIONS.close_all()
+        print_separator()
+        return
+
     # Validate and load proxies
     try:
         if isinstance(user_config["proxy_input"], list):
             raw_proxies = user_config["proxy_input"]
-        elif user_config["proxy_input"].endswith(".txt"):
+        elif is_proxy_file(user_config["proxy_input"]):
             if not os.path.exists(user_config["proxy_input"]):
                 print_error(f"Proxy file not found: {user_config['proxy_input']}")
                 return
@@ -293,17 +854,11 @@ def main():
         print_error(f"Error loading proxies: {str(e)}")
         return
 
-    # Parse and validate proxy format
-    proxies = []
-    for i, proxy_line in enumerate(raw_proxies):
-        try:
-            parsed_proxy = parse_proxy_line(proxy_line, user_config.get("type"), ip_whitelist=user_config.get("ip_whitelist", False))
-            if parsed_proxy:
-                proxies.append(parsed_proxy)
-            else:
-                print_warning(f"Skipping invalid proxy format: {proxy_line}")
-        except Exception as e:
-            print_warning(f"Error parsing proxy line {i+1}: {proxy_line} - {str(e)}")
+    # Parse and validate proxy format in one pass; bad lines are summarized by kind
+    proxies, parse_report = parse_proxy_lines(
+        raw_proxies, user_config.get("type"), ip_whitelist=user_config.get("ip_whitelist", False)
+    )
+    print_parse_report(parse_report)
     
     if not proxies:
         print_error("No valid proxies found after parsing")
@@ -311,17 +866,63 @@ def main():
     
     print_info(f"Successfully parsed {len(proxies)} valid proxies")
     
+    # Completed phases are journaled; on --resume the ones already journaled are skipped
+    progress = {}
+    if user_config.get("checkpoint"):
+        progress = open_journal(
+            user_config["checkpoint"], fingerprint(proxies, user_config.get("type")), user_config.get("resume", False)
+        )
+        if progress is None:
+            return
+        if progress:
+            print_info(f"Resuming from checkpoint: {len(progress)} proxies already checked")
+    
+    # Each endpoint + credentials is checked once; duplicates get its result back on display/export
+    proxies, owners = dedupe_proxies(proxies)
+    if len(owners) > len(proxies):
+        print_info(f"Removed {len(owners) - len(proxies)} duplicate entries - testing {len(proxies)} unique proxies")
+    
+    # Duplicate input lines get their own NDJSON line / -o row with the shared result
+    copies = {}
+    for i, owner in enumerate(owners):
+        first = proxies[owner].index
+        if first != i:
+            copies.setdefault(first, []).append(i)
+    if user_config.get("stream_out"):
+        open_stream_out(user_config["stream_out"], copies)
+    if user_config.get("output_path"):
+        # Rows are appended as results finalize; the file is rewritten in input order at the end
+        open_output_file(user_config["output_path"], copies)
+    
+    # Fresh results from earlier scans stand in for testing those proxies again
+    if user_config.get("cache"):
+        progress.update(open_result_cache(
+            user_config["cache"], [proxy for proxy in proxies if proxy.index not in progress], user_config
+        ))
+    
     # Check for shutdown before starting tests
     check_shutdown()
     
+    # The time budget covers every phase from here on
+    if user_config.get("budget"):
+        start_budget(user_config["budget"])
+        print_info(f"Time budget: {user_config['budget']:g}s - timeouts adapt to the observed p95 latency")
+    
     # Phase 1: Initial connectivity check
-    results = initial_proxy_check(proxies, user_config)
+    if progress:
+        results = restore_results(proxies, progress, user_config)
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            for i, result in zip(pending, initial_proxy_check([proxies[i] for i in pending], user_config)):
+                results[i] = result
+    else:
+        results = initial_proxy_check(proxies, user_config)
     
     # Filter working proxies for additional checks
     working_proxies = [
         (proxies[i], results[i])
         for i in range(len(results))
-        if results[i] and results[i]["Status"] == "Working"
+        if results[i] and results[i].working
     ]
     
     if not working_proxies:
@@ -330,24 +931,36 @@ def main():
         # Check for shutdown before additional checks
         check_shutdown()
         
-        # Apply the additional check flags only to working proxies
+        # Apply the additional check flags only to working proxies (resumed ones have theirs)
         for proxy, _ in working_proxies:
-            proxy["speed_test"] = user_config.get("speed_test", False)
-            proxy["geo_lookup"] = user_config.get("geo_lookup", False)
+            if proxy.index not in progress:
+                proxy.speed_test = user_config.get("speed_test", False)
+                proxy.geo_lookup = user_config.get("geo_lookup", False)
         
         # Phase 2: Optional additional checks
         if user_config.get("geo_lookup") or user_config.get("speed_test"):
-            perform_additional_checks(working_proxies, user_config)
+            perform_additional_checks(
+                [(proxy, result) for proxy, result in working_proxies if proxy.geo_lookup or proxy.speed_test],
+                user_config
+            )
+    
+    if DNS_CACHE.lookups:
+        # Resolution time is not part of any reported latency
+        print_info(
+            f"DNS: {DNS_CACHE.lookups} lookups took {DNS_CACHE.lookup_time * 1000:.0f}ms in total, "
+            f"{DNS_CACHE.hits} answered from cache"
+        )
     
     # Display final results
     print_separator()
     print_info("Displaying final results...")
-    valid_results = [r for r in results if r]
+    valid_results = [r for r in fan_out(results, owners) if r]
     if valid_results:
         display_result_table(
             valid_results,
             show_location=user_config.get("geo_lookup", False),
-            show_speed=user_config.get("speed_test", False)
+            show_speed=user_config.get("speed_test", False),
+            show_samples=config_module.LATENCY_SAMPLES > 1
         )
     else:
         print_warning("No results to display")
@@ -356,10 +969,10 @@ def main():
     failed_results = [
         (proxies[i], results[i])
         for i in range(len(results))
-        if results[i] and results[i]["Status"] in ["Failed", "Timeout"]
+        if results[i] and results[i].status in (Status.FAILED, Status.TIMEOUT)
     ]
     
-    if failed_results:
+    if failed_results and not budget_expired():
         print_separator()
         retry_choice = input(f"Would you like to test {len(failed_results)} failed proxies again? [y/N]: ").strip().lower()
         
@@ -370,8 +983,8 @@ def main():
             # Extract just the proxy objects for retry
             failed_proxies = [proxy for proxy, _ in failed_results]
             
-            # Re-run initial connectivity check
-            retry_results = initial_proxy_check(failed_proxies, user_config)
+            # Re-run initial connectivity check (locally: remote workers have exited by now)
+            retry_results = initial_proxy_check(failed_proxies, dict(user_config, coordinator=None))
             
             # Update the original results with retry results
             newly_working = []
@@ -381,18 +994,18 @@ def main():
                     if result is original_result:
                         results[i] = retry_result
                         break
-                if retry_result and retry_result["Status"] == "Working":
+                if retry_result and retry_result.working:
                     newly_working.append((original_proxy, retry_result))
 
             # Run geo/speed checks on proxies that started working after retry
             if newly_working and (user_config.get("geo_lookup") or user_config.get("speed_test")):
                 for proxy, _ in newly_working:
-                    proxy["speed_test"] = user_config.get("speed_test", False)
-                    proxy["geo_lookup"] = user_config.get("geo_lookup", False)
+                    proxy.speed_test = user_config.get("speed_test", False)
+                    proxy.geo_lookup = user_config.get("geo_lookup", False)
                 perform_additional_checks(newly_working, user_config)
 
             # Recalculate valid results after retry
-            valid_results = [r for r in results if r]
+            valid_results = [r for r in fan_out(results, owners) if r]
 
             # Display updated results
             print_separator()
@@ -401,9 +1014,16 @@ def main():
                 display_result_table(
                     valid_results,
                     show_location=user_config.get("geo_lookup", False),
-                    show_speed=user_config.get("speed_test", False)
+                    show_speed=user_config.get("speed_test", False),
+                    show_samples=config_module.LATENCY_SAMPLES > 1
                 )
     
+    # Every result has been written by now (retried ones a second time)
+    close_result_writers()
+    close_journal()
+    close_result_cache()
+    GEO_CACHE.close_store()
+    
     # Ask for output file if not specified via -o flag
     if user_config.get("ask_for_output") and valid_results:
         print_separator()
@@ -431,6 +1051,10 @@ def main():
             print_error(f"Failed to save results: {str(e)}")
     elif user_config.get("output_path"):
         print_warning("No results to save to file")
+    
+    # All phases are done: close the per-proxy sessions and their connections
+    print_debug(f"Closing {len(SESSIONS)} pooled sessions")
+    SESSIONS.close_all()
     print_separator()
 
 if __name__ == "__main__":
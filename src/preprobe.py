@@ -0,0 +1,94 @@
+"""TCP pre-probe stage.
+
+Before the full HTTP/SOCKS check, fire a non-blocking TCP connect at every
+proxy's host:port with a short timeout. Proxies that refuse the connection
+or blackhole the SYN are filtered out here for the cost of one connect
+attempt, instead of tying up a checker for the full request timeout.
+"""
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+from src.async_tester import raise_fd_limit
+from src.config import PREPROBE_CONCURRENCY, PREPROBE_TIMEOUT
+from src.records import ProxyRecord
+from src.ui import print_debug
+
+
+class PreprobeReport:
+    """Outcome of a pre-probe run: per-proxy errors plus pass/fail counts and timing."""
+
+    __slots__ = ("errors", "elapsed")
+
+    def __init__(self, errors: List[Optional[str]], elapsed: float):
+        self.errors = errors  # None where the connect succeeded
+        self.elapsed = elapsed
+
+    @property
+    def passed(self) -> int:
+        return sum(1 for error in self.errors if error is None)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors) - self.passed
+
+    def reachable(self, index: int) -> bool:
+        return self.errors[index] is None
+
+
+async def probe(host: str, port: int, timeout: float) -> Optional[str]:
+    """Try one TCP connect; returns None on success or a short error description."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.TimeoutError:
+        return f"TCP connect timed out after {timeout}s"
+    except OSError as e:
+        return f"TCP connect failed: {e.strerror or e}"
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return None
+
+
+async def _probe_all(proxies: List[ProxyRecord], timeout: float, concurrency: int,
+                     on_result: Optional[Callable[[int, Optional[str]], None]]) -> List[Optional[str]]:
+    errors: List[Optional[str]] = [None] * len(proxies)
+    pending = iter(enumerate(proxies))
+
+    async def worker():
+        for idx, proxy in pending:
+            errors[idx] = await probe(proxy.host, proxy.port, timeout)
+            if on_result:
+                on_result(idx, errors[idx])
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return errors
+
+
+def run_tcp_preprobe(
+    proxies: List[dict],
+    timeout: float = PREPROBE_TIMEOUT,
+    concurrency: int = PREPROBE_CONCURRENCY,
+    on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+) -> PreprobeReport:
+    """
+    Probe every proxy endpoint with a bare TCP connect.
+
+    Args:
+        proxies: Parsed proxies (from parse_proxy_line)
+        timeout: Connect timeout per proxy in seconds
+        concurrency: Maximum number of connects in flight
+        on_result: Optional callback(index, error) invoked as each probe finishes
+
+    Returns:
+        PreprobeReport with one entry per proxy, in input order
+    """
+    start = time.monotonic()
+    if not proxies:
+        return PreprobeReport([], 0.0)
+    concurrency = raise_fd_limit(min(concurrency, len(proxies)))
+    print_debug(f"TCP pre-probe: {len(proxies)} endpoints → {concurrency} concurrent connects, {timeout}s timeout")
+    errors = asyncio.run(_probe_all(proxies, timeout, concurrency, on_result))
+    return PreprobeReport(errors, time.monotonic() - start)
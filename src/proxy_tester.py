@@ -1,207 +1,127 @@
-import subprocess
 import time
-import json
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from io import BytesIO
-from typing import Optional
-
-import requests
-
-from src.speedtest_helper import (
-    build_requests_proxy,
-    test_fast_com_speed,
-)
-
-from src.utils import format_latency, get_location_from_ip
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.speedtest_helper import test_fast_com_speed
+
+from src.budget import DEADLINE, TRACKER, cut_off, request_timeouts
+from src.geo_cache import GEO_CACHE
+from src.raw_http import fetch_via_http_proxy, parse_echo_ip
+from src.records import SPEED_FAILED, ProxyRecord, ProxyResult, Status, format_speed
+from src.retry import call_with_retries, classify_error
+from src.session_pool import SESSIONS
+from src.socks5_client import fetch_ip_via_socks5
+from src.timing import PhaseTimer
+from src.utils import format_latency, get_location_from_ip, location_from_ipwho, locations_from_ip_api_batch
 from src.config import (
     IP_API_URL,
 )
 from src.ui import print_error, print_debug
+import src.config as config_module
 
-def test_http_proxy(proxy: dict) -> dict:
+def test_http_proxy(proxy: ProxyRecord) -> ProxyResult:
     """Test HTTP proxy connectivity only (fast check)"""
-    print_debug(f"Testing HTTP proxy connectivity: {proxy['raw']}")
+    print_debug(f"Testing HTTP proxy connectivity: {proxy.raw}")
     print_debug(f"Using API endpoint: {IP_API_URL}")
     
-    result = {
-        "Type": "HTTP",
-        "IP": "N/A",
-        "Location": "N/A",
-        "Latency": "N/A",
-        "Speed": "N/A",
-        "Status": "Failed"
-    }
-
-    # Try requests first (more reliable), fallback to curl
-    if proxy.get('username') and proxy.get('password'):
-        proxy_url = f"http://{proxy['username']}:{proxy['password']}@{proxy['host']}:{proxy['port']}"
-    else:
-        proxy_url = f"http://{proxy['host']}:{proxy['port']}"
-    
-    # Method 1: Try with requests (more reliable for proxy testing)
+    result = ProxyResult("HTTP")
+
+    def attempt() -> tuple:
+        connect_timeout, timeout = request_timeouts()
+        timer = PhaseTimer()
+        status, body = fetch_via_http_proxy(
+            proxy, IP_API_URL,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+            timer=timer,
+            samples=config_module.LATENCY_SAMPLES
+        )
+        print_debug(f"Raw API response: {body[:200]!r}")
+        return parse_echo_ip(status, body), timer
+
+    # Raw-socket request through the proxy so each phase can be timed;
+    # retriable errors are retried in-process up to MAX_RETRIES
     try:
-        print_debug("Attempting connection with requests library...")
-        proxies = {'http': proxy_url, 'https': proxy_url}
-        
-        start = time.time()
-        response = requests.get(IP_API_URL, proxies=proxies, timeout=15)
-        latency = time.time() - start
-
-        if response.status_code == 200:
-            data = response.json()
-            print_debug(f"Raw API response: {response.text}")
-            
-            result.update({
-                "IP": data.get("ip", "N/A"),
-                "Latency": format_latency(latency),
-                "Status": "Working"
-            })
-            
-            print_debug(f"HTTP proxy test successful via requests - IP: {result['IP']}, Latency: {result['Latency']}")
-            return result
-            
+        print_debug("Attempting connection with raw HTTP client...")
+        ip, timer = call_with_retries(attempt, label="[HTTP] ")
+        result.ip = ip
+        result.latency = timer.elapsed()
+        result.phases = timer.phases
+        result.samples = timer.samples
+        result.status = Status.WORKING
+        TRACKER.observe(timer.phases, timer.elapsed())
+        print_debug(f"HTTP proxy test successful - IP: {result.ip}, Latency: {format_latency(result.latency)}")
     except Exception as e:
-        print_debug(f"Requests method failed: {str(e)}")
-
-    # Method 2: Fallback to curl with longer timeout
-    curl_cmd = [
-        "curl",
-        "-x", proxy_url,
-        IP_API_URL,
-        "--max-time", "20",  # Increased timeout
-        "--connect-timeout", "15",  # Connection timeout
-        "--silent",
-        "--show-error"
-    ]
-
-    print_debug(f"Fallback: Executing curl command with extended timeout")
-
-    decoded = ""
-    try:
-        start = time.time()
-        output = subprocess.check_output(curl_cmd, stderr=subprocess.STDOUT)
-        latency = time.time() - start
-
-        decoded = output.decode("utf-8").strip()
-        print_debug(f"Raw API response: {decoded}")
-        data = json.loads(decoded)
-
-        result.update({
-            "IP": data.get("ip", "N/A"),
-            "Latency": format_latency(latency),
-            "Status": "Working"
-        })
-        
-        print_debug(f"HTTP proxy test successful via curl - IP: {result['IP']}, Latency: {result['Latency']}")
-
-    except subprocess.CalledProcessError as e:
-        error_msg = e.output.decode('utf-8').strip()
-        print_debug(f"Curl command failed with error: {error_msg}")
-        print_error(f"[HTTP FAIL] {proxy['raw']} → curl failed: {error_msg}")
-    except json.JSONDecodeError:
-        print_debug(f"Failed to parse JSON response: {decoded}")
-        print_error(f"[HTTP FAIL] {proxy['raw']} → Invalid JSON response")
+        result.error = str(e)
+        result.error_kind = classify_error(e)
+        print_debug(f"HTTP proxy check failed: {str(e)}")
+        if cut_off(result.error_kind):
+            result.status = DEADLINE
+        else:
+            print_error(f"[HTTP FAIL] {proxy.raw} → {_short_error(e)}")
 
     return result
 
-def test_socks_proxy(proxy: dict) -> dict:
+def test_socks_proxy(proxy: ProxyRecord) -> ProxyResult:
     """Test SOCKS proxy connectivity only (fast check)"""
-    print_debug(f"Testing SOCKS5 proxy connectivity: {proxy['raw']}")
+    print_debug(f"Testing SOCKS5 proxy connectivity: {proxy.raw}")
     print_debug(f"Using API endpoint: {IP_API_URL}")
     
-    result = {
-        "Type": "SOCKS5",
-        "IP": "N/A",
-        "Location": "N/A",
-        "Latency": "N/A",
-        "Speed": "N/A",
-        "Status": "Failed"
-    }
+    result = ProxyResult("SOCKS5")
 
-    if proxy.get('username') and proxy.get('password'):
-        socks_proxy_url = f"socks5h://{proxy['username']}:{proxy['password']}@{proxy['host']}:{proxy['port']}"
+    if proxy.username and proxy.password:
+        print_debug(f"Using SOCKS5 proxy URL: socks5h://[REDACTED]@{proxy.host}:{proxy.port}")
     else:
-        socks_proxy_url = f"socks5h://{proxy['host']}:{proxy['port']}"
-    proxies = {
-        "http": socks_proxy_url,
-        "https": socks_proxy_url
-    }
-
-    if proxy.get('username') and proxy.get('password'):
-        print_debug(f"Using SOCKS5 proxy URL: socks5h://[REDACTED]@{proxy['host']}:{proxy['port']}")
-    else:
-        print_debug(f"Using SOCKS5 proxy URL: socks5h://{proxy['host']}:{proxy['port']}")
-
+        print_debug(f"Using SOCKS5 proxy URL: socks5h://{proxy.host}:{proxy.port}")
+
+    def attempt() -> tuple:
+        connect_timeout, timeout = request_timeouts()
+        timer = PhaseTimer()
+        ip = fetch_ip_via_socks5(
+            proxy, IP_API_URL,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+            timer=timer,
+            samples=config_module.LATENCY_SAMPLES
+        )
+        return ip, timer
+
+    # In-process SOCKS5 handshake over a raw socket (no session/PySocks stack),
+    # retrying retriable errors up to MAX_RETRIES
     try:
-        start = time.time()
-        response = requests.get(IP_API_URL, proxies=proxies, timeout=10)
-        latency = time.time() - start
-
-        print_debug(f"SOCKS5 response status: {response.status_code}")
-
-        if response.status_code == 200:
-            data = response.json()
-            print_debug(f"Raw API response: {response.text}")
-
-            result.update({
-                "IP": data.get("ip", "N/A"),
-                "Latency": format_latency(latency),
-                "Status": "Working"
-            })
-
-            print_debug(f"SOCKS5 proxy test successful - IP: {result['IP']}, Latency: {result['Latency']}")
-            return result
-
+        print_debug("Attempting connection with raw SOCKS5 client...")
+        ip, timer = call_with_retries(attempt, label="[SOCKS5] ")
+        result.ip = ip
+        result.latency = timer.elapsed()
+        result.phases = timer.phases
+        result.samples = timer.samples
+        result.status = Status.WORKING
+        TRACKER.observe(timer.phases, timer.elapsed())
+        print_debug(f"SOCKS5 proxy test successful - IP: {result.ip}, Latency: {format_latency(result.latency)}")
     except Exception as e:
-        print_debug(f"SOCKS5 requests method failed: {str(e)}")
-
-    # Fallback to curl
-    curl_cmd = [
-        "curl",
-        "-x", socks_proxy_url,
-        IP_API_URL,
-        "--max-time", "20",
-        "--connect-timeout", "15",
-        "--silent",
-        "--show-error"
-    ]
-
-    print_debug("Fallback: Executing curl command for SOCKS5 proxy")
-
-    decoded = ""
-    try:
-        start = time.time()
-        output = subprocess.check_output(curl_cmd, stderr=subprocess.STDOUT)
-        latency = time.time() - start
-
-        decoded = output.decode("utf-8").strip()
-        print_debug(f"Raw API response: {decoded}")
-        data = json.loads(decoded)
-
-        result.update({
-            "IP": data.get("ip", "N/A"),
-            "Latency": format_latency(latency),
-            "Status": "Working"
-        })
-
-        print_debug(f"SOCKS5 proxy test successful via curl - IP: {result['IP']}, Latency: {result['Latency']}")
-
-    except subprocess.CalledProcessError as e:
-        error_msg = e.output.decode('utf-8').strip()
-        print_debug(f"Curl command failed with error: {error_msg}")
-        print_error(f"[SOCKS5 FAIL] {proxy['raw']} → curl failed: {error_msg}")
-    except json.JSONDecodeError:
-        print_debug(f"Failed to parse JSON response: {decoded}")
-        print_error(f"[SOCKS5 FAIL] {proxy['raw']} → Invalid JSON response")
+        result.error = str(e)
+        result.error_kind = classify_error(e)
+        print_debug(f"SOCKS5 proxy check failed: {str(e)}")
+        if cut_off(result.error_kind):
+            result.status = DEADLINE
+        else:
+            print_error(f"[SOCKS5 FAIL] {proxy.raw} → {_short_error(e)}")
 
     return result
 
-def test_fast_com_fallback(proxy: dict) -> Optional[float]:
+def _short_error(e: Exception) -> str:
+    """Condense verbose exception text (urllib3 nests whole reprs) for one-line output"""
+    message = str(e) or type(e).__name__
+    return message if len(message) <= 120 else message[:117] + "..."
+
+def test_fast_com_fallback(proxy: ProxyRecord) -> Optional[float]:
     """Test proxy speed using Fast.com (fallback method when Cloudflare fails)"""
-    print_debug(f"[FAST.COM FALLBACK] Testing proxy {proxy['raw']}")
+    print_debug(f"[FAST.COM FALLBACK] Testing proxy {proxy.raw}")
     
     try:
-        speed = test_fast_com_speed(proxy, timeout=30)
+        speed = test_fast_com_speed(proxy, timeout=30, session=SESSIONS.get(proxy))
         
         if speed and speed > 0.1:
             print_debug(f"[FALLBACK] Fast.com: {round(speed, 2)} Mbps")
@@ -211,12 +131,13 @@ def test_fast_com_fallback(proxy: dict) -> Optional[float]:
         print_debug(f"[ERROR] Fast.com fallback failed: {str(e)}")
         return None
 
-def test_cloudflare_speed(proxy: dict) -> Optional[float]:
+def test_cloudflare_speed(proxy: ProxyRecord) -> Optional[float]:
     """Test speed using Cloudflare's speed test (most accurate method)"""
-    print_debug(f"[CLOUDFLARE] Starting Cloudflare speed test for {proxy['raw']}")
+    print_debug(f"[CLOUDFLARE] Starting Cloudflare speed test for {proxy.raw}")
     
     try:
-        proxies = build_requests_proxy(proxy)
+        # Keep-alive session shared with the Fast.com fallback for this proxy
+        session = SESSIONS.get(proxy)
         
         # Fast-fail check: Download 1MB first to detect dead/slow proxies quickly
         quick_test_url = "https://speed.cloudflare.com/__down?bytes=1000000"  # 1MB
@@ -229,21 +150,22 @@ def test_cloudflare_speed(proxy: dict) -> Optional[float]:
             'Accept-Encoding': 'identity',
         }
         
-        session = requests.Session()
-        session.proxies = proxies
-        
         # Quick test - if this takes > 10 seconds, proxy is too slow
         quick_start = time.time()
         try:
             response = session.get(quick_test_url, stream=True, timeout=15, headers=headers)
-            response.raise_for_status()
-            
-            quick_downloaded = 0
-            for chunk in response.iter_content(chunk_size=524288):
-                if chunk:
-                    quick_downloaded += len(chunk)
-                if time.time() - quick_start > 10:  # 10 second timeout
-                    break
+            try:
+                response.raise_for_status()
+                
+                quick_downloaded = 0
+                for chunk in response.iter_content(chunk_size=524288):
+                    if chunk:
+                        quick_downloaded += len(chunk)
+                    if time.time() - quick_start > 10:  # 10 second timeout
+                        break
+            finally:
+                # Fully read responses go back to the pool for the full test
+                response.close()
             
             quick_duration = time.time() - quick_start
 
@@ -266,18 +188,21 @@ def test_cloudflare_speed(proxy: dict) -> Optional[float]:
         print_debug(f"[CLOUDFLARE] Full test: 100MB download for 10 seconds...")
         
         response = session.get(test_url, stream=True, timeout=30, headers=headers)
-        response.raise_for_status()
-        
-        downloaded = 0
-        start_time = time.time()
-        test_duration = 10  # 10 second test for consistency
-        
-        # Download with 512KB chunks (optimal for proxies)
-        for chunk in response.iter_content(chunk_size=524288):
-            if chunk:
-                downloaded += len(chunk)
-                if time.time() - start_time >= test_duration:
-                    break
+        try:
+            response.raise_for_status()
+            
+            downloaded = 0
+            start_time = time.time()
+            test_duration = 10  # 10 second test for consistency
+            
+            # Download with 512KB chunks (optimal for proxies)
+            for chunk in response.iter_content(chunk_size=524288):
+                if chunk:
+                    downloaded += len(chunk)
+                    if time.time() - start_time >= test_duration:
+                        break
+        finally:
+            response.close()
         
         duration = time.time() - start_time
         
@@ -296,10 +221,10 @@ def test_cloudflare_speed(proxy: dict) -> Optional[float]:
 
 # Using Cloudflare speed test for accurate results
 
-def run_speed_test(proxy: dict, result: dict) -> None:
+def run_speed_test(proxy: ProxyRecord, result: ProxyResult) -> None:
     """Run speed test using Cloudflare with Fast.com fallback."""
     try:
-        print_debug(f"Starting speed test for {proxy['raw']} (type: {proxy.get('type', 'unknown')})")
+        print_debug(f"Starting speed test for {proxy.raw} (type: {proxy.type or 'unknown'})")
 
         # Primary method: Cloudflare speed test
         print_debug("Using Cloudflare speed test (accurate method)...")
@@ -323,20 +248,101 @@ def run_speed_test(proxy: dict, result: dict) -> None:
                 speed = None
 
         if speed and speed > 0:
-            result["Speed"] = f"{round(speed, 2)} Mbps"
-            print_debug(f"Speed test completed successfully: {result['Speed']}")
+            result.speed = speed
+            print_debug(f"Speed test completed successfully: {format_speed(speed)}")
         else:
-            result["Speed"] = "Error"
+            result.speed = SPEED_FAILED
             print_debug("Speed test failed to get valid results")
 
     except Exception as e:
-        print_error(f"[SPEEDTEST FAIL] {proxy['raw']} → {e}")
-        result["Speed"] = "Error"
-
-def run_geo_lookup(proxy: dict, result: dict) -> None:
-    """Run geo-IP lookup for a working proxy"""
-    ip = result.get("IP", "")
-    if ip:
-        result["Location"] = get_location_from_ip(ip)
+        print_error(f"[SPEEDTEST FAIL] {proxy.raw} → {e}")
+        result.speed = SPEED_FAILED
+    finally:
+        # Nothing else uses this proxy's session: release its pooled connections now
+        # rather than holding a socket per working proxy until the end of the run
+        SESSIONS.close(proxy)
+
+def run_geo_lookup(proxy: ProxyRecord, result: ProxyResult) -> None:
+    """Run geo-IP lookup for a working proxy (once per exit IP, through GEO_CACHE)"""
+    if result.ip and result.ip != "N/A":
+        result.location = GEO_CACHE.location(result.ip, get_location_from_ip)
     else:
-        result["Location"] = "N/A"
\ No newline at end of file
+        result.location = "N/A"
+
+
+def run_geo_lookups(
+    items: List[Tuple[int, ProxyResult]],
+    on_result: Callable[[int, ProxyResult], None],
+    threads: int = 4,
+    executors: Optional[list] = None,
+) -> None:
+    """
+    Geo-IP lookup for many working proxies at once.
+
+    Exit IPs not in GEO_CACHE go to ip-api.com's batch endpoint,
+    config.GEO_BATCH_SIZE per request; only the IPs a batch has no answer
+    for are looked up one by one on ipwho.is. Requests are paced to each
+    service's quota by src/rate_limit.py. With --geo-db the offline
+    database answers every IP instead. on_result(idx, result) is called
+    from the calling thread as each result gets its location.
+    """
+    if config_module.GEO_DB_PATH:
+        for idx, result in items:
+            result.location = get_location_from_ip(result.ip if result.ip != "N/A" else None)
+            on_result(idx, result)
+        return
+
+    by_ip: Dict[str, List[Tuple[int, ProxyResult]]] = {}
+    for idx, result in items:
+        if result.ip and result.ip != "N/A":
+            by_ip.setdefault(result.ip, []).append((idx, result))
+        else:
+            result.location = "N/A"
+            on_result(idx, result)
+
+    def deliver(ip: str, location: str) -> None:
+        GEO_CACHE.put(ip, location)
+        for idx, result in by_ip[ip]:
+            result.location = location
+            on_result(idx, result)
+
+    pending_ips = []
+    for ip in by_ip:
+        location = GEO_CACHE.get(ip)
+        if location is None:
+            pending_ips.append(ip)
+        else:
+            deliver(ip, location)
+    if not pending_ips:
+        return
+
+    size = config_module.GEO_BATCH_SIZE
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        if executors is not None:
+            executors.append(executor)
+        try:
+            # A future's job is either a batch (list of IPs) or one fallback IP
+            jobs = {
+                executor.submit(locations_from_ip_api_batch, pending_ips[i:i + size]): pending_ips[i:i + size]
+                for i in range(0, len(pending_ips), size)
+            }
+            while jobs:
+                done, _ = wait(jobs, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = jobs.pop(future)
+                    try:
+                        answer = future.result()
+                    except Exception as e:
+                        print_debug(f"[GEO LOOKUP ERROR] {str(e)}")
+                        answer = None
+                    if isinstance(job, list):
+                        for ip in job:
+                            if answer and ip in answer:
+                                deliver(ip, answer[ip])
+                            else:
+                                jobs[executor.submit(location_from_ipwho, ip)] = ip
+                    else:
+                        deliver(job, "N/A" if answer is None else answer)
+        finally:
+            if executors is not None and executor in executors:
+                executors.remove(executor)
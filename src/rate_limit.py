@@ -0,0 +1,183 @@
+"""Request pacing for the Geo-IP services.
+
+ip-api.com allows 45 single lookups and 15 batch requests a minute per
+client IP; going faster only earns 429s. Each service gets a token bucket
+refilled at config.GEO_RATE_LIMITS requests per minute, holding at most
+config.GEO_RATE_BURST tokens, and every geo request takes a token first,
+so the geo threads together never outrun the quota.
+
+A 429 (or ip-api's own "X-Rl: 0" quota header) pauses the whole bucket for
+Retry-After / X-Ttl seconds and the request is retried, up to
+config.GEO_RATE_RETRIES times. A service that would keep us waiting longer
+than config.GEO_MAX_WAIT is skipped instead, and single lookups go to
+whichever service frees up first (quickest()).
+
+Bucket state lives in a few floats. run_sharded() moves it into shared
+memory with share() and the --workers processes attach() to it, so every
+process draws from the same buckets. Times are time.time() values, like
+config.SCAN_DEADLINE, so they mean the same in every process; a wait that
+would end past the scan deadline is not made.
+"""
+import email.utils
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional
+
+import requests
+
+import src.config as config_module
+from src.budget import remaining
+from src.ui import print_debug
+
+IP_API, IP_API_BATCH, IPWHO = "ip-api", "ip-api-batch", "ipwho"
+
+# Slots of a bucket's state
+_TOKENS, _UPDATED, _PAUSED_UNTIL = range(3)
+
+
+class TokenBucket:
+    """Token bucket for one service; thread-safe, and process-safe once shared."""
+
+    def __init__(self, name: str):
+        self.name = name
+        # NaN tokens: never used yet, starts full
+        self._state = [float("nan"), 0.0, 0.0]
+        self._lock = threading.Lock()
+
+    def _rate(self) -> float:
+        # Requests per second; 0 means unlimited
+        return config_module.GEO_RATE_LIMITS.get(self.name, 0) / 60.0
+
+    def _wait(self, take: bool) -> float:
+        # Seconds until a token is free, taking it if that is now and take is set
+        rate = self._rate()
+        with self._lock:
+            now = time.time()
+            paused = self._state[_PAUSED_UNTIL] - now
+            if paused > 0:
+                return paused
+            if not rate:
+                return 0.0
+            burst = max(1, config_module.GEO_RATE_BURST)
+            tokens = self._state[_TOKENS]
+            if tokens != tokens:
+                tokens = burst
+            else:
+                tokens = min(burst, tokens + (now - self._state[_UPDATED]) * rate)
+            if tokens >= 1 and take:
+                tokens -= 1
+                delay = 0.0
+            else:
+                delay = max(0.0, (1 - tokens) / rate)
+            self._state[_TOKENS] = tokens
+            self._state[_UPDATED] = now
+            return delay
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is now)."""
+        return self._wait(take=False)
+
+    def acquire(self) -> bool:
+        """
+        Block until a token is taken. False, without waiting, if the wait
+        would be longer than config.GEO_MAX_WAIT or outlast the scan budget.
+        """
+        while True:
+            delay = self._wait(take=True)
+            if delay <= 0:
+                return True
+            left = remaining()
+            if delay > config_module.GEO_MAX_WAIT or (left is not None and delay >= left):
+                return False
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request to this service for the next `seconds`."""
+        with self._lock:
+            self._state[_PAUSED_UNTIL] = max(self._state[_PAUSED_UNTIL], time.time() + seconds)
+
+
+class GeoRateLimits:
+    """The token buckets of all geo services."""
+
+    def __init__(self):
+        self._buckets = {name: TokenBucket(name) for name in (IP_API, IP_API_BATCH, IPWHO)}
+        self._shared: Optional[dict] = None
+
+    def __getitem__(self, name: str) -> TokenBucket:
+        return self._buckets[name]
+
+    def share(self, ctx) -> dict:
+        """
+        Move the buckets into shared memory of multiprocessing context ctx;
+        returns the picklable state to attach() in worker processes.
+        """
+        if self._shared is None:
+            shared = {}
+            for name, bucket in self._buckets.items():
+                with bucket._lock:
+                    state = ctx.Array("d", bucket._state)
+                    bucket._state = state
+                shared[name] = state
+            for name, state in shared.items():
+                self._buckets[name]._lock = state.get_lock()
+            self._shared = shared
+        return self._shared
+
+    def attach(self, shared: Mapping[str, object]) -> None:
+        """Use buckets another process share()d."""
+        for name, state in shared.items():
+            bucket = self._buckets[name]
+            bucket._state = state
+            bucket._lock = state.get_lock()
+        self._shared = dict(shared)
+
+
+# Buckets used by every geo request of this process
+GEO_LIMITS = GeoRateLimits()
+
+
+def retry_after(resp: requests.Response) -> float:
+    """Seconds a 429 response asks us to wait (Retry-After, ip-api's X-Ttl, or the default)."""
+    for header in ("Retry-After", "X-Ttl"):
+        value = resp.headers.get(header)
+        if not value:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return config_module.GEO_RETRY_AFTER
+
+
+def paced_request(service: str, send: Callable[[], requests.Response]) -> Optional[requests.Response]:
+    """
+    send() once a token of `service` is free, retried after 429s.
+
+    Returns the last response (possibly still a 429 once the retries are
+    used up), or None if no token could be had (see TokenBucket.acquire).
+    """
+    bucket = GEO_LIMITS[service]
+    resp = None
+    for attempt in range(config_module.GEO_RATE_RETRIES + 1):
+        if not bucket.acquire():
+            return resp
+        resp = send()
+        if resp.status_code != 429:
+            if resp.headers.get("X-Rl") == "0":
+                # Quota used up for this window: wait for it to reset
+                bucket.pause(retry_after(resp))
+            return resp
+        delay = retry_after(resp)
+        print_debug(f"[GEO] {service} rate limited (attempt {attempt + 1}), retrying in {delay:.1f}s")
+        bucket.pause(delay)
+    return resp
+
+
+def quickest(services: Dict[str, Callable[[str], Optional[str]]]) -> list:
+    """The lookup functions of `services` (name → lookup), soonest available bucket first."""
+    return [lookup for name, lookup in sorted(services.items(), key=lambda item: GEO_LIMITS[item[0]].wait_time())]
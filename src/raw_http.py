@@ -0,0 +1,313 @@
+"""Minimal HTTP/1.1 helpers for socket-level proxy checks.
+
+Only what is needed to fetch the small JSON document returned by the IP echo
+endpoint: build a GET request, then read back the status line, headers and a
+Content-Length, chunked or read-until-close body.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import socket
+import ssl
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.budget import expired
+from src.config import USER_AGENT
+from src.records import ProxyRecord
+from src.retry import EndpointStatusError, ProxyUnreachable
+from src.timing import PhaseTimer
+
+# Upper bound for bodies read until the connection closes
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def split_url(url: str) -> Tuple[str, str, int, str]:
+    """Split a URL into (scheme, host, port, path-with-query)."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower() or "http"
+    host = parts.hostname or ""
+    port = parts.port or (443 if scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return scheme, host, port, path
+
+
+def basic_auth(username: str, password: str) -> str:
+    """Return the value of a Basic (Proxy-)Authorization header."""
+    token = base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii")
+    return f"Basic {token}"
+
+
+def build_get_request(
+    url: str,
+    proxy_auth: Optional[Tuple[str, str]] = None,
+    absolute_form: bool = False,
+    keep_alive: bool = False,
+) -> bytes:
+    """
+    Build a raw GET request for url.
+
+    absolute_form=True puts the full URL in the request line, which is what an
+    HTTP proxy expects. Otherwise the origin form (path only) is used, as when
+    talking through a SOCKS tunnel.
+    """
+    _, host, port, path = split_url(url)
+    target = url if absolute_form else path
+    host_header = host if port in (80, 443) else f"{host}:{port}"
+
+    lines = [
+        f"GET {target} HTTP/1.1",
+        f"Host: {host_header}",
+        f"User-Agent: {USER_AGENT}",
+        "Accept: */*",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if proxy_auth and proxy_auth[0] and proxy_auth[1]:
+        lines.append(f"Proxy-Authorization: {basic_auth(*proxy_auth)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+
+def parse_head(head: bytes) -> Tuple[int, Dict[str, str]]:
+    """Parse a status line plus headers into (status_code, lowercased headers)."""
+    text = head.decode("iso-8859-1")
+    lines = text.split("\r\n")
+    status_parts = lines[0].split(" ", 2)
+    if len(status_parts) < 2 or not status_parts[0].startswith("HTTP/"):
+        raise ValueError(f"Malformed HTTP status line: {lines[0][:80]!r}")
+    try:
+        status = int(status_parts[1])
+    except ValueError:
+        raise ValueError(f"Malformed HTTP status code: {status_parts[1]!r}")
+
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def read_response(reader, on_head: Optional[Callable[[], None]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Read one HTTP response from an asyncio StreamReader.
+
+    on_head, if given, is called as soon as the status line and headers have
+    arrived (used to time the wait for the first response bytes).
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    if on_head:
+        on_head()
+    status, headers = parse_head(head)
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # Skip optional trailers up to the terminating blank line
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                break
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+        return status, headers, bytes(body)
+
+    if "content-length" in headers:
+        return status, headers, await reader.readexactly(int(headers["content-length"]))
+
+    body = bytearray()
+    while len(body) < MAX_BODY_BYTES:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        body += chunk
+    return status, headers, bytes(body)
+
+
+def read_response_sync(rfile, on_head: Optional[Callable[[], None]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """Read one HTTP response from a buffered socket file (sock.makefile('rb'))."""
+
+    def readline() -> bytes:
+        line = rfile.readline(65537)
+        if not line:
+            raise ConnectionError("Connection closed before response was complete")
+        return line
+
+    def readexactly(size: int) -> bytes:
+        data = rfile.read(size)
+        if len(data) != size:
+            raise ConnectionError("Connection closed before response was complete")
+        return data
+
+    head = bytearray()
+    while True:
+        line = readline()
+        head += line
+        if line in (b"\r\n", b"\n"):
+            break
+    if on_head:
+        on_head()
+    status, headers = parse_head(bytes(head))
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int(readline().split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                while readline() not in (b"\r\n", b"\n"):
+                    pass
+                break
+            body += readexactly(size)
+            readexactly(2)
+        return status, headers, bytes(body)
+
+    if "content-length" in headers:
+        return status, headers, readexactly(int(headers["content-length"]))
+
+    return status, headers, rfile.read(MAX_BODY_BYTES)
+
+
+# --------------------------------------------------------------------------
+# Blocking HTTP-proxy client with per-phase timing
+# --------------------------------------------------------------------------
+
+def open_timed_connection(host: str, port: int, timeout: float, connect_timeout: float,
+                          timer: PhaseTimer) -> socket.socket:
+    """
+    Resolve and connect to host:port, charging the time to the "dns" and
+    "connect" phases. Raises ProxyUnreachable if no address accepts.
+    """
+    try:
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    except OSError as e:
+        raise ProxyUnreachable(f"Cannot resolve proxy host {host}: {e}") from e
+    timer.mark("dns")
+
+    last_error: Optional[OSError] = None
+    for family, socktype, proto, _, address in addresses:
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(connect_timeout)
+        try:
+            sock.connect(address)
+        except OSError as e:
+            sock.close()
+            last_error = e
+            continue
+        timer.mark("connect")
+        sock.settimeout(timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+    raise ProxyUnreachable(f"Cannot connect to proxy: {last_error}") from last_error
+
+
+def wrap_tls(sock: socket.socket, host: str, timer: PhaseTimer) -> socket.socket:
+    """TLS-wrap a tunnelled socket, charging the handshake to the "tls" phase."""
+    wrapped = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+    timer.mark("tls")
+    return wrapped
+
+
+def exchange(sock: socket.socket, request: bytes, timer: PhaseTimer) -> Tuple[int, bytes]:
+    """Send request and read the response; time to the response head is "ttfb"."""
+    sent = time.monotonic()
+    sock.sendall(request)
+    with sock.makefile("rb") as rfile:
+        status, _, body = read_response_sync(rfile, on_head=lambda: timer.mark("ttfb"))
+    timer.skip()
+    timer.samples.append(time.monotonic() - sent)
+    return status, body
+
+
+def probe(sock: socket.socket, request: bytes, samples: int, timer: PhaseTimer) -> Tuple[int, bytes]:
+    """exchange(), then samples - 1 repeat probes if the first response was a 200."""
+    status, body = exchange(sock, request, timer)
+    if samples > 1 and status == 200:
+        timer.stop()
+        repeat_probes(sock, request, samples - 1, timer)
+    return status, body
+
+
+def repeat_probes(sock: socket.socket, request: bytes, count: int, timer: PhaseTimer) -> None:
+    """
+    Send request `count` more times on the kept-alive connection, adding each
+    round trip to timer.samples.
+
+    The check already succeeded, so a proxy that closes the connection, times
+    out or answers with an error just ends the series early.
+    """
+    try:
+        with sock.makefile("rb") as rfile:
+            for _ in range(count):
+                if expired():
+                    return
+                sent = time.monotonic()
+                sock.sendall(request)
+                status, headers, _ = read_response_sync(rfile)
+                if status != 200:
+                    return
+                timer.samples.append(time.monotonic() - sent)
+                if headers.get("connection", "").lower() == "close":
+                    return
+    except (OSError, ValueError):
+        pass
+
+
+def parse_echo_ip(status: int, body: bytes) -> str:
+    """Extract the exit IP from the echo endpoint's JSON response."""
+    if status != 200:
+        raise EndpointStatusError(status)
+    data = json.loads(body.decode("utf-8"))
+    if not isinstance(data, dict):
+        # e.g. a captive portal answering 200 with some other JSON
+        raise ValueError(f"Endpoint response is not a JSON object: {body[:40]!r}")
+    return data.get("ip", "N/A")
+
+
+def fetch_via_http_proxy(proxy: ProxyRecord, url: str, timeout: float, connect_timeout: float,
+                         timer: PhaseTimer, samples: int = 1) -> Tuple[int, bytes]:
+    """
+    GET url through an HTTP proxy; returns (status_code, body).
+
+    http:// URLs are sent in absolute form straight to the proxy, so there is
+    no separate handshake phase. https:// URLs open a CONNECT tunnel first
+    (the "handshake" phase) and then negotiate TLS with the origin.
+
+    With samples > 1 the connection is kept alive and the request repeated
+    after a successful response (see repeat_probes).
+    """
+    scheme, host, port, _ = split_url(url)
+    auth = (proxy.username, proxy.password)
+    # .address is set when the host scheduler already resolved the proxy host
+    sock = open_timed_connection(proxy.address or proxy.host, proxy.port,
+                                 timeout, connect_timeout, timer)
+    try:
+        if scheme != "https":
+            request = build_get_request(url, proxy_auth=auth, absolute_form=True, keep_alive=samples > 1)
+            return probe(sock, request, samples, timer)
+
+        connect = [f"CONNECT {host}:{port} HTTP/1.1", f"Host: {host}:{port}"]
+        if auth[0] and auth[1]:
+            connect.append(f"Proxy-Authorization: {basic_auth(*auth)}")
+        sock.sendall(("\r\n".join(connect) + "\r\n\r\n").encode("utf-8"))
+        head = bytearray()
+        while not head.endswith(b"\r\n\r\n"):
+            chunk = sock.recv(1)
+            if not chunk:
+                raise ConnectionError("Proxy closed the connection during CONNECT")
+            head += chunk
+        status, _ = parse_head(bytes(head))
+        if status != 200:
+            raise EndpointStatusError(status)
+        timer.mark("handshake")
+
+        sock = wrap_tls(sock, host, timer)
+        return probe(sock, build_get_request(url, keep_alive=samples > 1), samples, timer)
+    finally:
+        sock.close()
@@ -0,0 +1,241 @@
+"""Compact, typed records for parsed proxies and check results.
+
+Proxy lists can run to millions of entries, and a plain dict per proxy and
+per result costs several hundred bytes each before counting the display
+strings ("256ms", "7.02 Mbps") stored in them. These records use __slots__
+and keep measurements numeric (latency in seconds, speed in Mbps) with an
+enum status; turning them into text happens only at the UI/export edge.
+
+Both records still behave like the dicts they replace: record["IP"],
+record.get("Error"), "ErrorKind" in record, record["Status"] = ... all work,
+so the UI/export helpers and older test scripts keep working. Fields that
+are None read as missing keys, and every key reads the typed value
+("Latency" is seconds, like .latency; "port" is an int). Core code uses the
+attributes; display and export code turns a result into text with
+display_row().
+"""
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class Status(str, Enum):
+    """Outcome of a check; compares equal to its display string."""
+
+    WORKING = "Working"
+    FAILED = "Failed"
+    TIMEOUT = "Timeout"
+    DEADLINE = "Deadline"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+# ProxyResult.speed after a speed test that produced no usable measurement
+SPEED_FAILED = 0.0
+
+
+def format_latency(seconds: Optional[float]) -> str:
+    """0.256 -> '256ms' (None -> 'N/A')."""
+    if seconds is None:
+        return "N/A"
+    return f"{int(seconds * 1000)}ms"
+
+
+def format_speed(mbps: Optional[float]) -> str:
+    """7.0213 -> '7.02 Mbps', SPEED_FAILED -> 'Error', None (not tested) -> 'N/A'."""
+    if mbps is None:
+        return "N/A"
+    if mbps <= SPEED_FAILED:
+        return "Error"
+    return f"{round(mbps, 2)} Mbps"
+
+
+def result_type(proxy_type: Optional[str]) -> str:
+    """Display type for a proxy_type flag ('socks'/'socks5' or 'http')."""
+    return "SOCKS5" if proxy_type in ("socks", "socks5") else "HTTP"
+
+
+def as_dict(record: Any) -> Dict[str, Any]:
+    """JSON-ready form of a record (plain dicts pass through unchanged)."""
+    return record.to_dict() if isinstance(record, _Record) else dict(record)
+
+
+class _Record:
+    """dict-style access over __slots__, through a key → attribute map."""
+
+    __slots__ = ()
+    _KEYS: Dict[str, str] = {}
+
+    def _attribute(self, key: str) -> str:
+        try:
+            return self._KEYS[key]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, self._attribute(key))
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        setattr(self, self._attribute(key), value)
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]
+            return True
+        except (KeyError, TypeError):
+            return False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, default)
+        if key in self._KEYS:
+            setattr(self, self._KEYS[key], None)
+        return value
+
+    def keys(self) -> List[str]:
+        return [key for key in self._KEYS if key in self]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def update(self, other: Any = None, **fields: Any) -> None:
+        """Copy fields from another record of this type, or keys from a mapping."""
+        if isinstance(other, type(self)):
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+        elif other:
+            for key, value in dict(other).items():
+                self[key] = value
+        for key, value in fields.items():
+            self[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Typed fields by attribute name (JSON-serialisable), Nones omitted."""
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Inverse of to_dict(); also accepts the dict-style keys."""
+        record = cls()
+        for key, value in data.items():
+            if key in cls._KEYS:
+                record[key] = value
+            elif key in cls.__slots__:
+                setattr(record, key, value)
+        return record
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, type(self)):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+
+class ProxyRecord(_Record):
+    """One parsed proxy line (see utils.parse_proxy_line)."""
+
+    __slots__ = ("host", "port", "username", "password", "raw", "type",
+                 "address", "speed_test", "geo_lookup", "index")
+    _KEYS = {name: name for name in __slots__}
+
+    def __init__(self, host: str = "", port: int = 0, username: str = "", password: str = "",
+                 raw: str = "", type: Optional[str] = None):
+        self.host = host
+        self.port = int(port)  # parsed once here, not on every connect
+        self.username = username
+        self.password = password
+        self.raw = raw
+        self.type = type
+        self.address: Optional[str] = None  # resolved by the host scheduler
+        self.speed_test: Optional[bool] = None
+        self.geo_lookup: Optional[bool] = None
+        self.index: Optional[int] = None  # position among the parsed proxies of the input
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "port" and value is not None:
+            value = int(value)
+        super().__setitem__(key, value)
+
+
+class ProxyResult(_Record):
+    """Outcome of checking one proxy, filled in phase by phase."""
+
+    __slots__ = ("type", "ip", "location", "latency", "speed", "status", "error", "error_kind",
+                 "phases", "samples", "sample_stats")
+    _KEYS = {
+        "Type": "type",
+        "IP": "ip",
+        "Location": "location",
+        "Latency": "latency",
+        "Speed": "speed",
+        "Status": "status",
+        "Error": "error",
+        "ErrorKind": "error_kind",
+        "Phases": "phases",
+        "Samples": "samples",
+        "SampleStats": "sample_stats",
+    }
+
+    def __init__(self, type: str = "HTTP", status: Status = Status.FAILED, error: Optional[str] = None,
+                 error_kind: Optional[str] = None):
+        self.type = type
+        self.ip = "N/A"
+        self.location = "N/A"
+        self.latency: Optional[float] = None  # seconds
+        self.speed: Optional[float] = None  # Mbps; None until tested, SPEED_FAILED if it failed
+        self.status = status
+        self.error = error
+        self.error_kind = error_kind
+        self.phases: Optional[Dict[str, Optional[float]]] = None
+        self.samples: Optional[List[float]] = None
+        self.sample_stats: Optional[Dict[str, float]] = None
+
+    @property
+    def working(self) -> bool:
+        return self.status == Status.WORKING
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in ("Latency", "Speed") and isinstance(value, str):
+            raise TypeError(f"{key} is numeric: set .{self._KEYS[key]} instead of a display string")
+        if key == "Status" and value is not None:
+            value = Status(value)
+        super().__setitem__(key, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProxyResult":
+        data = dict(data)
+        # Display strings in dict-style input carry no number
+        for key in ("Latency", "Speed"):
+            if isinstance(data.get(key), str):
+                del data[key]
+        if isinstance(data.get("status"), str):
+            data["status"] = Status(data["status"])
+        return super().from_dict(data)
+
+
+def display_row(row: Any) -> Dict[str, Any]:
+    """
+    The dict-style fields of a result for the UI and exports, with Latency
+    and Speed as display strings (plain result dicts are copied as they are).
+    """
+    fields = dict(row.items())
+    if isinstance(row, ProxyResult):
+        fields["Latency"] = format_latency(row.latency)
+        fields["Speed"] = format_speed(row.speed)
+    return fields
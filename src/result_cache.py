@@ -0,0 +1,120 @@
+"""Persistent result cache (--cache FILE, --max-age SECONDS).
+
+The same pools get re-tested many times a day. With --cache, every phase a
+proxy completes (connectivity, geo, speed) is stored in a local SQLite
+database together with the time it completed, keyed by the proxy's
+normalized identity (utils.proxy_key: host, port and credentials) and the
+proxy type. The next scan looks its proxies up first: a connectivity result
+younger than --max-age is reused as is, and so are geo and speed results
+that are still fresh; only stale or unknown proxies (and phases) are tested
+again.
+
+Credentials are only stored hashed, as part of the key. Rows are written by
+the main thread (the one driving the result callbacks) and committed every
+config.RESULT_CACHE_COMMIT_INTERVAL seconds and on close.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from typing import List, Optional
+
+import src.config as config_module
+from src.checkpoint import Progress
+from src.records import ProxyRecord, ProxyResult, as_dict
+from src.sharding import CHECK, GEO, SPEED
+from src.utils import proxy_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    proxy TEXT NOT NULL,
+    result TEXT NOT NULL,
+    checked REAL NOT NULL,
+    geo REAL,
+    speed REAL
+)
+"""
+
+# Timestamp column of each phase
+_COLUMNS = {CHECK: "checked", GEO: "geo", SPEED: "speed"}
+
+# Keys per SELECT ... IN (...) (SQLite allows 999 parameters by default)
+_LOOKUP_CHUNK = 500
+
+
+def cache_key(proxy: ProxyRecord, proxy_type: Optional[str]) -> str:
+    """Hash of the proxy's normalized identity and type."""
+    identity = "\0".join(str(part) for part in proxy_key(proxy) + (proxy_type or "",))
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Last result and per-phase completion times of every proxy seen."""
+
+    def __init__(self, path: str, proxy_type: Optional[str]):
+        self.path = path
+        self.proxy_type = proxy_type
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+        self._committed = time.monotonic()
+
+    def lookup(self, proxies: List[ProxyRecord], max_age: float) -> Progress:
+        """
+        Fresh results for proxies, by proxy index: the phases completed less
+        than max_age seconds ago and the result they left.
+
+        Counts a hit for every proxy with a fresh connectivity result and a
+        miss for every other one.
+        """
+        cutoff = time.time() - max_age
+        keys = {cache_key(proxy, self.proxy_type): proxy.index for proxy in proxies}
+        progress: Progress = {}
+        if max_age > 0:
+            pending = list(keys)
+            for start in range(0, len(pending), _LOOKUP_CHUNK):
+                chunk = pending[start:start + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT key, result, checked, geo, speed FROM results "
+                    f"WHERE checked >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    [cutoff] + chunk
+                )
+                for key, result, *times in rows:
+                    phases = frozenset(
+                        phase for phase, at in zip((CHECK, GEO, SPEED), times) if at is not None and at >= cutoff
+                    )
+                    progress[keys[key]] = (phases, ProxyResult.from_dict(json.loads(result)))
+        self.hits += len(progress)
+        self.misses += len(keys) - len(progress)
+        return progress
+
+    def store(self, phase: str, proxy: ProxyRecord, result: ProxyResult) -> None:
+        """Record a completed phase; a new connectivity result replaces the proxy's row."""
+        data = json.dumps(as_dict(result), separators=(",", ":"))
+        key = cache_key(proxy, self.proxy_type)
+        now = time.time()
+        if phase == CHECK:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, proxy, result, checked) VALUES (?, ?, ?, ?)",
+                (key, f"{proxy.host.lower()}:{proxy.port}", data, now)
+            )
+        else:
+            self._db.execute(
+                f"UPDATE results SET result = ?, {_COLUMNS[phase]} = ? WHERE key = ?", (data, now, key)
+            )
+        if time.monotonic() - self._committed >= config_module.RESULT_CACHE_COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self) -> None:
+        self._db.commit()
+        self._committed = time.monotonic()
+
+    def close(self) -> None:
+        """Commit what is left and close the database."""
+        self.commit()
+        self._db.close()
@@ -0,0 +1,114 @@
+"""In-process retry policy for connectivity checks.
+
+Replaces the old per-proxy curl fallback. A proxy that cannot even be
+reached (refused, unresolvable, SYN timeout) or that rejects our
+credentials fails on the first attempt; only errors that happen after the
+proxy accepted the connection are retried, up to config.MAX_RETRIES times.
+"""
+import asyncio
+import errno
+import socket
+import time
+from typing import Callable, Optional, TypeVar
+
+import requests
+
+import src.config as config_module
+from src.budget import DeadlineExceeded, remaining
+from src.ui import print_debug
+
+T = TypeVar("T")
+
+
+class ProxyUnreachable(ConnectionError):
+    """The TCP connection to the proxy itself could not be established."""
+
+
+class EndpointStatusError(ConnectionError):
+    """The echo endpoint (or the proxy in front of it) answered with a non-200 status."""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status} from endpoint")
+        self.status = status
+
+
+def is_retriable(exc: BaseException) -> bool:
+    """Return True if another attempt could plausibly succeed."""
+    if isinstance(exc, EndpointStatusError):
+        return exc.status == 429 or exc.status >= 500
+    if isinstance(exc, DeadlineExceeded):
+        return False
+    if isinstance(exc, (ProxyUnreachable, socket.gaierror, ConnectionRefusedError)):
+        return False
+    if isinstance(exc, (requests.exceptions.ConnectTimeout, requests.exceptions.ProxyError,
+                        requests.exceptions.InvalidURL, requests.exceptions.InvalidSchema)):
+        return False
+    # Imported lazily so the retry policy does not depend on the SOCKS client
+    from src.socks5_client import SOCKS5Error
+    if isinstance(exc, SOCKS5Error):
+        # Auth/ruleset rejections are final; a general failure may be transient
+        return "general SOCKS server failure" in str(exc)
+    return isinstance(exc, (OSError, EOFError, ValueError, requests.exceptions.RequestException))
+
+
+# Errors caused by this machine running out of sockets/buffers rather than by the proxy
+LOCAL_ERRNOS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM, errno.EADDRNOTAVAIL}
+
+
+def classify_error(exc: BaseException) -> str:
+    """
+    Bucket a check failure for the concurrency controller and reports.
+
+    Returns one of: "local" (fd/port/buffer exhaustion here), "reset",
+    "rate_limited", "timeout", "unreachable" or "other".
+    """
+    for err in (exc, exc.__cause__):
+        if isinstance(err, OSError) and err.errno in LOCAL_ERRNOS:
+            return "local"
+    if isinstance(exc, EndpointStatusError):
+        return "rate_limited" if exc.status == 429 else "other"
+    for err in (exc, exc.__cause__):
+        if isinstance(err, (ConnectionResetError, BrokenPipeError)):
+            return "reset"
+        if isinstance(err, (socket.timeout, TimeoutError, asyncio.TimeoutError,
+                            requests.exceptions.Timeout)):
+            return "timeout"
+    if isinstance(exc, ProxyUnreachable):
+        return "unreachable"
+    return "other"
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff before retry number `attempt` (1-based)."""
+    return config_module.RETRY_BACKOFF * (2 ** (attempt - 1))
+
+
+def call_with_retries(func: Callable[[], T], label: str = "", retries: Optional[int] = None) -> T:
+    """
+    Call func until it succeeds, retrying retriable errors.
+
+    Args:
+        func: Zero-argument callable performing one attempt
+        label: Prefix for debug messages
+        retries: Extra attempts allowed (defaults to config.MAX_RETRIES)
+
+    Raises:
+        The last exception once attempts are exhausted or the error is final.
+    """
+    if retries is None:
+        retries = config_module.MAX_RETRIES
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            attempt += 1
+            if attempt > retries or not is_retriable(e):
+                raise
+            delay = backoff_delay(attempt)
+            left = remaining()
+            if left is not None and delay >= left:
+                # No point sleeping into the end of the scan budget
+                raise
+            print_debug(f"{label}attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
@@ -0,0 +1,100 @@
+"""Keep-alive requests sessions for the speed test and geo lookups.
+
+The speed test and geo lookups used to open fresh connections: bare
+requests.get calls for the Fast.com test and geo lookups, and a new Session
+for each Cloudflare test. The registry hands out one keep-alive Session per
+proxy, shared by the Cloudflare test and its Fast.com fallback, plus one
+direct session for the geo lookups (which do not go through a proxy), so
+repeated requests reuse the TCP connection, proxy handshake and TLS session.
+The connectivity check does not use it: it speaks HTTP/SOCKS5 over raw
+sockets (src/raw_http.py, src/socks5_client.py).
+
+run_speed_test() close()s a proxy's session once its test is done, so open
+connections do not grow with the number of working proxies. The direct
+session is used by every geo thread at once, so its pool holds one
+connection per thread; it lives until close_all() at the end of the run.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import GEO_MAX_THREADS, SESSION_POOL_SIZE
+from src.records import ProxyRecord
+from src.speedtest_helper import build_requests_proxy
+
+SessionKey = Tuple[str, str, str, str, str]
+
+# Key for the session used by requests that bypass the proxies
+DIRECT = ("direct", "", "", "", "")
+
+
+def session_key(proxy: Optional[ProxyRecord]) -> SessionKey:
+    """Identity of a proxy endpoint + credentials (DIRECT for no proxy)."""
+    if not proxy:
+        return DIRECT
+    return (
+        proxy.type or "http",
+        proxy.host.lower(),
+        str(proxy.port),
+        proxy.username or "",
+        proxy.password or "",
+    )
+
+
+class SessionRegistry:
+    """Thread-safe map of proxy identity → keep-alive requests.Session."""
+
+    def __init__(self, pool_size: int = SESSION_POOL_SIZE, direct_pool_size: int = GEO_MAX_THREADS):
+        self.pool_size = pool_size
+        self.direct_pool_size = direct_pool_size
+        self._sessions: Dict[SessionKey, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def get(self, proxy: Optional[ProxyRecord] = None) -> requests.Session:
+        """Return the session for proxy, creating it on first use."""
+        key = session_key(proxy)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._new_session(proxy)
+            return session
+
+    def _new_session(self, proxy: Optional[ProxyRecord]) -> requests.Session:
+        session = requests.Session()
+        size = self.pool_size if proxy else self.direct_pool_size
+        adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if proxy:
+            session.proxies = build_requests_proxy(proxy)
+            # Ignore HTTP(S)_PROXY from the environment for proxied sessions
+            session.trust_env = False
+        return session
+
+    def close(self, proxy: Optional[ProxyRecord] = None) -> None:
+        """Close and forget the session for one proxy."""
+        with self._lock:
+            session = self._sessions.pop(session_key(proxy), None)
+        if session is not None:
+            session.close()
+
+    def close_all(self) -> None:
+        """Close every session (and its pooled connections)."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+# Process-wide registry used by the speed test and geo lookup phases
+SESSIONS = SessionRegistry()
@@ -0,0 +1,242 @@
+"""Multi-process sharding (--workers N).
+
+A single process tops out on the GIL: JSON parsing, TLS and the rich UI all
+compete for one interpreter. In --workers mode the parsed proxy list is split
+into N shards, each checked by its own process running the usual concurrent
+engine (threads or asyncio). Workers do not drive any UI; they stream
+(index, result) messages back over a queue and the parent merges them into
+the original order, prints the rows and drives the single progress bar.
+
+The geo and speed phases are sharded the same way. Speed tests still run one
+at a time within a worker, so at most N downloads share the link at once.
+"""
+import multiprocessing
+import queue as queue_module
+import signal
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import src.config as config_module
+from src.dns_cache import install as install_dns_cache
+from src.rate_limit import GEO_LIMITS
+from src.records import SPEED_FAILED, ProxyRecord, ProxyResult
+from src.ui import print_debug
+
+CHECK, GEO, SPEED = "check", "geo", "speed"
+
+# Runtime settings main() may override; copied into every worker process
+SHARED_SETTINGS = ("VERBOSE_MODE", "MAX_RETRIES", "REQUEST_TIMEOUT", "CONNECT_TIMEOUT", "RETRY_BACKOFF",
+                   "SCAN_DEADLINE", "PER_HOST_LIMIT", "LATENCY_SAMPLES", "GEO_DB_PATH", "GEO_RATE_LIMITS",
+                   "GEO_RATE_BURST")
+
+# Seconds between liveness checks of the worker processes
+POLL_INTERVAL = 0.5
+
+# (original index, proxy, result or None for the connectivity check)
+WorkItem = Tuple[int, ProxyRecord, Optional[ProxyResult]]
+
+
+def shard_indices(count: int, workers: int) -> List[List[int]]:
+    """
+    Split range(count) into at most `workers` interleaved shards.
+
+    Interleaving (0, N, 2N, ...) rather than contiguous blocks spreads runs of
+    proxies from the same provider across workers.
+    """
+    workers = max(1, min(workers, count))
+    return [list(range(w, count, workers)) for w in range(workers)] if count else []
+
+
+def config_snapshot() -> Dict[str, Any]:
+    return {name: getattr(config_module, name) for name in SHARED_SETTINGS}
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+
+def _check_shard(items: List[WorkItem], user_config: Dict[str, Any], workers: int,
+                 emit: Callable[[int, ProxyResult], None]) -> dict:
+    from src.async_tester import run_async_checks
+    from src.concurrency import AdaptiveLimiter
+    from src.threaded_tester import default_limiter, run_threaded_checks
+
+    proxies = [proxy for _, proxy, _ in items]
+    if config_module.PER_HOST_LIMIT:
+        # The per-host cap is for the whole scan, not per process
+        config_module.PER_HOST_LIMIT = max(1, config_module.PER_HOST_LIMIT // workers)
+
+    def on_result(i: int, result: ProxyResult) -> None:
+        emit(items[i][0], result)
+
+    if user_config.get("use_async"):
+        # --concurrency is the total across all workers
+        total = user_config.get("concurrency", config_module.ASYNC_CONCURRENCY)
+        concurrency = min(max(1, total // workers), len(proxies))
+        limiter = AdaptiveLimiter(
+            initial=min(config_module.ADAPTIVE_ASYNC_START, concurrency),
+            maximum=concurrency
+        )
+        run_async_checks(proxies, user_config["type"], concurrency=concurrency,
+                         on_result=on_result, limiter=limiter)
+    else:
+        limiter = default_limiter(len(proxies))
+        run_threaded_checks(proxies, user_config["type"], limiter=limiter, on_result=on_result)
+    return limiter.summary()
+
+
+def _geo_shard(items: List[WorkItem], emit: Callable[[int, ProxyResult], None]) -> None:
+    from src.proxy_tester import run_geo_lookups
+    from src.threaded_tester import calculate_optimal_threads
+
+    threads = calculate_optimal_threads(len(items), base_threads=8, max_threads=config_module.GEO_MAX_THREADS)
+    run_geo_lookups([(idx, result) for idx, _, result in items], emit, threads=threads)
+
+
+def _speed_shard(items: List[WorkItem], emit: Callable[[int, ProxyResult], None]) -> None:
+    from src.budget import expired
+    from src.proxy_tester import run_speed_test
+
+    for n, (idx, proxy, result) in enumerate(items):
+        if expired():
+            # Out of scan budget: the parent counts unreported items as skipped
+            return
+        try:
+            run_speed_test(proxy, result)
+        except Exception as e:
+            result.speed = SPEED_FAILED
+            print_debug(f"[SPEEDTEST ERROR] {str(e)}")
+        emit(idx, result)
+        # Same pause as the single-process loop to avoid CDN rate limiting
+        if n < len(items) - 1:
+            time.sleep(0.5)
+
+
+def _worker_main(shard: int, phase: str, items: List[WorkItem], user_config: Dict[str, Any],
+                 workers: int, settings: Dict[str, Any], geo_limits: Dict[str, Any], out_queue) -> None:
+    """Entry point of a worker process."""
+    # Ctrl+C is handled by the parent, which terminates the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name, value in settings.items():
+        setattr(config_module, name, value)
+    install_dns_cache()
+    # Geo requests of all workers draw from the parent's rate-limit buckets
+    GEO_LIMITS.attach(geo_limits)
+
+    def emit(idx: int, result: ProxyResult) -> None:
+        out_queue.put(("result", shard, idx, result))
+
+    from src.session_pool import SESSIONS
+    try:
+        summary = None
+        if phase == CHECK:
+            summary = _check_shard(items, user_config, workers, emit)
+        elif phase == GEO:
+            _geo_shard(items, emit)
+        elif phase == SPEED:
+            _speed_shard(items, emit)
+        else:
+            raise ValueError(f"Unknown phase: {phase}")
+        out_queue.put(("done", shard, None, summary))
+    except BaseException as e:
+        out_queue.put(("error", shard, None, f"{type(e).__name__}: {e}"))
+    finally:
+        SESSIONS.close_all()
+
+
+# ----------------------------------------------------------------------
+# Parent side
+# ----------------------------------------------------------------------
+
+def run_sharded(
+    phase: str,
+    items: List[WorkItem],
+    user_config: Dict[str, Any],
+    workers: int,
+    on_result: Callable[[int, ProxyResult], None],
+    processes: Optional[list] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run one phase over items split across `workers` processes.
+
+    Args:
+        phase: CHECK, GEO or SPEED
+        items: (original index, proxy, result) tuples; result is None for CHECK
+        user_config: Configuration from interactive_prompt (must be picklable)
+        workers: Number of worker processes
+        on_result: Callback(original index, result) invoked in the parent as
+            results arrive
+        processes: Optional list the live worker processes are registered in,
+            so a signal handler can terminate them
+
+    Returns:
+        One dict per shard: {"shard", "count", "summary", "error"}; summary is
+        the worker's AdaptiveLimiter summary for CHECK, error is set if the
+        worker failed (its unfinished items then never reach on_result).
+    """
+    shards = shard_indices(len(items), workers)
+    if not shards:
+        return []
+    # spawn: the parent has UI and connection-pool threads that must not be forked
+    ctx = multiprocessing.get_context("spawn")
+    out_queue = ctx.Queue()
+    settings = config_snapshot()
+    geo_limits = GEO_LIMITS.share(ctx)
+    reports = [{"shard": s, "count": len(indices), "summary": None, "error": None}
+               for s, indices in enumerate(shards)]
+
+    procs = []
+    for s, indices in enumerate(shards):
+        proc = ctx.Process(
+            target=_worker_main,
+            args=(s, phase, [items[i] for i in indices], user_config, len(shards), settings, geo_limits,
+                  out_queue),
+            daemon=True
+        )
+        proc.start()
+        procs.append(proc)
+        if processes is not None:
+            processes.append(proc)
+    print_debug(f"Sharding {phase}: {len(items)} items across {len(procs)} worker processes")
+
+    running = set(range(len(procs)))
+
+    def handle(kind: str, shard: int, idx: Optional[int], payload: Any) -> None:
+        if kind == "result":
+            on_result(idx, payload)
+        elif kind == "done":
+            running.discard(shard)
+            reports[shard]["summary"] = payload
+        else:
+            running.discard(shard)
+            reports[shard]["error"] = payload
+
+    try:
+        while running:
+            try:
+                handle(*out_queue.get(timeout=POLL_INTERVAL))
+            except queue_module.Empty:
+                dead = [s for s in running if not procs[s].is_alive()]
+                if not dead:
+                    continue
+                # A worker can queue its last results and "done" right after the
+                # get() above timed out and then exit: read everything it sent
+                # before deciding it failed
+                while True:
+                    try:
+                        handle(*out_queue.get_nowait())
+                    except queue_module.Empty:
+                        break
+                for s in dead:
+                    if s in running:
+                        running.discard(s)
+                        reports[s]["error"] = f"worker exited with code {procs[s].exitcode}"
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.join(timeout=1)
+            if proc.is_alive():
+                proc.terminate()
+            if processes is not None and proc in processes:
+                processes.remove(proc)
+    return reports
@@ -0,0 +1,204 @@
+"""Lean SOCKS5 client for connectivity checks.
+
+Speaks the RFC 1928 greeting, RFC 1929 username/password auth and CONNECT
+directly on a socket (or asyncio streams), then sends one minimal HTTP
+request. This avoids building a requests session and a PySocks socket
+wrapper for every check.
+"""
+from __future__ import annotations
+
+import ipaddress
+import socket
+import struct
+from typing import Optional, Tuple
+
+from src.raw_http import (
+    build_get_request,
+    open_timed_connection,
+    parse_echo_ip,
+    probe,
+    split_url,
+    wrap_tls,
+)
+from src.records import ProxyRecord
+from src.timing import PhaseTimer
+
+SOCKS_VERSION = 0x05
+AUTH_NONE = 0x00
+AUTH_USERPASS = 0x02
+AUTH_REJECTED = 0xFF
+CMD_CONNECT = 0x01
+ATYP_IPV4 = 0x01
+ATYP_DOMAIN = 0x03
+ATYP_IPV6 = 0x04
+
+REPLY_MESSAGES = {
+    0x01: "general SOCKS server failure",
+    0x02: "connection not allowed by ruleset",
+    0x03: "network unreachable",
+    0x04: "host unreachable",
+    0x05: "connection refused",
+    0x06: "TTL expired",
+    0x07: "command not supported",
+    0x08: "address type not supported",
+}
+
+
+class SOCKS5Error(ConnectionError):
+    """Raised when the proxy violates or rejects the SOCKS5 handshake."""
+
+
+def _credentials(proxy: ProxyRecord) -> Tuple[bytes, bytes]:
+    return (proxy.username or "").encode("utf-8"), (proxy.password or "").encode("utf-8")
+
+
+def greeting(proxy: ProxyRecord) -> bytes:
+    """Client greeting offering user/pass auth only when credentials exist."""
+    user, pwd = _credentials(proxy)
+    if user and pwd:
+        return bytes([SOCKS_VERSION, 2, AUTH_NONE, AUTH_USERPASS])
+    return bytes([SOCKS_VERSION, 1, AUTH_NONE])
+
+
+def auth_request(proxy: ProxyRecord) -> bytes:
+    user, pwd = _credentials(proxy)
+    if len(user) > 255 or len(pwd) > 255:
+        raise SOCKS5Error("SOCKS5 username/password longer than 255 bytes")
+    return b"\x01" + bytes([len(user)]) + user + bytes([len(pwd)]) + pwd
+
+
+def connect_request(host: str, port: int) -> bytes:
+    """CONNECT request; hostnames are sent as-is so the proxy resolves them."""
+    try:
+        ip = ipaddress.ip_address(host)
+        atyp = ATYP_IPV4 if ip.version == 4 else ATYP_IPV6
+        address = bytes([atyp]) + ip.packed
+    except ValueError:
+        name = host.encode("idna")
+        address = bytes([ATYP_DOMAIN, len(name)]) + name
+    return bytes([SOCKS_VERSION, CMD_CONNECT, 0x00]) + address + struct.pack("!H", port)
+
+
+def check_method(reply: bytes, proxy: ProxyRecord) -> int:
+    version, method = reply[0], reply[1]
+    if version != SOCKS_VERSION:
+        raise SOCKS5Error("Not a SOCKS5 proxy")
+    if method == AUTH_REJECTED:
+        raise SOCKS5Error("SOCKS5 proxy rejected all auth methods")
+    if method == AUTH_USERPASS and not all(_credentials(proxy)):
+        raise SOCKS5Error("SOCKS5 proxy requires username/password")
+    if method not in (AUTH_NONE, AUTH_USERPASS):
+        raise SOCKS5Error(f"SOCKS5 proxy chose unsupported auth method {method}")
+    return method
+
+
+def check_auth(reply: bytes) -> None:
+    if reply[1] != 0x00:
+        raise SOCKS5Error("SOCKS5 authentication failed")
+
+
+def bound_address_length(head: bytes) -> int:
+    """Validate the CONNECT reply head and return the bytes left to read."""
+    reply, atyp = head[1], head[3]
+    if reply != 0x00:
+        raise SOCKS5Error(f"SOCKS5 CONNECT failed: {REPLY_MESSAGES.get(reply, f'reply code {reply}')}")
+    if atyp == ATYP_IPV4:
+        return 4 + 2
+    if atyp == ATYP_IPV6:
+        return 16 + 2
+    if atyp == ATYP_DOMAIN:
+        return -1  # length byte follows
+    raise SOCKS5Error(f"SOCKS5 reply has unknown address type {atyp}")
+
+
+# --------------------------------------------------------------------------
+# Blocking socket client
+# --------------------------------------------------------------------------
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise SOCKS5Error("SOCKS5 proxy closed the connection during handshake")
+        data += chunk
+    return bytes(data)
+
+
+def socks5_handshake(sock: socket.socket, proxy: ProxyRecord, host: str, port: int) -> None:
+    """Run greeting, optional auth and CONNECT on an already connected socket."""
+    sock.sendall(greeting(proxy))
+    if check_method(_recv_exactly(sock, 2), proxy) == AUTH_USERPASS:
+        sock.sendall(auth_request(proxy))
+        check_auth(_recv_exactly(sock, 2))
+
+    sock.sendall(connect_request(host, port))
+    remaining = bound_address_length(_recv_exactly(sock, 4))
+    if remaining < 0:
+        remaining = _recv_exactly(sock, 1)[0] + 2
+    _recv_exactly(sock, remaining)
+
+
+def socks5_connect(proxy: ProxyRecord, host: str, port: int, timeout: float,
+                   connect_timeout: Optional[float] = None,
+                   timer: Optional[PhaseTimer] = None) -> socket.socket:
+    """Open a tunnel to host:port through the proxy and return the socket."""
+    timer = timer or PhaseTimer()
+    sock = open_timed_connection(proxy.address or proxy.host, proxy.port,
+                                 timeout, connect_timeout or timeout, timer)
+    try:
+        socks5_handshake(sock, proxy, host, port)
+        timer.mark("handshake")
+        return sock
+    except BaseException:
+        sock.close()
+        raise
+
+
+def fetch_via_socks5(proxy: ProxyRecord, url: str, timeout: float,
+                     connect_timeout: Optional[float] = None,
+                     timer: Optional[PhaseTimer] = None,
+                     samples: int = 1) -> Tuple[int, bytes]:
+    """
+    GET url through the SOCKS5 proxy; returns (status_code, body).
+
+    With samples > 1 the tunnel is kept alive for repeat probes.
+    """
+    timer = timer or PhaseTimer()
+    scheme, host, port, _ = split_url(url)
+    sock = socks5_connect(proxy, host, port, timeout, connect_timeout, timer)
+    try:
+        if scheme == "https":
+            sock = wrap_tls(sock, host, timer)
+        return probe(sock, build_get_request(url, keep_alive=samples > 1), samples, timer)
+    finally:
+        sock.close()
+
+
+def fetch_ip_via_socks5(proxy: ProxyRecord, url: str, timeout: float,
+                        connect_timeout: Optional[float] = None,
+                        timer: Optional[PhaseTimer] = None,
+                        samples: int = 1) -> str:
+    """Return the exit IP reported by the JSON echo endpoint at url."""
+    return parse_echo_ip(*fetch_via_socks5(proxy, url, timeout, connect_timeout, timer, samples))
+
+
+# --------------------------------------------------------------------------
+# asyncio streams client
+# --------------------------------------------------------------------------
+
+async def socks5_handshake_async(reader, writer, proxy: ProxyRecord, host: str, port: int) -> None:
+    """asyncio counterpart of socks5_handshake."""
+    writer.write(greeting(proxy))
+    await writer.drain()
+    if check_method(await reader.readexactly(2), proxy) == AUTH_USERPASS:
+        writer.write(auth_request(proxy))
+        await writer.drain()
+        check_auth(await reader.readexactly(2))
+
+    writer.write(connect_request(host, port))
+    await writer.drain()
+    remaining = bound_address_length(await reader.readexactly(4))
+    if remaining < 0:
+        remaining = (await reader.readexactly(1))[0] + 2
+    await reader.readexactly(remaining)
@@ -6,15 +6,17 @@ import time
 import requests
 from typing import Dict, Optional
 
+from src.records import ProxyRecord
 
-def build_requests_proxy(proxy: dict) -> Dict[str, str]:
-    """Return a requests-compatible proxy mapping for the given proxy dict."""
-    scheme = "socks5h" if proxy.get("type") == "socks5" else "http"
+
+def build_requests_proxy(proxy: ProxyRecord) -> Dict[str, str]:
+    """Return a requests-compatible proxy mapping for the given proxy."""
+    scheme = "socks5h" if proxy.type == "socks5" else "http"
     proxy_url = _format_proxy_url(proxy, scheme)
     return {"http": proxy_url, "https": proxy_url}
 
 
-def _get_fast_com_token(proxies: dict, headers: dict, timeout: int) -> Optional[str]:
+def _get_fast_com_token(session: requests.Session, headers: dict, timeout: int) -> Optional[str]:
     """
     Fetch the Fast.com token by scraping the homepage to find the current
     JS bundle URL, then extracting the token from it.
@@ -24,9 +26,8 @@ def _get_fast_com_token(proxies: dict, headers: dict, timeout: int) -> Optional[
     """
     try:
         # Step 1: Fetch the homepage to find the current JS bundle URL
-        home = requests.get(
+        home = session.get(
             "https://fast.com/",
-            proxies=proxies,
             headers=headers,
             timeout=timeout,
         )
@@ -41,7 +42,7 @@ def _get_fast_com_token(proxies: dict, headers: dict, timeout: int) -> Optional[
         js_url = "https://fast.com" + match.group(1)
 
         # Step 2: Fetch the JS bundle and extract the token
-        js_resp = requests.get(js_url, proxies=proxies, headers=headers, timeout=timeout)
+        js_resp = session.get(js_url, headers=headers, timeout=timeout)
         if js_resp.status_code != 200:
             return None
 
@@ -55,15 +56,21 @@ def _get_fast_com_token(proxies: dict, headers: dict, timeout: int) -> Optional[
         return None
 
 
-def test_fast_com_speed(proxy: dict, timeout: int = 30) -> Optional[float]:
+def test_fast_com_speed(proxy: ProxyRecord, timeout: int = 30,
+                        session: Optional[requests.Session] = None) -> Optional[float]:
     """
     Test download speed using Fast.com API.
     Returns speed in Mbps or None if test fails.
 
     Fast.com uses Netflix's CDN servers for accurate speed testing.
+    Pass a keep-alive session already configured for the proxy to reuse its
+    connections; otherwise a temporary one is created and closed afterwards.
     """
+    owns_session = session is None
+    if owns_session:
+        session = requests.Session()
+        session.proxies = build_requests_proxy(proxy)
     try:
-        proxies = build_requests_proxy(proxy)
 
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -72,13 +79,13 @@ def test_fast_com_speed(proxy: dict, timeout: int = 30) -> Optional[float]:
         }
 
         # Step 1: Get Fast.com token (scrapes homepage to find current JS bundle)
-        token = _get_fast_com_token(proxies, headers, timeout)
+        token = _get_fast_com_token(session, headers, timeout)
         if not token:
             return None
 
         # Step 2: Get target URLs from Fast.com API
         api_url = f"https://api.fast.com/netflix/speedtest/v2?https=true&token={token}&urlCount=5"
-        api_resp = requests.get(api_url, proxies=proxies, headers=headers, timeout=timeout)
+        api_resp = session.get(api_url, headers=headers, timeout=timeout)
         if api_resp.status_code != 200:
             return None
 
@@ -98,8 +105,8 @@ def test_fast_com_speed(proxy: dict, timeout: int = 30) -> Optional[float]:
 
             response = None
             try:
-                response = requests.get(
-                    url, proxies=proxies, headers=headers,
+                response = session.get(
+                    url, headers=headers,
                     timeout=10, stream=True,
                 )
                 response.raise_for_status()
@@ -131,13 +138,16 @@ def test_fast_com_speed(proxy: dict, timeout: int = 30) -> Optional[float]:
 
     except Exception:
         return None
+    finally:
+        if owns_session:
+            session.close()
 
 
-def _format_proxy_url(proxy: dict, scheme: str) -> str:
+def _format_proxy_url(proxy: ProxyRecord, scheme: str) -> str:
     """Format proxy URL, with or without credentials."""
-    if proxy.get('username') and proxy.get('password'):
+    if proxy.username and proxy.password:
         return (
-            f"{scheme}://{proxy['username']}:{proxy['password']}@"
-            f"{proxy['host']}:{proxy['port']}"
+            f"{scheme}://{proxy.username}:{proxy.password}@"
+            f"{proxy.host}:{proxy.port}"
         )
-    return f"{scheme}://{proxy['host']}:{proxy['port']}"
+    return f"{scheme}://{proxy.host}:{proxy.port}"
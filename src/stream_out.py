@@ -0,0 +1,187 @@
+"""Incremental output of results as they become final.
+
+A result is final as soon as nothing more will be added to it: right after
+the connectivity check for proxies that failed (or when no geo/speed phase
+follows), after the last requested phase for the others. A proxy that is
+retried is written a second time; its last line is its final state.
+
+Two writers share the same machinery (BackgroundWriter):
+
+* NDJSONWriter (--stream-out): one JSON object per proxy, to a file or
+  stdout, for feeding other tools while the scan runs;
+* ResultFileWriter (-o): the CSV/TXT export, appended row by row so a scan
+  that crashes or is killed keeps everything finished so far. main()
+  rewrites the file in input order once the scan completes.
+
+Checkers never touch the file: write() formats the result and puts it on a
+bounded queue, and a background thread writes whatever has accumulated in
+one go, flushing after each batch (and fsyncing files every
+config.OUTPUT_FSYNC_INTERVAL seconds). If the output falls more than
+config.STREAM_OUT_BUFFER results behind, write() waits for room rather
+than dropping results or growing without bound.
+"""
+import csv
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional
+
+import src.config as config_module
+from src.records import ProxyRecord, ProxyResult, as_dict
+from src.utils import csv_fieldnames, csv_row, txt_header, txt_line
+
+_CLOSE = object()
+
+
+def result_line(proxy: ProxyRecord, result: ProxyResult, index: Optional[int] = None) -> Dict[str, Any]:
+    """
+    The JSON object written for one proxy: its input line number (when
+    known), its identity and the typed result fields. index overrides
+    proxy.index for a duplicate line that shares the proxy's result.
+    """
+    index = proxy.index if index is None else index
+    line: Dict[str, Any] = {} if index is None else {"line": index + 1}
+    line.update({"proxy": proxy.raw, "host": proxy.host, "port": proxy.port})
+    line.update(as_dict(result))
+    return line
+
+
+class BackgroundWriter:
+    """Writes formatted results to a file or stdout ("-") from a background thread."""
+
+    def __init__(self, target: str, buffer: Optional[int] = None, batch: Optional[int] = None,
+                 mode: str = "w", newline: Optional[str] = None):
+        self.target = target
+        self.batch = batch or config_module.STREAM_OUT_BATCH
+        if target == "-":
+            # The real stdout: the UI is moved to stderr while results go here
+            self._file: IO[str] = sys.__stdout__
+        else:
+            self._file = open(target, mode, encoding="utf-8", newline=newline)
+            if self._file.tell() == 0:
+                self._file.write(self.header())
+        self._queue: "queue.Queue" = queue.Queue(maxsize=buffer or config_module.STREAM_OUT_BUFFER)
+        self._synced = time.monotonic()
+        self.written = 0
+        self.error: Optional[OSError] = None
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def header(self) -> str:
+        """Text written once at the top of a new file."""
+        return ""
+
+    def format(self, proxy: ProxyRecord, result: ProxyResult) -> str:
+        """The text written for one result, ending with a newline."""
+        raise NotImplementedError
+
+    def write(self, proxy: ProxyRecord, result: ProxyResult) -> None:
+        """Queue one proxy's result (formatted now, so later changes to it do not leak in)."""
+        self.put(self.format(proxy, result))
+
+    def put(self, text: str) -> None:
+        """Queue text for the file as is."""
+        if self.error is None:
+            self._queue.put(text)
+
+    def _sync(self, force: bool = False) -> None:
+        if self._file is sys.__stdout__:
+            return
+        if force or time.monotonic() - self._synced >= config_module.OUTPUT_FSYNC_INTERVAL:
+            os.fsync(self._file.fileno())
+            self._synced = time.monotonic()
+
+    def _run(self) -> None:
+        while True:
+            chunks = [self._queue.get()]
+            # Drain what is already waiting so each write/flush covers a batch
+            while len(chunks) < self.batch:
+                try:
+                    chunks.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = chunks[-1] is _CLOSE
+            if closing:
+                chunks.pop()
+            if self.error is None:
+                try:
+                    if chunks:
+                        self._file.write("".join(chunks))
+                        self._file.flush()
+                        self.written += len(chunks)
+                    self._sync(force=closing)
+                except OSError as e:
+                    # e.g. the consumer closed the pipe: stop writing, keep scanning
+                    self.error = e
+            if closing:
+                return
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write out (and fsync) everything queued so far and close the file."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_CLOSE, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        if not self._thread.is_alive() and self._file is not sys.__stdout__:
+            try:
+                self._file.close()
+            except OSError:
+                pass  # unflushed lines of an output that already failed
+
+
+class NDJSONWriter(BackgroundWriter):
+    """
+    --stream-out: one JSON object per line.
+
+    copies maps a proxy's index to the indices of the input lines that
+    repeat it (see utils.dedupe_proxies); each gets its own line, as in -o.
+    """
+
+    def __init__(self, target: str, copies: Optional[Dict[int, List[int]]] = None, **kwargs):
+        self.copies = copies or {}
+        super().__init__(target, **kwargs)
+
+    def format(self, proxy: ProxyRecord, result: ProxyResult) -> str:
+        indices = [proxy.index] + self.copies.get(proxy.index, [])
+        return "".join(
+            json.dumps(result_line(proxy, result, index), separators=(",", ":")) + "\n" for index in indices
+        )
+
+
+class ResultFileWriter(BackgroundWriter):
+    """
+    -o: the CSV or TXT export (by extension), one row per result in completion order.
+
+    copies maps a proxy's index to the indices of the input lines that
+    repeat it (see utils.dedupe_proxies); they get the same row.
+    """
+
+    def __init__(self, target: str, sampled: bool = False, copies: Optional[Dict[int, List[int]]] = None,
+                 **kwargs):
+        self.csv = os.path.splitext(target)[1].lower() == ".csv"
+        self.sampled = sampled
+        self.copies = copies or {}
+        self.fieldnames = csv_fieldnames(sampled)
+        super().__init__(target, newline="" if self.csv else None, **kwargs)
+
+    def header(self) -> str:
+        if self.csv:
+            return ",".join(self.fieldnames) + "\r\n"
+        return txt_header(self.sampled)
+
+    def format(self, proxy: ProxyRecord, result: ProxyResult) -> str:
+        indices = [proxy.index] + self.copies.get(proxy.index, [])
+        if not self.csv:
+            return "".join(txt_line(result, index + 1, self.sampled) for index in indices)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames)
+        for index in indices:
+            writer.writerow(csv_row(result, index + 1, self.fieldnames, self.sampled))
+        return buffer.getvalue()
@@ -0,0 +1,248 @@
+"""Threaded connectivity engine.
+
+Runs test_http_proxy/test_socks_proxy on a thread pool whose number of
+checks in flight follows an AdaptiveLimiter, in the order (and within the
+per-host caps) given by a HostScheduler. Used directly by the CLI and by
+each worker process in --workers mode. run_streaming_checks() does the same
+for proxies read lazily from a file or pipe, holding only a bounded window.
+"""
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable, List, Optional
+
+from src.budget import deadline_result, expired
+from src.concurrency import AdaptiveLimiter
+import src.config as config_module
+from src.config import ADAPTIVE_MAX_THREADS
+from src.host_scheduler import HostScheduler
+from src.proxy_tester import test_http_proxy, test_socks_proxy
+from src.records import ProxyRecord, ProxyResult, Status, result_type
+from src.ui import print_error, print_debug
+
+
+def calculate_optimal_threads(proxy_count: int, base_threads: int = 8, max_threads: int = 64) -> int:
+    """Calculate optimal thread count based on proxy count."""
+    if proxy_count <= 0:
+        return 1
+    calculated = base_threads * math.log2(proxy_count + 1)
+    rounded = round(calculated)
+    return min(max(rounded, 1), min(max_threads, proxy_count))
+
+
+def failed_result(proxy_type: str, error: str, error_kind: Optional[str] = None) -> ProxyResult:
+    """Result for a proxy that never made it through the connectivity check"""
+    return ProxyResult(result_type(proxy_type), Status.FAILED, error, error_kind)
+
+
+def default_limiter(proxy_count: int) -> AdaptiveLimiter:
+    """Start from the log-scaled estimate and let the AIMD controller adjust."""
+    return AdaptiveLimiter(
+        initial=calculate_optimal_threads(proxy_count),
+        maximum=min(ADAPTIVE_MAX_THREADS, proxy_count)
+    )
+
+
+def run_threaded_checks(
+    proxies: List[ProxyRecord],
+    proxy_type: str,
+    limiter: Optional[AdaptiveLimiter] = None,
+    on_result: Optional[Callable[[int, ProxyResult], None]] = None,
+    executors: Optional[list] = None,
+    scheduler: Optional[HostScheduler] = None,
+) -> List[Optional[ProxyResult]]:
+    """
+    Check all proxies on a thread pool, keeping `limiter.limit` checks in flight.
+
+    Args:
+        proxies: Parsed proxies (from parse_proxy_line)
+        proxy_type: 'http' or 'socks'
+        limiter: AdaptiveLimiter to follow (default: default_limiter())
+        on_result: Optional callback(index, result) invoked as each check finishes
+        executors: Optional list the executor is registered in while it runs,
+            so a signal handler can shut it down
+        scheduler: HostScheduler deciding the order and per-host caps
+            (default: one over proxies with config.PER_HOST_LIMIT)
+
+    Returns:
+        Results in the same order as proxies
+    """
+    results: List[Optional[ProxyResult]] = [None] * len(proxies)
+    if not proxies:
+        return results
+    test_func = test_socks_proxy if proxy_type == "socks" else test_http_proxy
+    if limiter is None:
+        limiter = default_limiter(len(proxies))
+    if scheduler is None:
+        scheduler = HostScheduler(proxies)
+
+    def check(i: int) -> ProxyResult:
+        error = scheduler.prepare(i)
+        if error:
+            print_error(f"[DNS FAIL] {proxies[i]['raw']} → {error}")
+            return failed_result(proxy_type, error, "unreachable")
+        return test_func(proxies[i])
+
+    print_debug(f"Thread calculation: {len(proxies)} proxies → {limiter.limit} threads to start, up to {limiter.maximum}")
+
+    with ThreadPoolExecutor(max_workers=limiter.maximum) as executor:
+        if executors is not None:
+            executors.append(executor)
+        try:
+            future_to_index = {}
+            started_at = {}
+
+            def submit_more() -> None:
+                # Keep exactly `limiter.limit` checks in flight, hosts permitting
+                while limiter.can_start():
+                    i = scheduler.next()
+                    if i is None:
+                        return
+                    if expired():
+                        # Out of scan budget: report the rest without checking them
+                        scheduler.done(i)
+                        results[i] = deadline_result(proxy_type)
+                        if on_result:
+                            on_result(i, results[i])
+                        continue
+                    limiter.started()
+                    future = executor.submit(check, i)
+                    future_to_index[future] = i
+                    started_at[future] = time.monotonic()
+
+            submit_more()
+            while future_to_index:
+                done, _ = wait(future_to_index, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = future_to_index.pop(future)
+                    elapsed = time.monotonic() - started_at.pop(future)
+                    scheduler.done(idx)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print_error(f"[THREAD FAIL] {proxies[idx]['raw']} → {str(e)}")
+                        result = failed_result(proxy_type, str(e))
+                    results[idx] = result
+
+                    if result.working:
+                        limiter.record(elapsed)
+                    else:
+                        limiter.record(None, result.error_kind or "other")
+
+                    if on_result:
+                        on_result(idx, result)
+                submit_more()
+        finally:
+            if executors is not None and executor in executors:
+                executors.remove(executor)
+    return results
+
+
+def run_streaming_checks(
+    proxies: Iterable[ProxyRecord],
+    proxy_type: str,
+    limiter: Optional[AdaptiveLimiter] = None,
+    on_result: Optional[Callable[[ProxyRecord, ProxyResult], None]] = None,
+    executors: Optional[list] = None,
+    window: Optional[int] = None,
+    check: Optional[Callable[[ProxyRecord], ProxyResult]] = None,
+) -> int:
+    """
+    Check proxies pulled lazily from an iterable, keeping no results.
+
+    At most `window` proxies are read ahead of the checks in flight; each
+    one is dropped as soon as on_result has seen it, so memory follows the
+    window rather than the length of the input.
+
+    Args:
+        proxies: Parsed proxies, e.g. from utils.iter_parsed_proxies()
+        proxy_type: 'http' or 'socks'
+        limiter: AdaptiveLimiter to follow (default: one sized for the window)
+        on_result: Optional callback(proxy, result) invoked as each check finishes
+        executors: Optional list the executor is registered in while it runs
+        window: Proxies read ahead, including those in flight (default: config.STREAM_WINDOW)
+        check: Check to run instead of test_http_proxy/test_socks_proxy
+
+    Returns:
+        Number of proxies checked
+    """
+    if window is None:
+        window = config_module.STREAM_WINDOW
+    if limiter is None:
+        limiter = default_limiter(window)
+    window = max(window, limiter.maximum)
+    if check is None:
+        check = test_socks_proxy if proxy_type == "socks" else test_http_proxy
+    scheduler = HostScheduler({})
+    source = iter(proxies)
+    pending = 0  # read from the input and not yet reported
+    count = 0
+
+    def run(i: int) -> ProxyResult:
+        error = scheduler.prepare(i)
+        if error:
+            print_error(f"[DNS FAIL] {scheduler.proxies[i]['raw']} → {error}")
+            return failed_result(proxy_type, error, "unreachable")
+        return check(scheduler.proxies[i])
+
+    def report(i: int, result: ProxyResult) -> None:
+        nonlocal pending, count
+        proxy = scheduler.proxies[i]
+        scheduler.release(i)
+        pending -= 1
+        count += 1
+        if on_result:
+            on_result(proxy, result)
+
+    with ThreadPoolExecutor(max_workers=limiter.maximum) as executor:
+        if executors is not None:
+            executors.append(executor)
+        try:
+            future_to_index = {}
+            started_at = {}
+
+            def submit_more() -> None:
+                nonlocal pending, source
+                while limiter.can_start():
+                    # Top up the window so the scheduler can interleave hosts
+                    while source is not None and pending < window:
+                        proxy = next(source, None)
+                        if proxy is None:
+                            source = None
+                            break
+                        scheduler.add(proxy)
+                        pending += 1
+                    i = scheduler.next()
+                    if i is None:
+                        return
+                    if expired():
+                        # Out of scan budget: report the rest without checking them
+                        report(i, deadline_result(proxy_type))
+                        continue
+                    limiter.started()
+                    future = executor.submit(run, i)
+                    future_to_index[future] = i
+                    started_at[future] = time.monotonic()
+
+            submit_more()
+            while future_to_index:
+                done, _ = wait(future_to_index, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = future_to_index.pop(future)
+                    elapsed = time.monotonic() - started_at.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print_error(f"[THREAD FAIL] {scheduler.proxies[idx]['raw']} → {str(e)}")
+                        result = failed_result(proxy_type, str(e))
+
+                    if result.working:
+                        limiter.record(elapsed)
+                    else:
+                        limiter.record(None, result.error_kind or "other")
+                    report(idx, result)
+                submit_more()
+        finally:
+            if executors is not None and executor in executors:
+                executors.remove(executor)
+    return count
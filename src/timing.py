@@ -0,0 +1,172 @@
+"""Per-phase latency measurement for connectivity checks.
+
+A PhaseTimer records monotonic timestamps as a check moves through DNS
+resolution, the TCP connect to the proxy, the proxy handshake/auth, the TLS
+handshake and the wait for the endpoint's response. The durations are stored
+on the result as .phases (seconds, None when a phase did not apply)
+and formatted only for display and export.
+"""
+import math
+import time
+from typing import Dict, Iterable, List, Optional
+
+from src.records import ProxyResult
+
+try:
+    import numpy as np
+except ImportError:  # optional: sample statistics fall back to pure Python
+    np = None
+
+# Phase keys in the order they happen during a check
+PHASES = ("dns", "connect", "handshake", "tls", "ttfb")
+
+# Column headers used in tables and CSV exports
+PHASE_LABELS = {
+    "dns": "DNS",
+    "connect": "Connect",
+    "handshake": "Handshake",
+    "tls": "TLS",
+    "ttfb": "TTFB",
+}
+
+
+# Per-proxy statistics over the --samples round trips, stored as .sample_stats
+SAMPLE_STATS = ("min", "p50", "p95", "jitter")
+
+SAMPLE_LABELS = {
+    "min": "Min",
+    "p50": "p50",
+    "p95": "p95",
+    "jitter": "Jitter",
+}
+
+
+class PhaseTimer:
+    """
+    Accumulates the time spent in each phase of one attempt.
+
+    `samples` collects the round trip of every request sent on the
+    connection (one per probe with --samples), from send to end of body.
+    """
+
+    __slots__ = ("start", "_last", "_end", "phases", "samples")
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self._last = self.start
+        self._end: Optional[float] = None
+        self.phases: Dict[str, Optional[float]] = dict.fromkeys(PHASES)
+        self.samples: List[float] = []
+
+    def mark(self, phase: str) -> None:
+        """Close `phase`: everything since the previous mark is charged to it."""
+        now = time.monotonic()
+        self.phases[phase] = (self.phases[phase] or 0.0) + (now - self._last)
+        self._last = now
+
+    def skip(self) -> None:
+        """Discard time since the previous mark (e.g. time spent reading a body)."""
+        self._last = time.monotonic()
+
+    def stop(self) -> None:
+        """Freeze elapsed(): later requests on the connection are not part of the check."""
+        self._end = time.monotonic()
+
+    def elapsed(self) -> float:
+        return (self._end or time.monotonic()) - self.start
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def aggregate_phases(results: Iterable[Optional[ProxyResult]]) -> Dict[str, Dict[str, float]]:
+    """
+    Summarise per-phase durations across results.
+
+    Returns:
+        {phase: {"count", "avg", "p50", "p95", "max"}} in seconds, only for
+        phases that were measured on at least one result.
+    """
+    samples: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    for result in results:
+        phases = result.phases if result else None
+        if not phases:
+            continue
+        for phase in PHASES:
+            value = phases.get(phase)
+            if value is not None:
+                samples[phase].append(value)
+
+    summary = {}
+    for phase in PHASES:
+        values = sorted(samples[phase])
+        if not values:
+            continue
+        summary[phase] = {
+            "count": len(values),
+            "avg": sum(values) / len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": values[-1],
+        }
+    return summary
+
+
+def _sample_stats_numpy(series: List[List[float]]) -> List[Dict[str, float]]:
+    """Vectorized sample_stats(): one NaN-padded row per proxy."""
+    width = max(len(samples) for samples in series)
+    grid = np.full((len(series), width), np.nan)
+    for row, samples in enumerate(series):
+        grid[row, :len(samples)] = samples
+    counts = np.count_nonzero(~np.isnan(grid), axis=1)
+    ordered = np.sort(grid, axis=1)  # NaN padding sorts last
+
+    def nearest_rank(pct: float):
+        ranks = np.maximum(1, np.ceil(pct / 100.0 * counts)).astype(int)
+        return np.take_along_axis(ordered, (ranks - 1)[:, None], axis=1)[:, 0]
+
+    # Mean absolute difference between consecutive round trips (NaN gaps ignored)
+    steps = np.abs(np.diff(grid, axis=1))
+    jitter = np.nansum(steps, axis=1) / np.maximum(counts - 1, 1) if width > 1 else np.zeros(len(series))
+    columns = {"min": ordered[:, 0], "p50": nearest_rank(50), "p95": nearest_rank(95), "jitter": jitter}
+    return [{key: float(columns[key][row]) for key in SAMPLE_STATS} for row in range(len(series))]
+
+
+def _sample_stats_python(series: List[List[float]]) -> List[Dict[str, float]]:
+    stats = []
+    for samples in series:
+        ordered = sorted(samples)
+        steps = [abs(b - a) for a, b in zip(samples, samples[1:])]
+        stats.append({
+            "min": ordered[0],
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "jitter": sum(steps) / len(steps) if steps else 0.0,
+        })
+    return stats
+
+
+def apply_sample_stats(results: Iterable[Optional[ProxyResult]]) -> int:
+    """
+    Compute min/p50/p95/jitter of each result's .samples in one batch and
+    store them as .sample_stats (seconds).
+
+    Jitter is the mean absolute difference between consecutive round trips.
+    Uses numpy when it is installed.
+
+    Returns:
+        Number of results that got statistics
+    """
+    measured = [result for result in results if result and result.samples]
+    if not measured:
+        return 0
+    series = [result.samples for result in measured]
+    stats = _sample_stats_numpy(series) if np is not None else _sample_stats_python(series)
+    for result, values in zip(measured, stats):
+        result.sample_stats = values
+    return len(measured)
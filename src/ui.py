@@ -14,9 +14,14 @@ from rich.progress import (
 )
 from rich.panel import Panel
 from rich.live import Live
+from rich.markup import escape
 from colorama import Fore, Style
+from typing import Optional
+
 import src.config as config_module
 from src import __version__
+from src.records import SPEED_FAILED, display_row, format_speed
+from src.timing import PHASE_LABELS, SAMPLE_LABELS, SAMPLE_STATS
 
 # Initialize colorama for Windows compatibility
 init(autoreset=True)
@@ -58,11 +63,13 @@ def print_result(result: dict, show_location: bool = False):
     Nicely prints a single proxy test result with color.
     Only shows location if show_location is True.
     """
-    status = result.get("Status", "Unknown")
+    result = display_row(result)
+    status = str(result.get("Status", "Unknown"))
     status_color = {
         "Working": Fore.GREEN,
         "Failed": Fore.RED,
-        "Timeout": Fore.YELLOW
+        "Timeout": Fore.YELLOW,
+        "Deadline": Fore.MAGENTA
     }.get(status, Fore.WHITE)
 
     # Base output
@@ -79,10 +86,12 @@ def print_result(result: dict, show_location: bool = False):
     
     print('\n'.join(output))
 
-def display_result_table(results: list, show_location: bool = False, show_speed: bool = False):
+def display_result_table(results: list, show_location: bool = False, show_speed: bool = False,
+                         show_samples: bool = False):
     """
     Displays results in a rich table format with original ordering.
-    Only includes columns based on user preferences.
+    Only includes columns based on user preferences (show_samples adds the
+    --samples min/p50/p95/jitter columns).
     """
     if not results:
         print_warning("No results to display.")
@@ -102,18 +111,25 @@ def display_result_table(results: list, show_location: bool = False, show_speed:
     
     table.add_column("Latency", style="magenta")
     
+    if show_samples:
+        for key in SAMPLE_STATS:
+            table.add_column(SAMPLE_LABELS[key], style="yellow" if key == "jitter" else "magenta", justify="right")
+    
     if show_speed:
         table.add_column("Speed", style="green")
     
     table.add_column("Status", style="bold")
 
     for idx, result in enumerate(results, 1):  # Start numbering at 1
-        status_text = Text(result.get("Status", "-"))
+        result = display_row(result)
+        status_text = Text(str(result.get("Status", "-")))
 
         if result.get("Status") == "Working":
             status_text.stylize("bold green")
         elif result.get("Status") == "Failed":
             status_text.stylize("bold red")
+        elif result.get("Status") == "Deadline":
+            status_text.stylize("magenta")
         else:
             status_text.stylize("yellow")
 
@@ -128,6 +144,10 @@ def display_result_table(results: list, show_location: bool = False, show_speed:
 
         row.append(result.get("Latency", "-"))
 
+        if show_samples:
+            stats = result.get("SampleStats") or {}
+            row.extend(f"{stats[key] * 1000:.0f}ms" if key in stats else "-" for key in SAMPLE_STATS)
+
         if show_speed:
             row.append(result.get("Speed", "-"))
 
@@ -137,6 +157,114 @@ def display_result_table(results: list, show_location: bool = False, show_speed:
 
     console.print(table)
 
+def print_phase_breakdown(summary: dict):
+    """
+    Display where connectivity-check time went across all measured proxies.
+    
+    Args:
+        summary: Output of timing.aggregate_phases() ({phase: {count, avg, p50, p95, max}})
+    """
+    if not summary:
+        return
+
+    table = Table(title="Latency Breakdown by Phase")
+    table.add_column("Phase", style="cyan", no_wrap=True)
+    table.add_column("Samples", style="dim", justify="right")
+    table.add_column("Avg", style="magenta", justify="right")
+    table.add_column("p50", style="magenta", justify="right")
+    table.add_column("p95", style="yellow", justify="right")
+    table.add_column("Max", style="red", justify="right")
+
+    for phase, stats in summary.items():
+        table.add_row(
+            PHASE_LABELS.get(phase, phase),
+            str(stats["count"]),
+            *(f"{stats[key] * 1000:.0f}ms" for key in ("avg", "p50", "p95", "max"))
+        )
+
+    console.print(table)
+
+def print_host_stats(rows: list, limit: int = 10):
+    """
+    Display per-host throughput and failure counts, busiest hosts first.
+    
+    Args:
+        rows: Output of HostStats.summary()
+        limit: Maximum number of hosts to list
+    """
+    if not rows:
+        return
+
+    table = Table(title="Per-Host Summary")
+    table.add_column("Host", style="cyan")
+    table.add_column("Checked", justify="right")
+    table.add_column("Working", style="green", justify="right")
+    table.add_column("Failed", style="red", justify="right")
+    table.add_column("Fail %", style="yellow", justify="right")
+    table.add_column("Checks/s", style="magenta", justify="right")
+
+    for row in rows[:limit]:
+        table.add_row(
+            row["host"],
+            str(row["checked"]),
+            str(row["working"]),
+            str(row["failed"]),
+            f"{row['fail_rate']:.0%}",
+            f"{row['rate']:.1f}"
+        )
+
+    console.print(table)
+    if len(rows) > limit:
+        console.print(f"[dim]... and {len(rows) - limit} more hosts[/dim]")
+
+def print_parse_report(report):
+    """
+    Summarize the invalid lines of a parsed proxy list, grouped by error kind.
+    
+    Args:
+        report: utils.ParseReport
+    """
+    if not report.invalid:
+        return
+    print_warning(f"Skipped {report.invalid} of {report.lines} lines that could not be parsed")
+    for kind, count in sorted(report.errors.items(), key=lambda item: -item[1]):
+        console.print(f"  [yellow]{kind}[/yellow]: {count}")
+        for number, line, message in report.samples.get(kind, []):
+            detail = message if line in message else f"{line} - {message}"
+            console.print(f"    [dim]line {number}: {escape(detail)}[/dim]")
+
+def print_concurrency_curve(summary: dict, width: int = 48):
+    """
+    Display how the adaptive concurrency limit moved during a phase.
+    
+    Args:
+        summary: Output of AdaptiveLimiter.summary()
+        width: Number of sparkline columns
+    """
+    curve = summary.get("curve") or []
+    if not curve:
+        return
+
+    # Sample the step function at evenly spaced times for the sparkline
+    blocks = "▁▂▃▄▅▆▇█"
+    end = max(curve[-1][0], 1e-9)
+    low, high = summary["min"], summary["max"]
+    span = max(high - low, 1)
+    points = []
+    pos = 0
+    for col in range(width):
+        t = end * col / (width - 1)
+        while pos + 1 < len(curve) and curve[pos + 1][0] <= t:
+            pos += 1
+        points.append(blocks[int((curve[pos][1] - low) / span * (len(blocks) - 1))])
+
+    console.print(
+        f"Concurrency: start [cyan]{summary['start']}[/cyan] → final [cyan]{summary['final']}[/cyan] "
+        f"(min {low}, max {high}, {summary['adjustments']} adjustments)"
+    )
+    if summary["adjustments"]:
+        console.print(f"[dim]{low:>4}[/dim] [green]{''.join(points)}[/green] [dim]{high}[/dim]")
+
 def create_progress_bar(description: str = "Processing", transient: bool = False):
     """
     Create a beautiful Rich progress bar with all the bells and whistles.
@@ -184,7 +312,7 @@ def print_speed_test_header(total_proxies: int):
     )
     console.print(panel)
 
-def print_speed_test_result(proxy_num: int, total: int, ip: str, speed: str, location: str = None):
+def print_speed_test_result(proxy_num: int, total: int, ip: str, speed: Optional[float], location: str = None):
     """
     Print a beautiful inline result for each completed speed test
     
@@ -192,25 +320,21 @@ def print_speed_test_result(proxy_num: int, total: int, ip: str, speed: str, loc
         proxy_num: Current proxy number
         total: Total proxies
         ip: IP address
-        speed: Speed result (e.g., "7.02 Mbps")
+        speed: Measured speed in Mbps (SPEED_FAILED or None if the test failed)
         location: Optional location string
     """
     # Determine speed color based on value
-    if speed == "Error":
+    speed_text = format_speed(speed)
+    if speed is None or speed <= SPEED_FAILED:
         speed_style = "[red]Error[/red]"
+    elif speed >= 10:
+        speed_style = f"[bold green]{speed_text}[/bold green]"
+    elif speed >= 5:
+        speed_style = f"[green]{speed_text}[/green]"
+    elif speed >= 1:
+        speed_style = f"[yellow]{speed_text}[/yellow]"
     else:
-        try:
-            speed_val = float(speed.replace(" Mbps", ""))
-            if speed_val >= 10:
-                speed_style = f"[bold green]{speed}[/bold green]"
-            elif speed_val >= 5:
-                speed_style = f"[green]{speed}[/green]"
-            elif speed_val >= 1:
-                speed_style = f"[yellow]{speed}[/yellow]"
-            else:
-                speed_style = f"[red]{speed}[/red]"
-        except:
-            speed_style = f"[dim]{speed}[/dim]"
+        speed_style = f"[red]{speed_text}[/red]"
     
     # Build result line
     result_line = f"[dim]#{proxy_num:02d}/{total:02d}[/dim] │ [cyan]{ip:15}[/cyan] │ {speed_style}"
@@ -1,9 +1,40 @@
 import os
 import csv
-import requests
+import gc
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import src.config as config_module
+from src.geo_db import offline_location
+from src.rate_limit import IP_API, IP_API_BATCH, IPWHO, paced_request, quickest
+from src.records import ProxyRecord, display_row, format_latency
+from src.session_pool import SESSIONS
+from src.timing import PHASES, PHASE_LABELS, SAMPLE_STATS, SAMPLE_LABELS
 from src.ui import print_info, print_warning, print_error
 
 
+def iter_proxy_lines(source: str) -> Iterator[str]:
+    """
+    Yields proxy lines from a file, or from stdin when source is "-", one at
+    a time without reading the whole input into memory.
+    Ignores empty lines and comments (#).
+    """
+    if source == "-":
+        file = sys.stdin
+    else:
+        file = open(source, 'r')
+    try:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
 def load_proxies_from_file(filepath: str) -> list:
     """
     Reads a file line by line and returns a list of proxies.
@@ -11,62 +42,108 @@ def load_proxies_from_file(filepath: str) -> list:
     """
     proxies = []
     try:
-        with open(filepath, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    proxies.append(line)
+        proxies = list(iter_proxy_lines(filepath))
         print_info(f"Loaded {len(proxies)} proxies from {filepath}")
     except FileNotFoundError:
         print_error(f"Proxy file not found: {filepath}")
     return proxies
 
 
-def format_latency(seconds: float) -> str:
+def format_phases(phases: dict) -> dict:
     """
-    Converts float seconds into human-readable latency string.
-    Example: 0.256 -> '256ms'
+    Formats a result's per-phase durations (seconds) for display/export.
+    Example: {'dns': 0.004, 'tls': None, ...} -> {'DNS': '4ms', 'TLS': 'N/A', ...}
     """
-    return f"{int(seconds * 1000)}ms"
+    phases = phases or {}
+    return {
+        PHASE_LABELS[phase]: format_latency(phases[phase]) if phases.get(phase) is not None else "N/A"
+        for phase in PHASES
+    }
 
 
-def parse_proxy_line(line: str, proxy_type: str = None, ip_whitelist: bool = False) -> dict:
+def format_sample_stats(stats: dict) -> dict:
     """
-    Parses proxies in two formats:
-    1. host:port:username:password
-    2. username:password@host:port
+    Formats a result's --samples statistics (seconds) for display/export.
+    Example: {'min': 0.081, 'p50': 0.09, ...} -> {'Min': '81ms', 'p50': '90ms', ...}
+    """
+    stats = stats or {}
+    return {
+        SAMPLE_LABELS[key]: format_latency(stats[key]) if stats.get(key) is not None else "N/A"
+        for key in SAMPLE_STATS
+    }
 
-    When ip_whitelist=True, also accepts:
-    3. host:port  (no credentials)
 
-    Supports both IPv4 addresses and DNS-based hostnames.
+# Compiled once: the parser runs for every line of lists with millions of entries
+_IPV4_PATTERN = re.compile(r'^\d+\.\d+\.\d+\.\d+$')
+_HOSTNAME_PATTERN = re.compile(r'^[a-zA-Z0-9]([a-zA-Z0-9\-\.]*[a-zA-Z0-9])?$')
 
-    Args:
-        line: Raw proxy string
-        proxy_type: 'http' or 'socks' (from --http/--socks flag or interactive prompt)
-        ip_whitelist: If True, accept host:port format without credentials
 
-    Returns:
-    {
-        'host': 'pg.proxi.es' or '192.168.1.1',
-        'port': '20000',
-        'username': '',
-        'password': '',
-        'raw': 'original_line',
-        'type': 'http' or 'socks5'
-    }
+class ProxyParseError(ValueError):
+    """
+    A proxy line that failed parsing or validation.
 
-    Raises:
-        ValueError: If proxy format is invalid or validation fails
+    kind is one of: 'empty', 'format', 'credentials', 'host', 'port'.
     """
-    import re
 
+    def __init__(self, message: str, kind: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+class ParseReport:
+    """Summary of a parsed proxy list: error counts by kind and a few sample lines of each."""
+
+    def __init__(self, samples_per_kind: Optional[int] = None):
+        self.samples_per_kind = config_module.PARSE_ERROR_SAMPLES if samples_per_kind is None else samples_per_kind
+        self.lines = 0
+        self.valid = 0
+        self.errors: Dict[str, int] = {}
+        self.samples: Dict[str, List[Tuple[int, str, str]]] = {}  # kind -> (line number, line, message)
+
+    @property
+    def invalid(self) -> int:
+        return self.lines - self.valid
+
+    def add_error(self, number: int, line: str, error: ProxyParseError) -> None:
+        self.errors[error.kind] = self.errors.get(error.kind, 0) + 1
+        samples = self.samples.setdefault(error.kind, [])
+        if len(samples) < self.samples_per_kind:
+            samples.append((number, line, str(error)))
+
+
+@lru_cache(maxsize=4096)
+def _host_error(host: str) -> Optional[str]:
+    """Why host is not a valid IPv4 address or hostname, or None (cached: lists repeat gateways)."""
+    # Validate IPv4 format if it looks like an IP
+    if _IPV4_PATTERN.match(host):
+        for octet in host.split('.'):
+            if int(octet) > 255:
+                return f"Invalid IPv4 address: {host}"
+
+    # Validate hostname format (basic DNS validation)
+    elif not _HOSTNAME_PATTERN.match(host):
+        return f"Invalid hostname format: {host}"
+    return None
+
+
+def _normalize_type(proxy_type: Optional[str]) -> Optional[str]:
+    """'http'/'socks'/'socks5' flag -> ProxyRecord.type (None stays None)."""
+    if not proxy_type:
+        return None
+    lowered = proxy_type.lower()
+    if lowered in ('socks', 'socks5'):
+        return 'socks5'
+    if lowered == 'http':
+        return 'http'
+    raise ValueError(f"Invalid proxy type: {proxy_type}. Must be 'http' or 'socks'")
+
+
+def _parse(line: str, proxy_type: Optional[str], ip_whitelist: bool) -> ProxyRecord:
+    """parse_proxy_line() with the type already normalized."""
     line = line.strip()
     if not line:
-        raise ValueError("Empty proxy line")
+        raise ProxyParseError("Empty proxy line", "empty")
 
-    host = None
-    port = None
     username = ''
     password = ''
 
@@ -75,20 +152,20 @@ def parse_proxy_line(line: str, proxy_type: str = None, ip_whitelist: bool = Fal
         # Split by @ to separate credentials from host:port
         parts = line.split('@')
         if len(parts) != 2:
-            raise ValueError(f"Invalid proxy format (expected username:password@host:port): {line}")
+            raise ProxyParseError(f"Invalid proxy format (expected username:password@host:port): {line}", "format")
 
         credentials, host_port = parts
 
         # Parse credentials
         cred_parts = credentials.split(':')
         if len(cred_parts) != 2:
-            raise ValueError(f"Invalid credentials format (expected username:password): {credentials}")
+            raise ProxyParseError(f"Invalid credentials format (expected username:password): {credentials}", "credentials")
         username, password = cred_parts
 
         # Parse host:port
         host_parts = host_port.split(':')
         if len(host_parts) != 2:
-            raise ValueError(f"Invalid host:port format: {host_port}")
+            raise ProxyParseError(f"Invalid host:port format: {host_port}", "format")
         host, port = host_parts
 
     else:
@@ -100,112 +177,264 @@ def parse_proxy_line(line: str, proxy_type: str = None, ip_whitelist: bool = Fal
             # Format 2: host:port:username:password
             host, port, username, password = parts
         else:
-            raise ValueError(f"Invalid proxy format (expected host:port:username:password or username:password@host:port): {line}")
+            raise ProxyParseError(f"Invalid proxy format (expected host:port:username:password or username:password@host:port): {line}", "format")
 
     # Validation
     if not host:
-        raise ValueError("Host cannot be empty")
+        raise ProxyParseError("Host cannot be empty", "host")
 
     if not port:
-        raise ValueError("Port cannot be empty")
+        raise ProxyParseError("Port cannot be empty", "port")
 
     # Validate port is numeric and in valid range
     try:
         port_num = int(port)
-        if port_num < 1 or port_num > 65535:
-            raise ValueError(f"Port must be between 1-65535, got: {port}")
-    except ValueError as e:
-        if "invalid literal" in str(e):
-            raise ValueError(f"Port must be numeric, got: {port}")
-        raise
+    except ValueError:
+        raise ProxyParseError(f"Port must be numeric, got: {port}", "port") from None
+    if port_num < 1 or port_num > 65535:
+        raise ProxyParseError(f"Port must be between 1-65535, got: {port}", "port")
 
+    # Username and password are required unless in IP whitelist mode
     if not ip_whitelist:
         if not username:
-            raise ValueError("Username cannot be empty")
+            raise ProxyParseError("Username cannot be empty", "credentials")
         if not password:
-            raise ValueError("Password cannot be empty")
-    
-    # Validate IPv4 format if it looks like an IP
-    if re.match(r'^\d+\.\d+\.\d+\.\d+$', host):
-        octets = host.split('.')
-        for octet in octets:
-            octet_num = int(octet)
-            if octet_num < 0 or octet_num > 255:
-                raise ValueError(f"Invalid IPv4 address: {host}")
-    
-    # Validate hostname format (basic DNS validation)
-    elif not re.match(r'^[a-zA-Z0-9]([a-zA-Z0-9\-\.]*[a-zA-Z0-9])?$', host):
-        raise ValueError(f"Invalid hostname format: {host}")
-    
-    # Build proxy dict
-    proxy = {
-        'host': host,
-        'port': port,
-        'username': username,
-        'password': password,
-        'raw': line,
+            raise ProxyParseError("Password cannot be empty", "credentials")
+
+    error = _host_error(host)
+    if error:
+        raise ProxyParseError(error, "host")
+
+    # Type must come from user flag or interactive prompt, NOT from port inference;
+    # without one it stays None and is set later by the caller from the user config
+    return ProxyRecord(host=host, port=port_num, username=username, password=password, raw=line, type=proxy_type)
+
+
+def parse_proxy_line(line: str, proxy_type: str = None, ip_whitelist: bool = False) -> ProxyRecord:
+    """
+    Parses proxies in two formats:
+    1. host:port:username:password
+    2. username:password@host:port
+
+    When ip_whitelist=True, also accepts:
+    3. host:port  (no credentials)
+
+    Supports both IPv4 addresses and DNS-based hostnames.
+
+    Args:
+        line: Raw proxy string
+        proxy_type: 'http' or 'socks' (from --http/--socks flag or interactive prompt)
+        ip_whitelist: If True, accept host:port format without credentials
+
+    Returns:
+    ProxyRecord, read like the dict it replaces:
+    {
+        'host': 'pg.proxi.es' or '192.168.1.1',
+        'port': 20000,
+        'username': '',
+        'password': '',
+        'raw': 'original_line',
+        'type': 'http' or 'socks5'
     }
-    
-    # Type must come from user flag or interactive prompt, NOT from port inference
-    if proxy_type:
-        # Normalize type names
-        if proxy_type.lower() in ['socks', 'socks5']:
-            proxy['type'] = 'socks5'
-        elif proxy_type.lower() == 'http':
-            proxy['type'] = 'http'
-        else:
-            raise ValueError(f"Invalid proxy type: {proxy_type}. Must be 'http' or 'socks'")
-    else:
-        # If no type specified, this will be set later by the user config
-        # Default to None and let the caller handle it
-        proxy['type'] = None
-    
-    return proxy
 
+    Raises:
+        ProxyParseError: If proxy format is invalid or validation fails
+        ValueError: If proxy_type is not 'http' or 'socks'
+    """
+    return _parse(line, _normalize_type(proxy_type), ip_whitelist)
 
-def get_location_from_ip(ip: str) -> str:
+
+def iter_parsed_proxies(lines: Iterable[str], proxy_type: str = None, ip_whitelist: bool = False,
+                        report: Optional[ParseReport] = None) -> Iterator[ProxyRecord]:
     """
-    Tries to resolve the location (City, Region, Country) for a given IP using:
-    1. ip-api.com (free, no token, 45 req/min)
-    2. ipwho.is as fallback
+    Parses and validates proxy lines lazily (see parse_proxy_line).
+
+    Invalid lines are skipped and counted in report instead of raising.
     """
-    if not ip:
-        return "N/A"
+    proxy_type = _normalize_type(proxy_type)
+    if report is None:
+        report = ParseReport()
+    for number, line in enumerate(lines, 1):
+        report.lines += 1
+        try:
+            proxy = _parse(line, proxy_type, ip_whitelist)
+        except ProxyParseError as e:
+            report.add_error(number, line, e)
+            continue
+        proxy.index = report.valid
+        report.valid += 1
+        yield proxy
+
+
+def parse_proxy_lines(lines: Iterable[str], proxy_type: str = None,
+                      ip_whitelist: bool = False) -> Tuple[List[ProxyRecord], ParseReport]:
+    """
+    Parses a whole proxy list at once.
+
+    Lines in either credential format that split cleanly and validate take a
+    fast path (partition/split, the cached host check, a record built
+    directly); everything else, including every invalid line, goes through
+    _parse(), so results and errors match parse_proxy_line().
 
+    Returns:
+        (valid proxies in input order, ParseReport for the invalid lines)
+    """
+    proxy_type = _normalize_type(proxy_type)
+    report = ParseReport()
+    proxies: List[ProxyRecord] = []
+    append = proxies.append
+    number = 0
+    # The records are all kept, so the cyclic GC would only rescan an ever
+    # growing list of them; pause it for the build
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
     try:
-        # Try ip-api.com first
-        ip_api_url = f"http://ip-api.com/json/{ip}"
-        resp = requests.get(ip_api_url, timeout=10)
-        if resp.status_code == 200:
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if '@' in line:
+                credentials, _, host_port = line.partition('@')
+                username, _, password = credentials.partition(':')
+                host, _, port = host_port.partition(':')
+                common = '@' not in host_port and ':' not in password and ':' not in port
+            else:
+                parts = line.split(':')
+                common = len(parts) == 4
+                if common:
+                    host, port, username, password = parts
+            if (common and username and password and host and port.isdecimal()
+                    and 0 < int(port) < 65536 and _host_error(host) is None):
+                proxy = ProxyRecord(host, port, username, password, line, proxy_type)
+            else:
+                try:
+                    proxy = _parse(line, proxy_type, ip_whitelist)
+                except ProxyParseError as e:
+                    report.add_error(number, line, e)
+                    continue
+            proxy.index = len(proxies)
+            append(proxy)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    report.lines = number
+    report.valid = len(proxies)
+    return proxies, report
+
+
+def proxy_key(proxy: ProxyRecord) -> Tuple[str, int, str, str]:
+    """Identity of a proxy endpoint + credentials, whichever line format it came from."""
+    return (proxy.host.lower(), proxy.port, proxy.username, proxy.password)
+
+
+def dedupe_proxies(proxies: List[ProxyRecord]) -> Tuple[List[ProxyRecord], List[int]]:
+    """
+    Normalizes proxies (lowercase host) and drops repeats.
+
+    Returns:
+        (unique proxies in first-seen order, owners) where owners[i] is the
+        index in the unique list of the i-th input proxy; fan_out() uses it
+        to map results back onto the original list
+    """
+    index: Dict[Tuple[str, int, str, str], int] = {}
+    unique = []
+    owners = []
+    for proxy in proxies:
+        key = proxy_key(proxy)
+        owner = index.get(key)
+        if owner is None:
+            owner = index[key] = len(unique)
+            proxy.host = key[0]
+            unique.append(proxy)
+        owners.append(owner)
+    return unique, owners
+
+
+def fan_out(results: list, owners: List[int]) -> list:
+    """One entry per original proxy: duplicates share the result of the proxy they repeat."""
+    return [results[owner] for owner in owners]
+
+
+def _join_location(data: dict, region_key: str) -> str:
+    return ", ".join(filter(None, [data.get("city", ""), data.get(region_key, ""), data.get("country", "")]))
+
+
+def location_from_ip_api(ip: str) -> Optional[str]:
+    """ip-api.com (free, no token, 45 req/min); None if it has no answer."""
+    # Direct (non-proxied) keep-alive session shared by all geo lookups
+    session = SESSIONS.get(None)
+    try:
+        resp = paced_request(IP_API, lambda: session.get(f"{config_module.GEO_IP_API_URL}/json/{ip}", timeout=10))
+        if resp is not None and resp.status_code == 200:
             data = resp.json()
             if data.get("status") == "success":
-                city = data.get("city", "")
-                region = data.get("regionName", "")
-                country = data.get("country", "")
-                return ", ".join(filter(None, [city, region, country]))
+                return _join_location(data, "regionName")
             elif data.get("status") == "fail":
                 print_warning(f"[GEO] ip-api.com failed: {data.get('message', 'Unknown error')}")
-
     except Exception as e:
         print_warning(f"[GEO] ip-api.com exception → {e}")
+    return None
 
-    # Fallback: ipwho.is
+
+def location_from_ipwho(ip: str) -> Optional[str]:
+    """ipwho.is; None if it has no answer."""
+    session = SESSIONS.get(None)
     try:
-        ipwho_url = f"https://ipwho.is/{ip}"
-        resp = requests.get(ipwho_url, timeout=10)
-        if resp.status_code == 200:
+        resp = paced_request(IPWHO, lambda: session.get(f"{config_module.GEO_IPWHO_URL}/{ip}", timeout=10))
+        if resp is not None and resp.status_code == 200:
             data = resp.json()
             if data.get("success", False):
-                city = data.get("city", "")
-                region = data.get("region", "")
-                country = data.get("country", "")
-                return ", ".join(filter(None, [city, region, country]))
+                return _join_location(data, "region")
             else:
                 print_warning(f"[GEO] ipwho.is failed: {data.get('message', 'Unknown error')}")
-
     except Exception as e:
         print_warning(f"[GEO] ipwho.is exception → {e}")
+    return None
 
+
+def locations_from_ip_api_batch(ips: List[str]) -> Dict[str, str]:
+    """
+    Locations of up to config.GEO_BATCH_SIZE IPs in one request to
+    ip-api.com's batch endpoint. IPs it has no answer for are left out
+    (all of them if the request itself fails).
+    """
+    session = SESSIONS.get(None)
+    query = [{"query": ip, "fields": "status,message,query,city,regionName,country"} for ip in ips]
+    try:
+        resp = paced_request(
+            IP_API_BATCH, lambda: session.post(f"{config_module.GEO_IP_API_URL}/batch", json=query, timeout=10)
+        )
+        if resp is None:
+            print_warning(f"[GEO] ip-api.com batch of {len(ips)} skipped: rate limit wait too long")
+            return {}
+        if resp.status_code != 200:
+            print_warning(f"[GEO] ip-api.com batch of {len(ips)} failed: HTTP {resp.status_code}")
+            return {}
+        answers = resp.json()
+    except Exception as e:
+        print_warning(f"[GEO] ip-api.com batch exception → {e}")
+        return {}
+    locations = {}
+    for data in answers if isinstance(answers, list) else []:
+        if isinstance(data, dict) and data.get("status") == "success" and data.get("query") in ips:
+            locations[data["query"]] = _join_location(data, "regionName")
+    return locations
+
+
+def get_location_from_ip(ip: str) -> str:
+    """
+    Tries to resolve the location (City, Region, Country) for a given IP using
+    ip-api.com (free, no token, 45 req/min) and ipwho.is, starting with the
+    one whose rate limit lets a request through soonest, or only the offline
+    database when --geo-db is given.
+    """
+    if not ip:
+        return "N/A"
+    location = offline_location(ip)
+    if location is not None:
+        return location
+    for lookup in quickest({IP_API: location_from_ip_api, IPWHO: location_from_ipwho}):
+        location = lookup(ip)
+        if location is not None:
+            return location
     return "N/A"
 
 
@@ -230,22 +459,59 @@ def save_results_to_file(results: list, filepath: str):
         save_results_as_txt(results, filepath)
 
 
+def csv_fieldnames(sampled: bool) -> list:
+    """CSV columns; sampled adds the --samples statistics."""
+    phase_columns = [PHASE_LABELS[phase] for phase in PHASES]
+    sample_columns = [SAMPLE_LABELS[key] for key in SAMPLE_STATS] if sampled else []
+    return ["Index", "Type", "IP", "Location", "Latency"] + sample_columns + phase_columns + ["Speed", "Status"]
+
+
+def csv_row(row, index, fieldnames: list, sampled: bool) -> dict:
+    """One result as a CSV row (index as shown in the Index column)."""
+    row = display_row(row)
+    filtered_row = {k: row.get(k, "") for k in fieldnames}
+    filtered_row.update(format_phases(row.get("Phases")))
+    if sampled:
+        filtered_row.update(format_sample_stats(row.get("SampleStats")))
+    filtered_row["Index"] = index
+    return filtered_row
+
+
+def txt_header(sampled: bool) -> str:
+    sample_header = "".join(f"\t{SAMPLE_LABELS[key]}" for key in SAMPLE_STATS) if sampled else ""
+    return f"Index\tType\tIP\tLocation\tLatency{sample_header}\tSpeed\tStatus\n"
+
+
+def txt_line(row, index, sampled: bool) -> str:
+    """One result as a tab-separated TXT line (index as shown in the Index column)."""
+    row = display_row(row)
+    sample_cells = "".join(f"\t{value}" for value in format_sample_stats(row.get("SampleStats")).values()) if sampled else ""
+    return f"{index}\t{row.get('Type','')}\t{row.get('IP','')}\t{row.get('Location','')}\t{row.get('Latency','')}{sample_cells}\t{row.get('Speed','')}\t{row.get('Status','')}\n"
+
+
+def _row_index(row, idx: int):
+    index = row.get("original_index", idx)
+    # Ensure index is 1-based
+    if isinstance(index, int):
+        index = index + 1 if index == 0 else index
+    return index
+
+
 def save_results_as_csv(results: list, filepath: str):
     """
     Saves proxy test results to a CSV file at the specified path.
+    The file is written next to it first and then moved into place, so an
+    earlier (e.g. incrementally written) file survives a crash mid-save.
     """
-    fieldnames = ["Index", "Type", "IP", "Location", "Latency", "Speed", "Status"]
+    sampled = any(row.get("SampleStats") for row in results)
+    fieldnames = csv_fieldnames(sampled)
     try:
-        with open(filepath, mode='w', newline='', encoding='utf-8') as file:
+        with open(filepath + ".tmp", mode='w', newline='', encoding='utf-8') as file:
             writer = csv.DictWriter(file, fieldnames=fieldnames)
             writer.writeheader()
             for idx, row in enumerate(results, 1):
-                filtered_row = {k: row.get(k, "") for k in fieldnames}
-                filtered_row["Index"] = row.get("original_index", idx)
-                # Ensure index is 1-based
-                if isinstance(filtered_row["Index"], int):
-                    filtered_row["Index"] = filtered_row["Index"] + 1 if filtered_row["Index"] == 0 else filtered_row["Index"]
-                writer.writerow(filtered_row)
+                writer.writerow(csv_row(row, _row_index(row, idx), fieldnames, sampled))
+        os.replace(filepath + ".tmp", filepath)
         print_info(f"Results saved to {filepath}")
     except Exception as e:
         print_error(f"Failed to save results: {str(e)}")
@@ -253,20 +519,17 @@ def save_results_as_csv(results: list, filepath: str):
 
 def save_results_as_txt(results: list, filepath: str):
     """
-    Saves proxy test results to a TXT file at the specified path.
+    Saves proxy test results to a TXT file at the specified path
+    (written aside and moved into place, like save_results_as_csv).
     """
+    sampled = any(row.get("SampleStats") for row in results)
     try:
-        with open(filepath, mode='w', encoding='utf-8') as file:
+        with open(filepath + ".tmp", mode='w', encoding='utf-8') as file:
             # Write header
-            file.write("Index\tType\tIP\tLocation\tLatency\tSpeed\tStatus\n")
+            file.write(txt_header(sampled))
             for idx, row in enumerate(results, 1):
-                index = row.get("original_index", idx)
-                # Ensure index is 1-based
-                if isinstance(index, int):
-                    index = index + 1 if index == 0 else index
-                file.write(f"{index}\t{row.get('Type','')}\t{row.get('IP','')}\t{row.get('Location','')}\t{row.get('Latency','')}\t{row.get('Speed','')}\t{row.get('Status','')}\n")
+                file.write(txt_line(row, _row_index(row, idx), sampled))
+        os.replace(filepath + ".tmp", filepath)
         print_info(f"Results saved to {filepath}")
     except Exception as e:
         print_error(f"Failed to save results: {str(e)}")
-
-
@@ -0,0 +1,39 @@
+# conftest.py
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.config as config_module
+import src.rate_limit as rate_limit
+from src.geo_cache import GEO_CACHE
+from src.rate_limit import GeoRateLimits
+from tests.proxy_servers import FakeGeoAPI
+
+
+@pytest.fixture
+def geo_api(monkeypatch):
+    """
+    Starts a FakeGeoAPI (keyword arguments as for FakeGeoAPI) that both geo
+    services point at, with an empty location cache, fresh rate-limit buckets
+    and no pacing; the servers are closed afterwards.
+    """
+    apis = []
+
+    def start(**kwargs):
+        api = FakeGeoAPI(**kwargs)
+        apis.append(api)
+        monkeypatch.setattr(config_module, "GEO_IP_API_URL", api.url)
+        monkeypatch.setattr(config_module, "GEO_IPWHO_URL", api.url)
+        return api
+
+    # Unpaced: most tests are about which requests are made, not when
+    monkeypatch.setattr(config_module, "GEO_RATE_LIMITS", {})
+    monkeypatch.setattr(rate_limit, "GEO_LIMITS", GeoRateLimits())
+    GEO_CACHE.clear()
+    yield start
+    GEO_CACHE.clear()
+    for api in apis:
+        api.close()
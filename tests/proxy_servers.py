@@ -0,0 +1,220 @@
+# proxy_servers.py
+"""
+Local stand-in proxies for tests.
+
+Both servers answer every request themselves with the JSON document the IP
+echo endpoint would return, so connectivity checks can be exercised on
+loopback without touching the network.
+"""
+import json
+import socketserver
+import struct
+import threading
+
+FAKE_EXIT_IP = "203.0.113.7"
+
+
+def _read_request(rfile):
+    """Read one request head; returns the header lines or None on EOF."""
+    lines = []
+    while True:
+        line = rfile.readline()
+        if not line:
+            return None
+        if line in (b"\r\n", b"\n"):
+            return lines
+        lines.append(line.decode("iso-8859-1").rstrip("\r\n"))
+
+
+def _serve_http(handler, require_auth=None, echo=None):
+    """Answer requests on a connection until the client closes it (with echo as the JSON body if given)."""
+    while True:
+        lines = _read_request(handler.rfile)
+        if not lines:
+            return
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if require_auth and headers.get("proxy-authorization") != require_auth:
+            handler.wfile.write(b"HTTP/1.1 407 Proxy Authentication Required\r\nContent-Length: 0\r\n\r\n")
+            return
+
+        body = json.dumps(echo if echo is not None else {"ip": FAKE_EXIT_IP, "country": "Testland", "cc": "TL"}).encode()
+        keep_alive = headers.get("connection", "").lower() == "keep-alive"
+        handler.wfile.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n".encode()
+            + (b"Connection: keep-alive\r\n" if keep_alive else b"Connection: close\r\n")
+            + b"\r\n" + body
+        )
+        handler.wfile.flush()
+        if not keep_alive:
+            return
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+class FakeHTTPProxy:
+    """Threaded HTTP proxy on 127.0.0.1 that serves the echo response itself."""
+
+    def __init__(self, require_auth=None, echo=None):
+        require = require_auth
+        owner = self
+        self.connections = 0
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                owner.connections += 1
+                _serve_http(self, require, echo)
+
+        self.server = _Server(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeSocks5Proxy:
+    """Threaded SOCKS5 proxy on 127.0.0.1 with optional username/password auth."""
+
+    def __init__(self, username="", password=""):
+        creds = (username, password)
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                rfile, wfile = self.rfile, self.wfile
+                version, nmethods = rfile.read(2)
+                methods = rfile.read(nmethods)
+                if creds[0]:
+                    if 2 not in methods:
+                        wfile.write(b"\x05\xff")
+                        return
+                    wfile.write(b"\x05\x02")
+                    rfile.read(1)
+                    user = rfile.read(rfile.read(1)[0]).decode()
+                    pwd = rfile.read(rfile.read(1)[0]).decode()
+                    if (user, pwd) != creds:
+                        wfile.write(b"\x01\x01")
+                        return
+                    wfile.write(b"\x01\x00")
+                else:
+                    wfile.write(b"\x05\x00")
+
+                _, cmd, _, atyp = rfile.read(4)
+                if atyp == 1:
+                    rfile.read(4)
+                elif atyp == 3:
+                    rfile.read(rfile.read(1)[0])
+                else:
+                    rfile.read(16)
+                rfile.read(2)
+                wfile.write(b"\x05\x00\x00\x01" + bytes(4) + struct.pack("!H", 0))
+                _serve_http(self)
+
+        self.server = _Server(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeGeoAPI:
+    """
+    Stand-in for ip-api.com (/batch, /json/<ip>) and ipwho.is (/<ip>) on 127.0.0.1.
+
+    Every IP is located in "City <ip>" unless it is in batch_misses (ip-api
+    has no answer for it) or batch_status makes the whole batch fail. The
+    first `throttled` requests get a 429 with the given Retry-After header.
+    Requests are logged as (method, path, number of IPs).
+    """
+
+    def __init__(self, batch_misses=(), batch_status=200, throttled=0, retry_after=None):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        owner = self
+        self.batch_misses = set(batch_misses)
+        self.batch_status = batch_status
+        self.throttled = throttled
+        self.retry_after = retry_after
+        self.requests = []
+        lock = threading.Lock()
+
+        def throttle():
+            with lock:
+                if owner.throttled <= 0:
+                    return False
+                owner.throttled -= 1
+                return True
+
+        def located(ip):
+            return {"city": f"City {ip}", "country": "Testland"}
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, document):
+                body = json.dumps(document).encode()
+                self.send_response(status)
+                if status == 429 and owner.retry_after is not None:
+                    self.send_header("Retry-After", owner.retry_after)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                owner.requests.append(("POST", self.path, len(query)))
+                if throttle():
+                    self._send(429, {"message": "too many requests"})
+                    return
+                if owner.batch_status != 200:
+                    self._send(owner.batch_status, {"message": "too many requests"})
+                    return
+                answers = []
+                for item in query:
+                    ip = item["query"] if isinstance(item, dict) else item
+                    if ip in owner.batch_misses:
+                        answers.append({"status": "fail", "message": "reserved range", "query": ip})
+                    else:
+                        answers.append(dict(located(ip), status="success", regionName="", query=ip))
+                self._send(200, answers)
+
+            def do_GET(self):
+                owner.requests.append(("GET", self.path, 1))
+                if throttle():
+                    self._send(429, {"message": "too many requests"})
+                elif self.path.startswith("/json/"):
+                    ip = self.path[len("/json/"):]
+                    self._send(200, dict(located(ip), status="success", regionName=""))
+                else:
+                    self._send(200, dict(located(self.path[1:]), success=True, region=""))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def closed_port():
+    """Return a loopback port with nothing listening on it."""
+    import socket
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
@@ -0,0 +1,127 @@
+# test_async_tester.py
+import sys
+import os
+import asyncio
+import socket
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.async_tester as async_tester
+from src.async_tester import check_proxy_async, run_async_checks
+from src.raw_http import basic_auth
+from src.utils import parse_proxy_line
+from tests.proxy_servers import FakeHTTPProxy, FakeSocks5Proxy, FAKE_EXIT_IP, closed_port
+
+
+def test_async_http_check_working():
+    server = FakeHTTPProxy(require_auth=basic_auth("user", "pass"))
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:pass", "http")
+        results = run_async_checks([proxy], "http", concurrency=10)
+        assert results[0]["Status"] == "Working"
+        assert results[0]["IP"] == FAKE_EXIT_IP
+        assert results[0]["Type"] == "HTTP"
+        assert results[0].latency > 0
+    finally:
+        server.close()
+
+
+def test_async_http_check_bad_credentials():
+    server = FakeHTTPProxy(require_auth=basic_auth("user", "pass"))
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:wrong", "http")
+        results = run_async_checks([proxy], "http")
+        assert results[0]["Status"] == "Failed"
+        assert "407" in results[0]["Error"]
+    finally:
+        server.close()
+
+
+def test_async_socks_check_working():
+    server = FakeSocks5Proxy("user", "pass")
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:pass", "socks")
+        results = run_async_checks([proxy], "socks")
+        assert results[0]["Status"] == "Working"
+        assert results[0]["IP"] == FAKE_EXIT_IP
+        assert results[0]["Type"] == "SOCKS5"
+    finally:
+        server.close()
+
+
+def test_async_checks_keep_order_and_report_progress():
+    server = FakeHTTPProxy()
+    dead_port = closed_port()
+    try:
+        lines = [
+            f"127.0.0.1:{server.port}:u:p",
+            f"127.0.0.1:{dead_port}:u:p",
+            f"127.0.0.1:{server.port}:u:p",
+        ]
+        proxies = [parse_proxy_line(line, "http") for line in lines]
+        seen = []
+        results = run_async_checks(proxies, "http", concurrency=2, on_result=lambda i, r: seen.append(i))
+        assert [r["Status"] for r in results] == ["Working", "Failed", "Working"]
+        assert sorted(seen) == [0, 1, 2]
+    finally:
+        server.close()
+
+
+def test_non_object_echo_fails_only_that_proxy():
+    portal = FakeHTTPProxy(echo=[1])
+    server = FakeHTTPProxy()
+    try:
+        proxies = [parse_proxy_line(f"127.0.0.1:{port}:u:p", "http") for port in (server.port, portal.port, server.port)]
+        results = run_async_checks(proxies, "http", concurrency=3)
+        assert [r["Status"] for r in results] == ["Working", "Failed", "Working"]
+        assert "not a JSON object" in results[1]["Error"]
+    finally:
+        portal.close()
+        server.close()
+
+
+def test_unexpected_error_fails_only_that_proxy(monkeypatch):
+    server = FakeHTTPProxy()
+    real_check = async_tester.check_proxy_async
+
+    async def flaky_check(proxy, proxy_type, timeout=None):
+        if proxy.port == 1:
+            raise RuntimeError("boom")
+        return await real_check(proxy, proxy_type, timeout)
+
+    monkeypatch.setattr(async_tester, "check_proxy_async", flaky_check)
+    try:
+        proxies = [parse_proxy_line(f"127.0.0.1:{port}:u:p", "http") for port in (server.port, 1, server.port)]
+        results = run_async_checks(proxies, "http", concurrency=3)
+        assert [r["Status"] for r in results] == ["Working", "Failed", "Working"]
+        assert results[1]["Error"] == "boom"
+    finally:
+        server.close()
+
+
+def test_every_resolved_address_is_tried(monkeypatch):
+    server = FakeHTTPProxy()
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host != "proxy.test":
+            return real_getaddrinfo(host, port, *args, **kwargs)
+        # Nothing listens on 127.0.0.2; the second address is the proxy
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in ("127.0.0.2", "127.0.0.1")]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    try:
+        proxy = parse_proxy_line(f"proxy.test:{server.port}:u:p", "http")
+        result = asyncio.run(check_proxy_async(proxy, "http"))
+        assert result["Status"] == "Working"
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    test_async_http_check_working()
+    test_async_http_check_bad_credentials()
+    test_async_socks_check_working()
+    test_async_checks_keep_order_and_report_progress()
+    test_non_object_echo_fails_only_that_proxy()
+    print("All async tester tests passed.")
@@ -0,0 +1,90 @@
+# test_budget.py
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.budget as budget
+import src.config as config_module
+from src.budget import DEADLINE, DeadlineExceeded, LatencyTracker, cut_off, request_timeouts, start_budget
+from src.retry import is_retriable
+from src.threaded_tester import run_threaded_checks
+from src.utils import parse_proxy_line
+
+
+def _with_tracker(latencies, connect=0.05):
+    tracker = LatencyTracker()
+    for latency in latencies:
+        tracker.observe({"connect": connect}, latency)
+    return tracker
+
+
+def test_timeouts_are_fixed_without_budget():
+    config_module.SCAN_DEADLINE = None
+    assert request_timeouts() == (config_module.CONNECT_TIMEOUT, config_module.REQUEST_TIMEOUT)
+
+
+def test_timeouts_follow_p95_once_warmed_up():
+    saved = budget.TRACKER
+    try:
+        start_budget(3600)
+        budget.TRACKER = _with_tracker([0.2] * (config_module.BUDGET_WARMUP_SAMPLES - 1))
+        assert request_timeouts() == (config_module.CONNECT_TIMEOUT, config_module.REQUEST_TIMEOUT)
+
+        budget.TRACKER = _with_tracker([0.5] * 95 + [9.0] * 5, connect=0.4)
+        connect, read = request_timeouts()
+        factor = config_module.BUDGET_TIMEOUT_MULTIPLIER
+        assert abs(read - factor * 0.5) < 1e-9
+        assert abs(connect - factor * 0.4) < 1e-9
+
+        budget.TRACKER = _with_tracker([0.01] * 100, connect=0.01)
+        assert request_timeouts() == (config_module.BUDGET_MIN_TIMEOUT, config_module.BUDGET_MIN_TIMEOUT)
+    finally:
+        budget.TRACKER = saved
+        config_module.SCAN_DEADLINE = None
+
+
+def test_timeouts_never_exceed_time_left():
+    try:
+        start_budget(0.5)
+        connect, read = request_timeouts()
+        assert connect <= 0.5 and read <= 0.5
+    finally:
+        config_module.SCAN_DEADLINE = None
+
+
+def test_expired_budget_raises_and_is_final():
+    try:
+        config_module.SCAN_DEADLINE = time.time() - 1
+        try:
+            request_timeouts()
+            assert False, "expected DeadlineExceeded"
+        except DeadlineExceeded as e:
+            assert not is_retriable(e)
+        assert cut_off("timeout")
+        assert not cut_off("unreachable")
+    finally:
+        config_module.SCAN_DEADLINE = None
+    assert not cut_off("timeout")
+
+
+def test_unchecked_proxies_are_marked_deadline():
+    proxies = [parse_proxy_line(f"127.0.0.1:{9000 + i}:u:p", "http") for i in range(3)]
+    try:
+        config_module.SCAN_DEADLINE = time.time() - 1
+        seen = []
+        results = run_threaded_checks(proxies, "http", on_result=lambda i, r: seen.append(i))
+        assert [r["Status"] for r in results] == [DEADLINE] * 3
+        assert sorted(seen) == [0, 1, 2]
+    finally:
+        config_module.SCAN_DEADLINE = None
+
+
+if __name__ == "__main__":
+    test_timeouts_are_fixed_without_budget()
+    test_timeouts_follow_p95_once_warmed_up()
+    test_timeouts_never_exceed_time_left()
+    test_expired_budget_raises_and_is_final()
+    test_unchecked_proxies_are_marked_deadline()
+    print("All budget tests passed.")
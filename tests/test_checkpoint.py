@@ -0,0 +1,94 @@
+# test_checkpoint.py
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.checkpoint import JournalWriter, fingerprint, load_journal, remaining
+from src.records import ProxyResult, Status
+from src.sharding import CHECK, GEO, SPEED
+from src.utils import parse_proxy_lines
+
+
+def _proxies():
+    proxies, _ = parse_proxy_lines([f"gw.example.com:{8000 + i}:user:pass" for i in range(3)], "http")
+    return proxies
+
+
+def test_journal_round_trip():
+    proxies = _proxies()
+    input_id = fingerprint(proxies, "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "scan.journal")
+        journal = JournalWriter(path, input_id)
+        working = ProxyResult("HTTP", Status.WORKING)
+        working.latency = 0.12
+        journal.record(CHECK, proxies[0], working)
+        journal.record(CHECK, proxies[2], ProxyResult("HTTP", Status.FAILED, "refused"))
+        working.location = "Paris, France"
+        journal.record(GEO, proxies[0], working)
+        journal.close()
+
+        progress = load_journal(path, input_id)
+        assert sorted(progress) == [0, 2]
+        phases, result = progress[0]
+        assert phases == {CHECK, GEO}
+        assert result.working and result.latency == 0.12 and result["Location"] == "Paris, France"
+        assert progress[2][1].error == "refused"
+        assert remaining(phases, result, geo=True, speed=True) == (False, True)
+        assert remaining(*progress[2], geo=True, speed=True) == (False, False)
+
+        # Resuming appends to the same journal; a retried check starts the proxy over
+        journal = JournalWriter(path, input_id, resume=True)
+        journal.record(SPEED, proxies[0], working)
+        journal.record(CHECK, proxies[2], working)
+        journal.close()
+        progress = load_journal(path, input_id)
+        assert progress[0][0] == {CHECK, GEO, SPEED}
+        assert progress[2][0] == {CHECK} and progress[2][1].working
+
+
+def test_cut_off_line_is_dropped():
+    proxies = _proxies()
+    input_id = fingerprint(proxies, "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "scan.journal")
+        journal = JournalWriter(path, input_id)
+        journal.record(CHECK, proxies[0], ProxyResult("HTTP", Status.WORKING))
+        journal.close()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"i":1,"phase":"check","resu')
+
+        assert list(load_journal(path, input_id)) == [0]
+        journal = JournalWriter(path, input_id, resume=True)
+        journal.record(CHECK, proxies[1], ProxyResult("HTTP", Status.WORKING))
+        journal.close()
+        assert sorted(load_journal(path, input_id)) == [0, 1]
+
+
+def test_journal_of_another_list_is_refused():
+    proxies = _proxies()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "scan.journal")
+        JournalWriter(path, fingerprint(proxies, "http")).close()
+        for expected in (fingerprint(proxies[:2], "http"), fingerprint(proxies, "socks")):
+            try:
+                load_journal(path, expected)
+                assert False, "expected ValueError"
+            except ValueError:
+                pass
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Index,Type\n")
+        try:
+            load_journal(path, fingerprint(proxies, "http"))
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_journal_round_trip()
+    test_cut_off_line_is_dropped()
+    test_journal_of_another_list_is_refused()
+    print("All checkpoint tests passed.")
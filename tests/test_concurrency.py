@@ -0,0 +1,84 @@
+# test_concurrency.py
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.concurrency import AdaptiveLimiter
+from src.config import ADAPTIVE_INCREASE_STEP, ADAPTIVE_MIN_WINDOW
+
+
+def _run_window(limiter, latency=0.1, error_kind=None, count=None):
+    for _ in range(count or max(ADAPTIVE_MIN_WINDOW, limiter.limit)):
+        limiter.started()
+        limiter.record(None if error_kind else latency, error_kind)
+
+
+def test_healthy_windows_increase_limit():
+    limiter = AdaptiveLimiter(initial=16, maximum=1000)
+    _run_window(limiter)
+    _run_window(limiter)
+    assert limiter.limit == 16 + 2 * ADAPTIVE_INCREASE_STEP
+
+
+def test_limit_never_exceeds_maximum():
+    limiter = AdaptiveLimiter(initial=16, maximum=20)
+    for _ in range(5):
+        _run_window(limiter)
+    assert limiter.limit == 20
+
+
+def test_local_socket_error_halves_immediately():
+    limiter = AdaptiveLimiter(initial=64, maximum=1000)
+    limiter.started()
+    limiter.record(None, "local")
+    assert limiter.limit == 32
+
+
+def test_latency_spike_backs_off():
+    limiter = AdaptiveLimiter(initial=32, maximum=1000)
+    _run_window(limiter, latency=0.1)
+    raised = limiter.limit
+    _run_window(limiter, latency=0.5)
+    assert limiter.limit == raised // 2
+
+
+def test_rate_limiting_backs_off():
+    limiter = AdaptiveLimiter(initial=32, maximum=1000)
+    _run_window(limiter, error_kind="rate_limited")
+    assert limiter.limit == 16
+
+
+def test_steady_dead_proxy_rate_does_not_back_off():
+    limiter = AdaptiveLimiter(initial=16, maximum=1000)
+    for _ in range(3):
+        # 60% of every window are dead proxies, which is normal for a list
+        window = max(ADAPTIVE_MIN_WINDOW, limiter.limit)
+        dead = int(window * 0.6)
+        _run_window(limiter, error_kind="unreachable", count=dead)
+        _run_window(limiter, latency=0.1, count=window - dead)
+    assert limiter.limit > 16
+
+
+def test_summary_reports_curve():
+    limiter = AdaptiveLimiter(initial=16, maximum=1000)
+    _run_window(limiter)
+    limiter.started()
+    limiter.record(None, "local")
+    summary = limiter.summary()
+    assert summary["start"] == 16
+    assert summary["max"] == 16 + ADAPTIVE_INCREASE_STEP
+    assert summary["final"] == limiter.limit
+    assert summary["adjustments"] == 2
+    assert [limit for _, limit in summary["curve"]] == [16, 24, 12]
+
+
+if __name__ == "__main__":
+    test_healthy_windows_increase_limit()
+    test_limit_never_exceeds_maximum()
+    test_local_socket_error_halves_immediately()
+    test_latency_spike_backs_off()
+    test_rate_limiting_backs_off()
+    test_steady_dead_proxy_rate_does_not_back_off()
+    test_summary_reports_curve()
+    print("All concurrency tests passed.")
@@ -0,0 +1,191 @@
+# test_distributed.py
+import sys
+import os
+import socket
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.distributed import Coordinator, ProtocolError, _Channel, connect, parse_address, run_worker
+
+
+def _proxies(count):
+    return [{"raw": f"10.0.0.{i}:8080:u:p", "host": f"10.0.0.{i}", "port": "8080"} for i in range(count)]
+
+
+def fake_check(proxies, config, on_result):
+    for i, proxy in enumerate(proxies):
+        on_result(i, {"Type": "HTTP", "IP": proxy["host"], "Status": "Working"})
+
+
+def _start_workers(coordinator, count):
+    done = []
+    threads = [
+        threading.Thread(target=lambda n=n: done.append(
+            run_worker(coordinator.address, coordinator.token, check=fake_check, name=f"w{n}")
+        ))
+        for n in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, done
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:9000") == (socket.AF_INET, ("127.0.0.1", 9000))
+    assert parse_address(":9000") == (socket.AF_INET, ("127.0.0.1", 9000))
+    assert parse_address("[::1]:9000") == (socket.AF_INET6, ("::1", 9000))
+    if hasattr(socket, "AF_UNIX"):
+        assert parse_address("unix:/tmp/fwz.sock") == (socket.AF_UNIX, "/tmp/fwz.sock")
+    for bad in ("localhost", "host:port", "unix:"):
+        try:
+            parse_address(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+
+def test_coordinator_merges_results_from_several_workers():
+    proxies = _proxies(23)
+    coordinator = Coordinator(proxies, {"type": "http"}, "127.0.0.1:0", unit_size=4)
+    coordinator.start()
+    try:
+        threads, done = _start_workers(coordinator, 3)
+        results = coordinator.wait()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert [r["IP"] for r in results] == [p["host"] for p in proxies]
+        assert sum(done) == 6  # every unit completed exactly once
+        assert coordinator.workers_seen == 3
+    finally:
+        coordinator.close()
+
+
+def test_results_are_reported_one_at_a_time():
+    active = []
+    overlaps = []
+
+    def on_result(index, result):
+        active.append(index)
+        if len(active) > 1:
+            overlaps.append(index)
+        time.sleep(0.01)
+        active.remove(index)
+
+    coordinator = Coordinator(_proxies(20), {"type": "http"}, "127.0.0.1:0", unit_size=2, on_result=on_result)
+    coordinator.start()
+    try:
+        threads, _ = _start_workers(coordinator, 4)
+        coordinator.wait()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert overlaps == []
+    finally:
+        coordinator.close()
+
+
+def test_unit_of_disconnected_worker_is_reassigned():
+    proxies = _proxies(6)
+    coordinator = Coordinator(proxies, {"type": "http"}, "127.0.0.1:0", unit_size=3)
+    coordinator.start()
+    try:
+        # A worker that takes a unit and dies before finishing it
+        channel = _Channel(connect(coordinator.address))
+        channel.send({"op": "hello", "worker": "doomed", "token": coordinator.token})
+        channel.recv()
+        channel.send({"op": "request"})
+        lost = channel.recv()
+        assert lost["op"] == "unit"
+        channel.send({"op": "result", "unit": lost["unit"], "index": lost["indices"][0],
+                      "result": {"IP": "partial", "Status": "Working"}})
+        channel.close()
+
+        threads, done = _start_workers(coordinator, 1)
+        results = coordinator.wait()
+        threads[0].join(timeout=10)
+        assert all(r is not None for r in results)
+        assert coordinator.reassigned == 1
+        assert done == [2]
+    finally:
+        coordinator.close()
+
+
+def test_expired_lease_is_reassigned():
+    proxies = _proxies(2)
+    coordinator = Coordinator(proxies, {"type": "http"}, "127.0.0.1:0", unit_size=2, lease_timeout=0.2)
+    coordinator.start()
+    try:
+        # A worker that takes a unit and then hangs without closing the connection
+        channel = _Channel(connect(coordinator.address))
+        channel.send({"op": "hello", "token": coordinator.token})
+        channel.recv()
+        channel.send({"op": "request"})
+        assert channel.recv()["op"] == "unit"
+
+        threads, done = _start_workers(coordinator, 1)
+        results = coordinator.wait()
+        threads[0].join(timeout=10)
+        assert [r["IP"] for r in results] == ["10.0.0.0", "10.0.0.1"]
+        assert coordinator.reassigned == 1
+        channel.close()
+    finally:
+        coordinator.close()
+
+
+def test_workers_without_the_token_get_nothing():
+    coordinator = Coordinator(_proxies(2), {"type": "http"}, "127.0.0.1:0", token="s3cret")
+    coordinator.start()
+    try:
+        # Wrong token: refused before any unit (and its credentials) is served
+        channel = _Channel(connect(coordinator.address))
+        channel.send({"op": "hello", "token": "guess"})
+        assert channel.recv() == {"op": "error", "message": "invalid token"}
+        assert channel.recv() is None
+        channel.close()
+
+        # No hello at all: dropped on the first message
+        channel = _Channel(connect(coordinator.address))
+        channel.send({"op": "request"})
+        assert channel.recv() is None
+        channel.close()
+
+        try:
+            run_worker(coordinator.address, "guess", check=fake_check)
+            assert False, "expected ProtocolError"
+        except ProtocolError:
+            pass
+        assert coordinator.workers_seen == 0
+        assert coordinator.results == [None, None]
+    finally:
+        coordinator.close()
+
+
+def test_unix_socket_transport():
+    if not hasattr(socket, "AF_UNIX"):
+        return
+    path = os.path.join(tempfile.mkdtemp(), "coordinator.sock")
+    proxies = _proxies(5)
+    coordinator = Coordinator(proxies, {"type": "http"}, f"unix:{path}", unit_size=2)
+    coordinator.start()
+    try:
+        threads, _ = _start_workers(coordinator, 2)
+        results = coordinator.wait()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert [r["IP"] for r in results] == [p["host"] for p in proxies]
+    finally:
+        coordinator.close()
+    assert not os.path.exists(path)
+
+
+if __name__ == "__main__":
+    test_parse_address()
+    test_coordinator_merges_results_from_several_workers()
+    test_results_are_reported_one_at_a_time()
+    test_unit_of_disconnected_worker_is_reassigned()
+    test_expired_lease_is_reassigned()
+    test_workers_without_the_token_get_nothing()
+    test_unix_socket_transport()
+    print("All distributed tests passed.")
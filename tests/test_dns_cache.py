@@ -0,0 +1,102 @@
+# test_dns_cache.py
+import sys
+import os
+import socket
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.dns_cache as dns_cache
+from src.dns_cache import DNSCache
+
+
+def _counting_resolver(answers, delay=0.0):
+    """Stand-in for the system resolver that records each name it is asked for."""
+    calls = []
+
+    def getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        if flags & socket.AI_NUMERICHOST or dns_cache.is_ip(host):
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (host, port))]
+        calls.append(host)
+        time.sleep(delay)
+        if host not in answers:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 0)) for address in answers[host]]
+    return getaddrinfo, calls
+
+
+def test_concurrent_lookups_are_deduplicated(monkeypatch):
+    fake, calls = _counting_resolver({"gw.example": ["10.0.0.1"]}, delay=0.1)
+    monkeypatch.setattr(dns_cache, "_system_getaddrinfo", fake)
+    cache = DNSCache(use_dnspython=False)
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(cache.addresses("gw.example")))
+               for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["gw.example"]
+    assert answers == [["10.0.0.1"]] * 20
+    assert cache.lookups == 1 and cache.hits == 19
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    fake, calls = _counting_resolver({"gw.example": ["10.0.0.1"]})
+    monkeypatch.setattr(dns_cache, "_system_getaddrinfo", fake)
+    cache = DNSCache(ttl=0.1, use_dnspython=False)
+    cache.addresses("GW.example")
+    cache.addresses("gw.example")
+    assert calls == ["gw.example"]
+    assert cache.cached("gw.example")
+    time.sleep(0.15)
+    assert not cache.cached("gw.example")
+    cache.addresses("gw.example")
+    assert len(calls) == 2
+
+
+def test_failures_are_cached(monkeypatch):
+    fake, calls = _counting_resolver({})
+    monkeypatch.setattr(dns_cache, "_system_getaddrinfo", fake)
+    cache = DNSCache(negative_ttl=60, use_dnspython=False)
+    for _ in range(3):
+        try:
+            cache.addresses("missing.example")
+            assert False, "expected gaierror"
+        except socket.gaierror:
+            pass
+    assert calls == ["missing.example"]
+    address, error = cache.resolve("missing.example", 8080)
+    assert address is None and "missing.example" in error
+
+
+def test_getaddrinfo_answers_any_port_from_one_entry(monkeypatch):
+    fake, calls = _counting_resolver({"gw.example": ["10.0.0.1", "10.0.0.2"]})
+    monkeypatch.setattr(dns_cache, "_system_getaddrinfo", fake)
+    cache = DNSCache(use_dnspython=False)
+    first = cache.getaddrinfo("gw.example", 8001, 0, socket.SOCK_STREAM)
+    second = cache.getaddrinfo("gw.example", 8002, 0, socket.SOCK_STREAM)
+    assert [info[4] for info in first] == [("10.0.0.1", 8001), ("10.0.0.2", 8001)]
+    assert [info[4] for info in second] == [("10.0.0.1", 8002), ("10.0.0.2", 8002)]
+    assert calls == ["gw.example"]
+    # IP literals skip the cache entirely
+    cache.getaddrinfo("10.0.0.9", 80)
+    assert cache.lookups == 1
+
+
+def test_install_routes_socket_lookups_through_cache():
+    try:
+        dns_cache.install()
+        assert socket.getaddrinfo == dns_cache.DNS_CACHE.getaddrinfo
+        before = dns_cache.DNS_CACHE.lookups + dns_cache.DNS_CACHE.hits
+        socket.getaddrinfo("localhost", 80, 0, socket.SOCK_STREAM)
+        assert dns_cache.DNS_CACHE.lookups + dns_cache.DNS_CACHE.hits == before + 1
+    finally:
+        dns_cache.uninstall()
+    assert socket.getaddrinfo is dns_cache._system_getaddrinfo
+
+
+if __name__ == "__main__":
+    test_install_routes_socket_lookups_through_cache()
+    print("All DNS cache tests passed.")
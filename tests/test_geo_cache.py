@@ -0,0 +1,77 @@
+# test_geo_cache.py
+import sys
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.geo_cache import GeoCache
+
+
+def test_concurrent_lookups_of_one_ip_share_one_request():
+    cache = GeoCache(size=10)
+    calls = []
+    lock = threading.Lock()
+
+    def lookup(ip):
+        with lock:
+            calls.append(ip)
+        time.sleep(0.1)
+        return f"City of {ip}"
+
+    ips = ["203.0.113.7"] * 20 + ["203.0.113.8"] * 20
+    with ThreadPoolExecutor(max_workers=40) as executor:
+        locations = list(executor.map(lambda ip: cache.location(ip, lookup), ips))
+    assert sorted(calls) == ["203.0.113.7", "203.0.113.8"]
+    assert locations == [f"City of {ip}" for ip in ips]
+    assert cache.lookups == 2
+
+
+def test_lru_eviction_and_failures_not_cached():
+    cache = GeoCache(size=2)
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        cache.put(ip, f"City {ip}")
+    cache.get("10.0.0.1")  # most recently used now
+    cache.put("10.0.0.3", "City 10.0.0.3")
+    assert cache.get("10.0.0.2") is None
+    assert cache.get("10.0.0.1") == "City 10.0.0.1"
+
+    calls = []
+
+    def failing(ip):
+        calls.append(ip)
+        return "N/A"
+
+    assert cache.location("10.0.0.9", failing) == "N/A"
+    assert cache.location("10.0.0.9", failing) == "N/A"
+    assert len(calls) == 2
+
+
+def test_store_keeps_locations_across_runs_until_ttl():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "geo.sqlite")
+        cache = GeoCache()
+        cache.open_store(path)
+        cache.put("203.0.113.7", "Paris, France")
+        cache.close_store()
+
+        later = GeoCache(ttl=60)
+        later.open_store(path)
+        assert later.get("203.0.113.7") == "Paris, France"
+        later.close_store()
+
+        expired = GeoCache(ttl=60)
+        expired.open_store(path)
+        expired._store.execute("UPDATE locations SET updated = updated - 120")
+        assert expired.get("203.0.113.7") is None
+        expired.close_store()
+
+
+if __name__ == "__main__":
+    test_concurrent_lookups_of_one_ip_share_one_request()
+    test_lru_eviction_and_failures_not_cached()
+    test_store_keeps_locations_across_runs_until_ttl()
+    print("All geo cache tests passed.")
@@ -0,0 +1,93 @@
+# test_geo_db.py
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.config as config_module
+from src.geo_db import GeoDatabase, build_geo_db
+from src.proxy_tester import run_geo_lookups
+from src.records import ProxyResult, Status
+
+RANGES = """# start,end,country,region,city
+10.0.0.0,10.0.0.255,Testland,North,Alpha
+167772416,167772671,Testland,,Beta
+2001:db8::,2001:db8::ffff,Sixland,,Gamma
+192.0.2.0,192.0.2.127,Otherland
+not-an-ip,192.0.2.255,Nowhere
+"""
+
+
+def _write_csv(tmpdir):
+    path = os.path.join(tmpdir, "ranges.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(RANGES)
+    return path
+
+
+def _check(database):
+    assert len(database) == 3
+    assert database.location("10.0.0.0") == "Alpha, North, Testland"
+    assert database.location("10.0.0.255") == "Alpha, North, Testland"
+    assert database.location("10.0.1.7") == "Beta, Testland"  # 167772416 = 10.0.1.0
+    assert database.location("192.0.2.127") == "Otherland"
+    assert database.location("192.0.2.128") == "N/A"
+    assert database.location("9.255.255.255") == "N/A"
+    assert database.location("2001:db8::1") == "N/A"
+    assert database.location("N/A") == "N/A"
+
+
+def test_csv_and_binary_give_the_same_answers():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = _write_csv(tmpdir)
+        from_csv = GeoDatabase()
+        from_csv.load(csv_path)
+        _check(from_csv)
+
+        db_path = os.path.join(tmpdir, "ranges.db")
+        assert build_geo_db(csv_path, db_path) == 3
+        from_binary = GeoDatabase()
+        from_binary.load(db_path)
+        _check(from_binary)
+        assert list(from_binary.starts) == list(from_csv.starts)
+
+
+def test_truncated_binary_is_rejected():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "ranges.db")
+        build_geo_db(_write_csv(tmpdir), db_path)
+        with open(db_path, "r+b") as f:
+            f.truncate(30)
+        try:
+            GeoDatabase().load(db_path)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_geo_phase_uses_the_database_without_network():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "ranges.db")
+        build_geo_db(_write_csv(tmpdir), db_path)
+        saved = config_module.GEO_DB_PATH
+        config_module.GEO_DB_PATH = db_path
+        try:
+            items = []
+            for i, ip in enumerate(["10.0.0.9", "198.51.100.1", "N/A"]):
+                result = ProxyResult("HTTP", Status.WORKING)
+                result.ip = ip
+                items.append((i, result))
+            seen = []
+            run_geo_lookups(items, lambda idx, result: seen.append(idx))
+            assert sorted(seen) == [0, 1, 2]
+            assert [result.location for _, result in items] == ["Alpha, North, Testland", "N/A", "N/A"]
+        finally:
+            config_module.GEO_DB_PATH = saved
+
+
+if __name__ == "__main__":
+    test_csv_and_binary_give_the_same_answers()
+    test_truncated_binary_is_rejected()
+    test_geo_phase_uses_the_database_without_network()
+    print("All geo database tests passed.")
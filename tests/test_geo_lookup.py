@@ -0,0 +1,58 @@
+# test_geo_lookup.py
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.proxy_tester import run_geo_lookups
+from src.records import ProxyResult, Status
+from src.utils import get_location_from_ip
+
+
+def _items(ips):
+    items = []
+    for i, ip in enumerate(ips):
+        result = ProxyResult("HTTP", Status.WORKING)
+        result.ip = ip
+        items.append((i, result))
+    return items
+
+
+def test_batches_of_100_with_per_ip_fallback(geo_api):
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in range(250)]
+    misses = {ips[3], ips[120], ips[249]}
+    api = geo_api(batch_misses=misses)
+    # Proxies sharing an exit IP share its lookup
+    items = _items(ips + ips[:10])
+    seen = {}
+    run_geo_lookups(items, lambda idx, result: seen.__setitem__(idx, result.location), threads=4)
+    assert len(seen) == len(items)
+    assert all(seen[i] == f"City {ip}, Testland" for i, ip in enumerate(ips + ips[:10]))
+    batches = sorted(count for method, path, count in api.requests if path == "/batch")
+    assert batches == [50, 100, 100]
+    assert sorted(path for method, path, _ in api.requests if method == "GET") == sorted(f"/{ip}" for ip in misses)
+
+    # A second run is answered from the cache
+    api.requests.clear()
+    run_geo_lookups(_items(ips[:5]), lambda idx, result: None)
+    assert api.requests == []
+
+
+def test_failed_batch_falls_back_for_every_ip(geo_api):
+    api = geo_api(batch_status=503)
+    items = _items(["10.1.0.1", "10.1.0.2", "N/A"])
+    run_geo_lookups(items, lambda idx, result: None)
+    assert [result.location for _, result in items] == ["City 10.1.0.1, Testland", "City 10.1.0.2, Testland", "N/A"]
+    assert sorted(path for _, path, _ in api.requests) == ["/10.1.0.1", "/10.1.0.2", "/batch"]
+
+
+def test_single_lookup_uses_ip_api(geo_api):
+    api = geo_api()
+    assert get_location_from_ip("10.2.0.1") == "City 10.2.0.1, Testland"
+    assert api.requests == [("GET", "/json/10.2.0.1", 1)]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
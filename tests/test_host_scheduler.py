@@ -0,0 +1,122 @@
+# test_host_scheduler.py
+import sys
+import os
+import socket
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dns_cache import DNSCache
+from src.host_scheduler import HostScheduler, HostStats
+from src.records import ProxyRecord, ProxyResult, Status
+from src.threaded_tester import run_streaming_checks, run_threaded_checks
+from src.utils import parse_proxy_line
+from tests.proxy_servers import FakeHTTPProxy
+
+
+def _proxies(hosts):
+    return [ProxyRecord(host=host, port=8080, raw=f"{host}:8080") for host in hosts]
+
+
+def test_hosts_are_interleaved():
+    proxies = _proxies(["a.example", "a.example", "a.example", "B.example", "b.example", "c.example"])
+    scheduler = HostScheduler(proxies, per_host_limit=0)
+    order = [scheduler.next() for _ in proxies]
+    assert order == [0, 3, 5, 1, 4, 2]
+    assert scheduler.next() is None
+    assert scheduler.exhausted
+    assert scheduler.host_count == 3
+
+
+def test_per_host_cap():
+    proxies = _proxies(["a", "a", "a", "b"])
+    scheduler = HostScheduler(proxies, per_host_limit=1)
+    assert scheduler.next() == 0
+    assert scheduler.next() == 3
+    # "a" is at its cap and "b" has nothing left
+    assert not scheduler.ready()
+    assert scheduler.next() is None
+    scheduler.done(0)
+    assert scheduler.ready()
+    assert scheduler.next() == 1
+    assert not scheduler.exhausted
+
+
+def test_streaming_add_and_release():
+    scheduler = HostScheduler({}, per_host_limit=1)
+    first = scheduler.add(_proxies(["a"])[0])
+    second = scheduler.add(_proxies(["a"])[0])
+    assert scheduler.next() == first
+    assert scheduler.next() is None
+    scheduler.release(first)
+    assert first not in scheduler.proxies
+    assert scheduler.next() == second
+    scheduler.release(second)
+    assert scheduler.host_count == 0 and scheduler.exhausted
+
+
+def test_streaming_checks_hold_a_bounded_window():
+    in_memory = []
+    seen = []
+
+    def proxies():
+        for proxy in _proxies(["127.0.0.1", "127.0.0.2"] * 200):
+            in_memory.append(len(seen))
+            yield proxy
+
+    def check(proxy):
+        return ProxyResult("HTTP", Status.WORKING)
+
+    def on_result(proxy, result):
+        seen.append(proxy)
+
+    count = run_streaming_checks(proxies(), "http", on_result=on_result, window=16, check=check)
+    assert count == len(seen) == 400
+    # The n-th proxy is only read once n - window results are out
+    assert all(read - done <= 16 for read, done in enumerate(in_memory))
+
+
+def test_unresolvable_host_fails_without_checking():
+    proxies = [parse_proxy_line("no-such-gateway.invalid:8080:u:p", "http")]
+    results = run_threaded_checks(proxies, "http")
+    assert results[0]["Status"] == "Failed"
+    assert results[0]["ErrorKind"] == "unreachable"
+    assert "resolve" in results[0]["Error"]
+
+
+def test_checks_connect_to_resolved_address():
+    if socket.getaddrinfo("localhost", 80, 0, socket.SOCK_STREAM)[0][4][0] != "127.0.0.1":
+        return  # the fake proxy only listens on IPv4 loopback
+    server = FakeHTTPProxy()
+    try:
+        proxies = [parse_proxy_line(f"localhost:{server.port}:u:{i}", "http") for i in range(5)]
+        scheduler = HostScheduler(proxies, per_host_limit=2, resolver=DNSCache())
+        results = run_threaded_checks(proxies, "http", scheduler=scheduler)
+        assert all(r["Status"] == "Working" for r in results)
+        assert scheduler.resolver.lookups == 1
+        assert all(p["address"] == "127.0.0.1" for p in proxies)
+    finally:
+        server.close()
+
+
+def test_host_stats_summary():
+    stats = HostStats()
+    proxies = _proxies(["a", "a", "b"])
+    stats.record(proxies[0], ProxyResult("HTTP", Status.WORKING))
+    stats.record(proxies[1], ProxyResult("HTTP", Status.FAILED))
+    stats.record(proxies[2], ProxyResult("HTTP", Status.WORKING))
+    rows = stats.summary()
+    assert [row["host"] for row in rows] == ["a", "b"]
+    assert rows[0]["working"] == 1 and rows[0]["failed"] == 1
+    assert rows[0]["fail_rate"] == 0.5
+    assert rows[0]["rate"] > 0
+
+
+if __name__ == "__main__":
+    test_hosts_are_interleaved()
+    test_per_host_cap()
+    test_streaming_add_and_release()
+    test_streaming_checks_hold_a_bounded_window()
+    test_unresolvable_host_fails_without_checking()
+    test_checks_connect_to_resolved_address()
+    test_host_stats_summary()
+    print("All host scheduler tests passed.")
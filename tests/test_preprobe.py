@@ -0,0 +1,41 @@
+# test_preprobe.py
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprobe import run_tcp_preprobe
+from src.utils import parse_proxy_line
+from tests.proxy_servers import FakeHTTPProxy, closed_port
+
+
+def test_preprobe_separates_open_and_closed_ports():
+    server = FakeHTTPProxy()
+    try:
+        proxies = [
+            parse_proxy_line(f"127.0.0.1:{server.port}:u:p", "http"),
+            parse_proxy_line(f"127.0.0.1:{closed_port()}:u:p", "http"),
+            parse_proxy_line(f"127.0.0.1:{server.port}:u:p", "http"),
+        ]
+        seen = []
+        report = run_tcp_preprobe(proxies, timeout=2, on_result=lambda i, e: seen.append(i))
+        assert [report.reachable(i) for i in range(3)] == [True, False, True]
+        assert report.passed == 2
+        assert report.failed == 1
+        assert "TCP connect" in report.errors[1]
+        assert sorted(seen) == [0, 1, 2]
+        assert report.elapsed >= 0
+    finally:
+        server.close()
+
+
+def test_preprobe_empty_list():
+    report = run_tcp_preprobe([])
+    assert report.passed == 0
+    assert report.failed == 0
+
+
+if __name__ == "__main__":
+    test_preprobe_separates_open_and_closed_ports()
+    test_preprobe_empty_list()
+    print("All pre-probe tests passed.")
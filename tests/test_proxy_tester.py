@@ -6,6 +6,7 @@ import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.proxy_tester import test_http_proxy as run_http_proxy_test
+from src.records import format_latency
 from src.utils import parse_proxy_line
 from src.ui import print_info
 
@@ -21,7 +22,7 @@ def test_single_http_proxy():
     print_info(f"[{result['Status']}] {proxy['host']}:{proxy['port']}")
     print(f"  IP: {result['IP']}")
     print(f"  Location: {result['Location']}")
-    print(f"  Latency: {result['Latency']}\n")
+    print(f"  Latency: {format_latency(result.latency)}\n")
 
 if __name__ == "__main__":
     test_single_http_proxy()
@@ -0,0 +1,95 @@
+# test_rate_limit.py
+import sys
+import os
+import multiprocessing
+import time
+from email.utils import formatdate
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.config as config_module
+import src.rate_limit as rate_limit
+from src.rate_limit import IP_API, IPWHO, GeoRateLimits, TokenBucket, retry_after
+from src.utils import get_location_from_ip, location_from_ip_api
+
+
+class _Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_bucket_paces_requests_to_the_rate(monkeypatch):
+    monkeypatch.setattr(config_module, "GEO_RATE_LIMITS", {"test": 600})
+    monkeypatch.setattr(config_module, "GEO_RATE_BURST", 1)
+    bucket = TokenBucket("test")
+    started = time.time()
+    for _ in range(6):
+        assert bucket.acquire()
+    # One token up front, then one every 0.1s
+    assert 0.45 <= time.time() - started < 1.5
+
+    bucket.pause(0.3)
+    assert bucket.wait_time() > 0.2
+
+    # Waits longer than GEO_MAX_WAIT are not made
+    bucket.pause(config_module.GEO_MAX_WAIT + 10)
+    assert not bucket.acquire()
+
+
+def test_retry_after_headers():
+    assert retry_after(_Response({"Retry-After": "3"})) == 3.0
+    assert retry_after(_Response({"X-Ttl": "12"})) == 12.0
+    later = retry_after(_Response({"Retry-After": formatdate(time.time() + 30, usegmt=True)}))
+    assert 25 <= later <= 31
+    assert retry_after(_Response({})) == config_module.GEO_RETRY_AFTER
+
+
+def test_429_is_retried_after_retry_after(geo_api):
+    api = geo_api(throttled=1, retry_after="1")
+    started = time.time()
+    assert location_from_ip_api("10.3.0.1") == "City 10.3.0.1, Testland"
+    assert time.time() - started >= 0.9
+    assert api.requests == [("GET", "/json/10.3.0.1", 1)] * 2
+
+
+def test_single_lookups_go_to_the_free_service(geo_api, monkeypatch):
+    api = geo_api()
+    monkeypatch.setattr(config_module, "GEO_RATE_LIMITS", {IP_API: 45, IPWHO: 60})
+    rate_limit.GEO_LIMITS[IP_API].pause(1.0)
+    started = time.time()
+    assert get_location_from_ip("10.4.0.1") == "City 10.4.0.1, Testland"
+    assert time.time() - started < 0.9
+    assert api.requests == [("GET", "/10.4.0.1", 1)]
+
+
+def _take_tokens(shared, count, out_queue):
+    config_module.GEO_RATE_LIMITS = {IPWHO: 1200}
+    config_module.GEO_RATE_BURST = 1
+    limits = GeoRateLimits()
+    limits.attach(shared)
+    times = []
+    for _ in range(count):
+        limits[IPWHO].acquire()
+        times.append(time.time())
+    out_queue.put(times)
+
+
+def test_buckets_are_shared_across_processes():
+    ctx = multiprocessing.get_context("spawn")
+    limits = GeoRateLimits()
+    shared = limits.share(ctx)
+    out_queue = ctx.Queue()
+    procs = [ctx.Process(target=_take_tokens, args=(shared, 10, out_queue)) for _ in range(2)]
+    for proc in procs:
+        proc.start()
+    times = sorted(out_queue.get(timeout=30) + out_queue.get(timeout=30))
+    for proc in procs:
+        proc.join(timeout=10)
+    # 20 tokens from one bucket at 20/s take 0.95s; separate buckets would take 0.45s each
+    assert times[-1] - times[0] >= 0.85
+
+
+if __name__ == "__main__":
+    test_retry_after_headers()
+    test_buckets_are_shared_across_processes()
+    print("All rate limit tests passed.")
@@ -0,0 +1,84 @@
+# test_records.py
+import sys
+import os
+import json
+import pickle
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.records import SPEED_FAILED, ProxyRecord, ProxyResult, Status, as_dict, display_row, format_speed
+from src.utils import parse_proxy_line
+
+
+def test_result_reads_like_a_dict():
+    result = ProxyResult("SOCKS5", Status.WORKING)
+    result.latency = 0.256
+    assert result["Type"] == "SOCKS5"
+    assert result["Status"] == "Working"
+    assert result["Latency"] == 0.256
+    assert "Speed" not in result
+    assert result.get("Error") is None
+    assert "Error" not in result and "Status" in result
+    result["Error"] = "boom"
+    assert result.get("Error") == "boom"
+    assert result.pop("Error") == "boom" and "Error" not in result
+    result["Status"] = "Failed"
+    assert result.status is Status.FAILED and not result.working
+
+
+def test_display_strings_are_not_stored():
+    result = ProxyResult()
+    try:
+        result["Speed"] = "7.02 Mbps"
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+    result.speed = 7.0213
+    assert result["Speed"] == 7.0213
+    assert display_row(result)["Speed"] == "7.02 Mbps"
+    result.speed = SPEED_FAILED
+    assert display_row(result)["Speed"] == "Error"
+    assert display_row(ProxyResult())["Latency"] == "N/A"
+    assert format_speed(None) == "N/A"
+
+
+def test_round_trip_through_json_and_pickle():
+    result = ProxyResult("HTTP", Status.WORKING)
+    result.ip = "203.0.113.7"
+    result.latency = 0.031
+    result.phases = {"dns": None, "connect": 0.01}
+    wire = json.loads(json.dumps(as_dict(result)))
+    assert wire["status"] == "Working"
+    assert ProxyResult.from_dict(wire) == result
+    assert pickle.loads(pickle.dumps(result)) == result
+
+    proxy = parse_proxy_line("gw.example:8080:user:pass", "http")
+    assert isinstance(proxy, ProxyRecord)
+    assert ProxyRecord.from_dict(as_dict(proxy)) == proxy
+    assert proxy.port == 8080 and proxy.get("address") is None
+    # Ports from older dict-style input are parsed once, on the way in
+    assert ProxyRecord.from_dict({"host": "gw.example", "port": "8080"}).port == 8080
+
+
+def test_update_from_record_or_mapping():
+    result = ProxyResult()
+    other = ProxyResult("HTTP", Status.WORKING)
+    other.speed = 12.5
+    result.update(other)
+    assert result.working and result.speed == 12.5
+    result.update({"Location": "Paris, France"})
+    assert result["Location"] == "Paris, France"
+
+
+def test_records_have_no_instance_dict():
+    assert not hasattr(ProxyResult(), "__dict__")
+    assert not hasattr(ProxyRecord(), "__dict__")
+
+
+if __name__ == "__main__":
+    test_result_reads_like_a_dict()
+    test_display_strings_are_not_stored()
+    test_round_trip_through_json_and_pickle()
+    test_update_from_record_or_mapping()
+    test_records_have_no_instance_dict()
+    print("All records tests passed.")
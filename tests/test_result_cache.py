@@ -0,0 +1,78 @@
+# test_result_cache.py
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.records import ProxyResult, Status
+from src.result_cache import ResultCache
+from src.sharding import CHECK, GEO, SPEED
+from src.utils import parse_proxy_lines
+
+
+def _working():
+    result = ProxyResult("HTTP", Status.WORKING)
+    result.latency = 0.05
+    return result
+
+
+def test_fresh_phases_are_reused():
+    proxies, _ = parse_proxy_lines(["gw.example.com:8000:user:pass", "gw.example.com:8001:user:pass"], "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cache.sqlite")
+        cache = ResultCache(path, "http")
+        result = _working()
+        cache.store(CHECK, proxies[0], result)
+        result.location = "Paris, France"
+        cache.store(GEO, proxies[0], result)
+        cache.close()
+
+        # Same endpoint written differently is the same proxy
+        later, _ = parse_proxy_lines(["GW.example.com:08000:user:pass", "gw.example.com:8001:user:pass"], "http")
+        cache = ResultCache(path, "http")
+        progress = cache.lookup(later, max_age=60)
+        assert list(progress) == [0]
+        phases, cached = progress[0]
+        assert phases == {CHECK, GEO}
+        assert cached.working and cached.latency == 0.05 and cached["Location"] == "Paris, France"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # Stale phases are left out; a stale check is a miss
+        cache._db.execute("UPDATE results SET geo = geo - 120")
+        assert cache.lookup(later, max_age=60)[0][0] == {CHECK}
+        cache._db.execute("UPDATE results SET checked = checked - 120")
+        assert cache.lookup(later, max_age=60) == {}
+        assert cache.lookup(later, max_age=0) == {}
+        cache.close()
+
+
+def test_new_check_replaces_the_row():
+    proxies, _ = parse_proxy_lines(["gw.example.com:8000:user:pass"], "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ResultCache(os.path.join(tmpdir, "cache.sqlite"), "http")
+        cache.store(CHECK, proxies[0], _working())
+        cache.store(SPEED, proxies[0], _working())
+        cache.store(CHECK, proxies[0], ProxyResult("HTTP", Status.FAILED, "refused"))
+        phases, cached = cache.lookup(proxies, max_age=60)[0]
+        assert phases == {CHECK} and cached.error == "refused"
+        cache.close()
+
+
+def test_proxy_type_is_part_of_the_key():
+    proxies, _ = parse_proxy_lines(["gw.example.com:8000:user:pass"], "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cache.sqlite")
+        cache = ResultCache(path, "http")
+        cache.store(CHECK, proxies[0], _working())
+        cache.close()
+        cache = ResultCache(path, "socks")
+        assert cache.lookup(proxies, max_age=60) == {}
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_fresh_phases_are_reused()
+    test_new_check_replaces_the_row()
+    test_proxy_type_is_part_of_the_key()
+    print("All result cache tests passed.")
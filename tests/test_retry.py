@@ -0,0 +1,83 @@
+# test_retry.py
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.config as config_module
+import errno
+
+from src.retry import EndpointStatusError, ProxyUnreachable, call_with_retries, classify_error, is_retriable
+from src.proxy_tester import test_http_proxy as run_http_proxy_test
+from src.utils import parse_proxy_line
+from tests.proxy_servers import closed_port
+
+
+def test_is_retriable_classification():
+    assert not is_retriable(ProxyUnreachable("refused"))
+    assert not is_retriable(EndpointStatusError(407))
+    assert is_retriable(EndpointStatusError(503))
+    assert is_retriable(EndpointStatusError(429))
+    assert is_retriable(TimeoutError("read timed out"))
+
+
+def test_classify_error_buckets():
+    local = ProxyUnreachable("no fds")
+    local.__cause__ = OSError(errno.EMFILE, "Too many open files")
+    assert classify_error(local) == "local"
+    assert classify_error(ConnectionResetError("reset")) == "reset"
+    assert classify_error(EndpointStatusError(429)) == "rate_limited"
+    assert classify_error(TimeoutError("timed out")) == "timeout"
+    assert classify_error(ProxyUnreachable("refused")) == "unreachable"
+    assert classify_error(ValueError("bad json")) == "other"
+
+
+def test_call_with_retries_recovers_from_transient_errors():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionResetError("reset")
+        return "ok"
+
+    original = config_module.RETRY_BACKOFF
+    config_module.RETRY_BACKOFF = 0
+    try:
+        assert call_with_retries(flaky, retries=2) == "ok"
+        assert len(calls) == 3
+    finally:
+        config_module.RETRY_BACKOFF = original
+
+
+def test_call_with_retries_gives_up_on_final_errors():
+    calls = []
+
+    def dead():
+        calls.append(1)
+        raise ProxyUnreachable("refused")
+
+    try:
+        call_with_retries(dead, retries=5)
+        assert False, "Expected ProxyUnreachable"
+    except ProxyUnreachable:
+        pass
+    assert len(calls) == 1
+
+
+def test_dead_proxy_fails_fast():
+    proxy = parse_proxy_line(f"127.0.0.1:{closed_port()}:user:pass", "http")
+    start = time.time()
+    result = run_http_proxy_test(proxy)
+    assert result["Status"] == "Failed"
+    assert time.time() - start < 3
+
+
+if __name__ == "__main__":
+    test_is_retriable_classification()
+    test_classify_error_buckets()
+    test_call_with_retries_recovers_from_transient_errors()
+    test_call_with_retries_gives_up_on_final_errors()
+    test_dead_proxy_fails_fast()
+    print("All retry tests passed.")
@@ -0,0 +1,103 @@
+# test_sharding.py
+import sys
+import os
+import multiprocessing
+import multiprocessing.queues
+import queue
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.records import ProxyResult, Status
+from src.sharding import CHECK, GEO, run_sharded, shard_indices
+from src.threaded_tester import run_threaded_checks
+from src.utils import parse_proxy_line
+from tests.proxy_servers import FakeHTTPProxy, FAKE_EXIT_IP, closed_port
+
+
+def test_shard_indices_cover_every_index_once():
+    shards = shard_indices(10, 3)
+    assert shards == [[0, 3, 6, 9], [1, 4, 7], [2, 5, 8]]
+    assert sorted(i for shard in shards for i in shard) == list(range(10))
+
+
+def test_shard_indices_never_creates_empty_shards():
+    assert shard_indices(2, 8) == [[0], [1]]
+    assert shard_indices(0, 4) == []
+
+
+def test_threaded_checks_keep_order():
+    server = FakeHTTPProxy()
+    dead_port = closed_port()
+    try:
+        lines = [f"127.0.0.1:{server.port}:u:p", f"127.0.0.1:{dead_port}:u:p"]
+        proxies = [parse_proxy_line(line, "http") for line in lines]
+        seen = []
+        results = run_threaded_checks(proxies, "http", on_result=lambda i, r: seen.append(i))
+        assert [r["Status"] for r in results] == ["Working", "Failed"]
+        assert sorted(seen) == [0, 1]
+    finally:
+        server.close()
+
+
+def test_sharded_check_merges_results_by_original_index():
+    server = FakeHTTPProxy()
+    dead_port = closed_port()
+    try:
+        lines = [
+            f"127.0.0.1:{server.port}:u:p",
+            f"127.0.0.1:{dead_port}:u:p",
+            f"127.0.0.1:{server.port}:u:p",
+            f"127.0.0.1:{server.port}:u:p",
+            f"127.0.0.1:{dead_port}:u:p",
+        ]
+        items = [(i, parse_proxy_line(line, "http"), None) for i, line in enumerate(lines)]
+        results = [None] * len(items)
+
+        def on_result(idx, result):
+            results[idx] = result
+
+        reports = run_sharded(CHECK, items, {"type": "http"}, 2, on_result)
+        assert [r["Status"] for r in results] == ["Working", "Failed", "Working", "Working", "Failed"]
+        assert results[0]["IP"] == FAKE_EXIT_IP
+        assert [r["count"] for r in reports] == [3, 2]
+        assert all(r["error"] is None and r["summary"] for r in reports)
+    finally:
+        server.close()
+
+
+class _LateQueue(multiprocessing.queues.Queue):
+    """Queue whose first get() times out only after the worker has sent everything and exited."""
+
+    def __init__(self, ctx):
+        super().__init__(ctx=ctx)
+        self._timed_out = False
+
+    def get(self, block=True, timeout=None):
+        if not self._timed_out:
+            self._timed_out = True
+            while self.empty():
+                time.sleep(0.05)
+            time.sleep(1.0)  # let the worker exit
+            raise queue.Empty
+        return super().get(block, timeout)
+
+
+def test_worker_that_exits_right_after_done_is_not_failed(monkeypatch):
+    ctx = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(ctx, "Queue", lambda: _LateQueue(ctx))
+    result = ProxyResult("HTTP", Status.WORKING)
+    result.ip = "N/A"  # answered without any geo request
+    items = [(0, parse_proxy_line("127.0.0.1:8080:u:p", "http"), result)]
+    seen = []
+    reports = run_sharded(GEO, items, {"type": "http"}, 1, lambda idx, r: seen.append(idx))
+    assert seen == [0]
+    assert reports[0]["error"] is None
+
+
+if __name__ == "__main__":
+    test_shard_indices_cover_every_index_once()
+    test_shard_indices_never_creates_empty_shards()
+    test_threaded_checks_keep_order()
+    test_sharded_check_merges_results_by_original_index()
+    print("All sharding tests passed.")
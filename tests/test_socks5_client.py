@@ -0,0 +1,68 @@
+# test_socks5_client.py
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.socks5_client import SOCKS5Error, connect_request, fetch_ip_via_socks5
+from src.proxy_tester import test_socks_proxy as run_socks_proxy_test
+from src.utils import parse_proxy_line
+from tests.proxy_servers import FakeSocks5Proxy, FAKE_EXIT_IP
+
+ECHO_URL = "http://api.myip.com"
+
+
+def test_connect_request_domain_and_ipv4():
+    assert connect_request("api.myip.com", 80) == b"\x05\x01\x00\x03\x0capi.myip.com\x00\x50"
+    assert connect_request("1.2.3.4", 443) == b"\x05\x01\x00\x01\x01\x02\x03\x04\x01\xbb"
+
+
+def test_fetch_ip_with_auth():
+    server = FakeSocks5Proxy("user", "pass")
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:pass", "socks")
+        assert fetch_ip_via_socks5(proxy, ECHO_URL, timeout=5) == FAKE_EXIT_IP
+    finally:
+        server.close()
+
+
+def test_fetch_ip_without_auth():
+    server = FakeSocks5Proxy()
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}", "socks", ip_whitelist=True)
+        assert fetch_ip_via_socks5(proxy, ECHO_URL, timeout=5) == FAKE_EXIT_IP
+    finally:
+        server.close()
+
+
+def test_fetch_ip_bad_credentials():
+    server = FakeSocks5Proxy("user", "pass")
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:wrong", "socks")
+        try:
+            fetch_ip_via_socks5(proxy, ECHO_URL, timeout=5)
+            assert False, "Expected SOCKS5Error"
+        except SOCKS5Error:
+            pass
+    finally:
+        server.close()
+
+
+def test_socks_proxy_check_uses_raw_client():
+    server = FakeSocks5Proxy("user", "pass")
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:pass", "socks")
+        result = run_socks_proxy_test(proxy)
+        assert result["Status"] == "Working"
+        assert result["IP"] == FAKE_EXIT_IP
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    test_connect_request_domain_and_ipv4()
+    test_fetch_ip_with_auth()
+    test_fetch_ip_without_auth()
+    test_fetch_ip_bad_credentials()
+    test_socks_proxy_check_uses_raw_client()
+    print("All SOCKS5 client tests passed.")
@@ -0,0 +1,124 @@
+# test_stream_out.py
+import sys
+import os
+import csv
+import json
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.records import ProxyResult, Status
+from src.stream_out import NDJSONWriter, ResultFileWriter
+from src.utils import parse_proxy_line, parse_proxy_lines
+
+
+def _result(i):
+    result = ProxyResult("HTTP", Status.WORKING if i % 2 else Status.FAILED)
+    result.latency = i / 1000
+    return result
+
+
+def test_writes_one_json_line_per_result():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.jsonl")
+        writer = NDJSONWriter(path, buffer=4, batch=3)
+        proxy = parse_proxy_line("gw.example.com:8080:user:pass", "http")
+        for i in range(20):
+            writer.write(proxy, _result(i))
+        writer.close()
+        assert writer.written == 20
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 20
+        assert lines[1]["proxy"] == "gw.example.com:8080:user:pass"
+        assert lines[1]["port"] == 8080
+        assert lines[1]["status"] == "Working" and lines[2]["status"] == "Failed"
+        assert [line["latency"] for line in lines] == [i / 1000 for i in range(20)]
+
+
+def test_result_is_captured_when_written():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.jsonl")
+        writer = NDJSONWriter(path)
+        proxy = parse_proxy_line("gw.example.com:8080:user:pass", "http")
+        result = _result(1)
+        writer.write(proxy, result)
+        result.location = "changed later"
+        writer.close()
+        with open(path, encoding="utf-8") as f:
+            assert json.loads(f.readline())["location"] == "N/A"
+
+
+def test_broken_output_stops_writing_without_raising():
+    read_fd, write_fd = os.pipe()
+    os.close(read_fd)
+    writer = NDJSONWriter(os.devnull)
+    writer._file = os.fdopen(write_fd, "w")
+    proxy = parse_proxy_line("gw.example.com:8080:user:pass", "http")
+    writer.write(proxy, _result(1))
+    writer.close(timeout=5)
+    assert writer.error is not None
+    writer.write(proxy, _result(2))  # ignored once the output is gone
+
+
+def test_duplicates_get_their_own_json_line():
+    proxies, _ = parse_proxy_lines([f"gw.example.com:{8000 + i}:user:pass" for i in range(3)], "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.jsonl")
+        # Input lines 4 and 5 repeat the second proxy, as in -o
+        writer = NDJSONWriter(path, copies={1: [3, 4]})
+        for proxy in proxies:
+            writer.write(proxy, _result(proxy.index))
+        writer.close()
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert [line["line"] for line in lines] == [1, 2, 4, 5, 3]
+        assert [line["port"] for line in lines] == [8000, 8001, 8001, 8001, 8002]
+        assert [line["status"] for line in lines] == ["Failed", "Working", "Working", "Working", "Failed"]
+
+
+def test_result_file_rows_as_results_finalize():
+    proxies, _ = parse_proxy_lines([f"gw.example.com:{8000 + i}:user:pass" for i in range(3)], "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.csv")
+        # Input line 4 (index 3) repeats the second proxy
+        writer = ResultFileWriter(path, copies={1: [3]})
+        writer.write(proxies[2], _result(1))
+        writer.write(proxies[1], _result(2))
+        writer.close()
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["Index"] for row in rows] == ["3", "2", "4"]
+        assert [row["Status"] for row in rows] == ["Working", "Failed", "Failed"]
+        assert rows[0]["Latency"] == "1ms"
+
+        # Appending to an existing file does not repeat the header
+        writer = ResultFileWriter(path, mode="a")
+        writer.write(proxies[0], _result(3))
+        writer.close()
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["Index"] for row in rows] == ["3", "2", "4", "1"]
+
+
+def test_result_file_txt_format():
+    proxies, _ = parse_proxy_lines(["gw.example.com:8000:user:pass"], "http")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.txt")
+        writer = ResultFileWriter(path)
+        writer.write(proxies[0], _result(1))
+        writer.close()
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert lines[0].startswith("Index\tType")
+        assert lines[1].split("\t")[0] == "1" and lines[1].endswith("Working")
+
+
+if __name__ == "__main__":
+    test_writes_one_json_line_per_result()
+    test_duplicates_get_their_own_json_line()
+    test_result_is_captured_when_written()
+    test_broken_output_stops_writing_without_raising()
+    test_result_file_rows_as_results_finalize()
+    test_result_file_txt_format()
+    print("All stream output tests passed.")
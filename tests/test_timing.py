@@ -0,0 +1,162 @@
+# test_timing.py
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.config as config_module
+import src.main as main
+import src.timing as timing
+from src.async_tester import run_async_checks
+from src.timing import PHASES, PhaseTimer, aggregate_phases, apply_sample_stats, percentile
+from src.proxy_tester import test_http_proxy as run_http_proxy_test
+from src.proxy_tester import test_socks_proxy as run_socks_proxy_test
+from src.records import ProxyResult, Status
+from src.utils import parse_proxy_line
+from tests.proxy_servers import FakeHTTPProxy, FakeSocks5Proxy
+
+
+def test_phase_timer_charges_time_between_marks():
+    timer = PhaseTimer()
+    time.sleep(0.02)
+    timer.mark("dns")
+    timer.skip()
+    timer.mark("connect")
+    assert timer.phases["dns"] >= 0.015
+    assert timer.phases["connect"] < 0.015
+    assert timer.phases["tls"] is None
+
+
+def test_percentile_nearest_rank():
+    values = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 95) == 1.0
+    assert percentile([], 95) == 0.0
+
+
+def _result(status=Status.WORKING, **fields):
+    result = ProxyResult("HTTP", status)
+    for name, value in fields.items():
+        setattr(result, name, value)
+    return result
+
+
+def test_aggregate_phases_skips_unmeasured():
+    results = [
+        _result(phases={"dns": 0.01, "connect": 0.02, "handshake": None, "tls": None, "ttfb": 0.1}),
+        _result(phases={"dns": 0.03, "connect": 0.04, "handshake": None, "tls": None, "ttfb": 0.3}),
+        _result(Status.FAILED),
+        None,
+    ]
+    summary = aggregate_phases(results)
+    assert set(summary) == {"dns", "connect", "ttfb"}
+    assert summary["dns"]["count"] == 2
+    assert abs(summary["ttfb"]["avg"] - 0.2) < 1e-9
+    assert summary["connect"]["max"] == 0.04
+
+
+def test_http_check_records_phases():
+    server = FakeHTTPProxy()
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:pass", "http")
+        result = run_http_proxy_test(proxy)
+        assert result["Status"] == "Working"
+        assert set(result["Phases"]) == set(PHASES)
+        for phase in ("dns", "connect", "ttfb"):
+            assert result["Phases"][phase] is not None
+        # Plain-http endpoint through an HTTP proxy: no tunnel, no TLS
+        assert result["Phases"]["handshake"] is None
+        assert result["Phases"]["tls"] is None
+    finally:
+        server.close()
+
+
+def test_sample_stats():
+    results = [
+        _result(samples=[0.3, 0.1, 0.2, 0.4]),
+        _result(samples=[0.05]),
+        _result(Status.FAILED),
+        None,
+    ]
+    assert apply_sample_stats(results) == 2
+    stats = results[0].sample_stats
+    assert stats["min"] == 0.1 and stats["p50"] == 0.2 and stats["p95"] == 0.4
+    assert abs(stats["jitter"] - 0.5 / 3) < 1e-9
+    assert results[1].sample_stats == {"min": 0.05, "p50": 0.05, "p95": 0.05, "jitter": 0.0}
+    assert results[2].sample_stats is None
+
+
+def test_sample_stats_backends_agree():
+    series = [[0.12, 0.5, 0.08], [0.3], [0.2, 0.21, 0.19, 0.4, 0.22, 0.18]]
+    expected = timing._sample_stats_python(series)
+    if timing.np is None:
+        return  # numpy is optional
+    for got, want in zip(timing._sample_stats_numpy(series), expected):
+        for key in want:
+            assert abs(got[key] - want[key]) < 1e-9
+
+
+class _Writer:
+    def __init__(self):
+        self.written = []
+
+    def write(self, proxy, result):
+        self.written.append(result)
+
+
+def test_final_results_get_their_statistics_per_chunk(monkeypatch):
+    calls = []
+
+    def counting_stats(results):
+        calls.append(len(results))
+        return apply_sample_stats(results)
+
+    writer = _Writer()
+    monkeypatch.setattr(config_module, "LATENCY_SAMPLES", 3)
+    monkeypatch.setattr(config_module, "STREAM_OUT_BATCH", 4)
+    monkeypatch.setattr(main, "apply_sample_stats", counting_stats)
+    monkeypatch.setattr(main, "result_writers", [writer])
+    proxy = parse_proxy_line("127.0.0.1:8080:u:p", "http")
+    for i in range(6):
+        main.emit_final(proxy, _result(samples=[0.1, 0.2 + i, 0.3]))
+    assert calls == [4] and len(writer.written) == 4
+    main.flush_final()
+    assert calls == [4, 2] and len(writer.written) == 6
+    assert all(result.sample_stats["min"] == 0.1 for result in writer.written)
+
+
+def test_samples_share_one_connection(monkeypatch):
+    monkeypatch.setattr(config_module, "LATENCY_SAMPLES", 5)
+    server = FakeHTTPProxy()
+    socks = FakeSocks5Proxy()
+    try:
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:pass", "http")
+        result = run_http_proxy_test(proxy)
+        assert result["Status"] == "Working"
+        assert len(result["Samples"]) == 5
+        assert server.connections == 1
+        # The reported latency is the first check only
+        assert result.latency <= sum(result["Samples"]) + 0.001
+
+        proxy = parse_proxy_line(f"127.0.0.1:{socks.port}:user:pass", "socks")
+        assert len(run_socks_proxy_test(proxy)["Samples"]) == 5
+
+        proxy = parse_proxy_line(f"127.0.0.1:{server.port}:user:pass", "http")
+        result = run_async_checks([proxy], "http")[0]
+        assert result["Status"] == "Working"
+        assert len(result["Samples"]) == 5
+        assert server.connections == 2
+    finally:
+        server.close()
+        socks.close()
+
+
+if __name__ == "__main__":
+    test_phase_timer_charges_time_between_marks()
+    test_percentile_nearest_rank()
+    test_aggregate_phases_skips_unmeasured()
+    test_http_check_records_phases()
+    test_sample_stats()
+    test_sample_stats_backends_agree()
+    print("All timing tests passed.")
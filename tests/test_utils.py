@@ -6,9 +6,17 @@ import tempfile
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.utils import (
+    ParseReport,
+    ProxyParseError,
+    dedupe_proxies,
+    fan_out,
+    iter_parsed_proxies,
+    iter_proxy_lines,
     load_proxies_from_file,
     parse_proxy_line,
+    parse_proxy_lines,
     format_latency,
+    format_phases,
     save_results_to_file,
     save_results_as_csv,
     save_results_as_txt,
@@ -64,7 +72,7 @@ def test_proxy_validation_port_out_of_range():
 def test_parse_proxy_line_host_port_format():
     parsed = parse_proxy_line("example.proxy.com:8080:username:password")
     assert parsed["host"] == "example.proxy.com"
-    assert parsed["port"] == "8080"
+    assert parsed["port"] == 8080
     assert parsed["username"] == "username"
     assert parsed["password"] == "password"
 
@@ -72,7 +80,7 @@ def test_parse_proxy_line_host_port_format():
 def test_parse_proxy_line_at_format():
     parsed = parse_proxy_line("username:password@example.proxy.com:8080")
     assert parsed["host"] == "example.proxy.com"
-    assert parsed["port"] == "8080"
+    assert parsed["port"] == 8080
     assert parsed["username"] == "username"
     assert parsed["password"] == "password"
 
@@ -80,7 +88,7 @@ def test_parse_proxy_line_at_format():
 def test_parse_proxy_line_ip_whitelist():
     parsed = parse_proxy_line("1.2.3.4:8080", ip_whitelist=True)
     assert parsed["host"] == "1.2.3.4"
-    assert parsed["port"] == "8080"
+    assert parsed["port"] == 8080
     assert parsed["username"] == ""
     assert parsed["password"] == ""
 
@@ -99,11 +107,99 @@ def test_format_latency():
     assert format_latency(0.0) == "0ms"
 
 
+def test_format_phases():
+    formatted = format_phases({"dns": 0.004, "connect": 0.021, "handshake": None, "tls": None, "ttfb": 0.15})
+    assert formatted == {"DNS": "4ms", "Connect": "21ms", "Handshake": "N/A", "TLS": "N/A", "TTFB": "150ms"}
+    assert format_phases(None)["DNS"] == "N/A"
+
+
 def test_load_proxies_missing_file():
     proxies = load_proxies_from_file("nonexistent_file_xyz.txt")
     assert proxies == []
 
 
+def test_iter_proxy_lines_is_lazy():
+    with tempfile.NamedTemporaryFile(suffix=".txt", delete=False, mode='w') as f:
+        f.write("# comment\n\n" + "\n".join(sample_proxies) + "\n")
+        filepath = f.name
+    try:
+        lines = iter_proxy_lines(filepath)
+        assert next(lines) == sample_proxies[0]
+        assert list(lines) == sample_proxies[1:]
+    finally:
+        os.unlink(filepath)
+
+
+def test_iter_parsed_proxies_reports_bad_lines():
+    report = ParseReport()
+    lines = [sample_proxies[0], "not-a-proxy", sample_proxies[1]]
+    proxies = list(iter_parsed_proxies(lines, "http", report=report))
+    assert [p["host"] for p in proxies] == ["example.proxy.com", "66.42.83.203"]
+    assert report.lines == 3 and report.valid == 2
+    assert report.errors == {"format": 1}
+    assert report.samples["format"][0][:2] == (2, "not-a-proxy")
+
+
+def test_parse_errors_have_a_kind():
+    cases = {
+        "": "empty",
+        "a:b:c": "format",
+        "u:p:x@host.com:80": "credentials",
+        "host.com:0:u:p": "port",
+        "host.com:http:u:p": "port",
+        "host.com:80::p": "credentials",
+        "300.1.1.1:80:u:p": "host",
+        "-bad-.com:80:u:p": "host",
+    }
+    for line, kind in cases.items():
+        try:
+            parse_proxy_line(line)
+            assert False, f"Expected ProxyParseError for {line!r}"
+        except ProxyParseError as e:
+            assert e.kind == kind, (line, e.kind)
+
+
+def test_parse_proxy_lines_summary():
+    lines = sample_proxies + ["bad"] * 10 + ["host.com:99999:u:p"]
+    proxies, report = parse_proxy_lines(lines, "socks")
+    assert len(proxies) == 3 and all(p["type"] == "socks5" for p in proxies)
+    assert report.invalid == 11
+    assert report.errors == {"format": 10, "port": 1}
+    assert len(report.samples["format"]) == report.samples_per_kind
+
+
+def test_batch_parser_matches_the_line_parser():
+    lines = sample_proxies + [
+        "  gw.example.com:8080:user:pass  ", "user:pass@gw.example.com:08080", "gw.example.com:٨٠:user:pass",
+        "gw.example.com:²:user:pass", "gw.example.com:0:user:pass", "gw.example.com:+80:user:pass",
+        "user:pa:ss@gw.example.com:80", "user@gw.example.com:80", "a:b@c@d:80", "user:pass@gw.example.com",
+        "gw.example.com:80::pass", "-bad-.example.com:80:user:pass", "300.1.1.1:80:user:pass", "10.0.0.1:80",
+    ]
+    for ip_whitelist in (False, True):
+        proxies, report = parse_proxy_lines(lines, "http", ip_whitelist=ip_whitelist)
+        line_report = ParseReport()
+        assert proxies == list(iter_parsed_proxies(lines, "http", ip_whitelist, line_report))
+        assert [p.index for p in proxies] == list(range(len(proxies)))
+        assert (report.lines, report.valid, report.errors) == (line_report.lines, line_report.valid, line_report.errors)
+        assert report.samples == line_report.samples
+
+
+def test_dedupe_proxies_across_formats():
+    lines = [
+        "Example.Proxy.com:08080:username:password",
+        "66.42.83.203:20002:user123:pass123",
+        "username:password@example.proxy.com:8080",
+        "example.proxy.com:8080:username:other",
+    ]
+    proxies = [parse_proxy_line(line) for line in lines]
+    unique, owners = dedupe_proxies(proxies)
+    assert len(unique) == 3
+    assert owners == [0, 1, 0, 2]
+    assert unique[0]["host"] == "example.proxy.com" and unique[0]["port"] == 8080
+    results = ["first", "second", "third"]
+    assert fan_out(results, owners) == ["first", "second", "first", "third"]
+
+
 def test_save_results_as_csv():
     with tempfile.NamedTemporaryFile(suffix=".csv", delete=False, mode='w') as f:
         filepath = f.name
@@ -114,6 +210,7 @@ def test_save_results_as_csv():
             content = f.read()
         assert "HTTP" in content
         assert "1.2.3.4" in content
+        assert "DNS,Connect,Handshake,TLS,TTFB" in content
     finally:
         os.unlink(filepath)
 
@@ -149,7 +246,14 @@ if __name__ == "__main__":
     test_parse_proxy_line_ip_whitelist()
     test_parse_proxy_line_ip_whitelist_rejects_no_port()
     test_format_latency()
+    test_format_phases()
     test_load_proxies_missing_file()
+    test_iter_proxy_lines_is_lazy()
+    test_iter_parsed_proxies_reports_bad_lines()
+    test_parse_errors_have_a_kind()
+    test_parse_proxy_lines_summary()
+    test_batch_parser_matches_the_line_parser()
+    test_dedupe_proxies_across_formats()
     test_save_results_as_csv()
     test_save_results_as_txt()
     test_save_results_to_file_adds_txt_extension()